@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU map counting its hits and misses.
+
+    Shared by the caches of the dashboard (StatsCache, FigureCache), which add their keys,
+    values and any storage besides memory on top of it.
+    """
+
+    # Class Attributes
+    MAXSIZE = 128
+
+    def __init__(self, maxsize: int = None) -> None:
+        """
+        Constructor.
+
+        ## Parameters
+        `maxsize` int:
+            Number of entries kept in memory. Defaults to the MAXSIZE of the class.
+        """
+        self.maxsize = type(self).MAXSIZE if maxsize is None else maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        pass
+
+    def lookup(self, key: tuple) -> any:
+        """
+        Returns the entry stored under `key` and marks it as recently used, or None.
+
+        The caller must hold the lock. Hits and misses are not counted.
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        return None
+
+    def contains(self, key: tuple) -> bool:
+        """
+        Whether an entry is stored under `key`, without counting a lookup.
+        """
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key: tuple) -> any:
+        """
+        Returns the entry stored under `key`, or None on a cache miss.
+        """
+        with self.lock:
+            entry = self.lookup(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry) -> None:
+        """
+        Stores `entry` under `key`.
+        """
+        with self.lock:
+            self.addEntry(key, entry)
+        pass
+
+    def addEntry(self, key: tuple, entry) -> None:
+        """
+        Adds an entry, evicting the least recently used one when full.
+
+        The caller must hold the lock.
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        pass
+
+    def clear(self, keep=None) -> None:
+        """
+        Drops the entries whose key `keep` returns False for, or every entry when None.
+        """
+        with self.lock:
+            for key in list(self.entries):
+                if keep is None or not keep(key):
+                    del self.entries[key]
+        pass
+
+    def getHitRate(self) -> float:
+        """
+        Returns the fraction of lookups served from the cache (0 before any lookup).
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return self.hits / lookups if lookups > 0 else 0.0
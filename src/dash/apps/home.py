@@ -3,25 +3,111 @@ from dash import dcc
 from dash import html
 from dash_bootstrap_components._components.Row import Row
 import plotly.express as px
-from dash import Input, Output, State
+from dash import Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 
 # Internal Application Imports
 from app import app
+from src.data.database import GlucoseDatabase
+from src.data.grid import GlucoseGrid
+from src.data.history import HistoryStore
+from src.data.rollups import RollupStore
 from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.agp import AGPSketch
+from src.statistics.cache import StatsCache
+from src.statistics.histogram import GlucoseHistogram
+from src.statistics.online import OnlineStats
+from src.statistics.rolling import RollingMetrics
 from src.statistics.statistics import Stats
 from src.visualization import visualize
+from src.visualization.cache import FigureCache
+from src.visualization.serialize import FigureSerializer
 
 # Other imports
+import math
+import os
 import pandas as pd
 
 # Global Variable for Processed data
 PROCESSED_DATA = None
 
-try:
-    PROCESSED_DATA = WeeklyDataPipeline.pipe()
-except FileNotFoundError:
-    PROCESSED_DATA = None
+# Global Variable for the per-day aggregates shared by the plots
+DAILY_DATA = None
+
+# Global Variable for the glucose histogram used by the range-dependent cards
+HISTOGRAM = None
+
+# Global Variable for the rolling metrics of the stored history
+ROLLING_DATA = None
+
+# Global Variable for the AGP sketch of the stored history
+AGP_SKETCH = None
+
+# Global Variables for the database of the stored history and its rollups, None until
+# the first ingest
+DATABASE = None
+ROLLUPS = None
+
+# Global Variable for the accumulated statistics of the stored history, None until the
+# first ingest
+ONLINE_STATS = None
+
+# Global Variables for the content hash of the data and the shared Stats cache
+DATA_KEY = None
+STATS_CACHE = StatsCache(cache_dir=StatsCache.cache_dir)
+
+# Global Variable for the serialized graphs of the views
+FIGURE_CACHE = FigureCache()
+
+
+def loadData() -> None:
+    """
+    Loads the processed data and everything derived from it into the global variables,
+    then warms the figure cache in the background.
+
+    Called on import and again after every ingest, so the graphs of the new dataset are
+    ready before the dashboard is opened.
+    """
+    global PROCESSED_DATA, DAILY_DATA, HISTOGRAM, ROLLING_DATA, AGP_SKETCH, DATA_KEY
+    global DATABASE, ROLLUPS, ONLINE_STATS
+
+    try:
+        PROCESSED_DATA = WeeklyDataPipeline.cachedPipe()
+        DAILY_DATA = Stats.getDailyAggregates(PROCESSED_DATA)
+        HISTOGRAM = GlucoseHistogram.fromValues(
+            PROCESSED_DATA["chunk3"]["Sensor Glucose (mg/dL)"].to_numpy()
+        )
+        DATA_KEY = StatsCache.hashData(PROCESSED_DATA)
+
+        # Trends use the whole stored history when there is one, read from the
+        # memory-mapped grid so it is never parsed.
+        if os.path.exists(GlucoseGrid.grid_dir):
+            ROLLING_DATA = RollingMetrics.getRolling(GlucoseGrid.load())
+        else:
+            history = HistoryStore().load("chunk3")
+            ROLLING_DATA = RollingMetrics.getRolling(
+                PROCESSED_DATA["chunk3"] if history is None else history
+            )
+
+        AGP_SKETCH = AGPSketch.load()
+        if len(AGP_SKETCH.days) == 0:
+            AGP_SKETCH = AGPSketch.fromFrame(PROCESSED_DATA["chunk3"])
+
+        if os.path.exists(GlucoseDatabase.database_loc):
+            DATABASE = GlucoseDatabase()
+            ROLLUPS = RollupStore(DATABASE)
+
+        ONLINE_STATS = OnlineStats.load()
+        if ONLINE_STATS.count == 0:
+            ONLINE_STATS = None
+    except FileNotFoundError:
+        PROCESSED_DATA = None
+        DATA_KEY = None
+
+    FIGURE_CACHE.invalidate(DATA_KEY)
+    if PROCESSED_DATA is not None:
+        FIGURE_CACHE.warm(DATA_KEY, mainContainer.getTabBuilders())
+    pass
 
 
 def serve_layout() -> list:
@@ -36,6 +122,7 @@ def serve_layout() -> list:
                     id="main-container",
                     children=[
                         mainContainer.getButtonGroup(),
+                        dcc.Store(id="weekly-plot-width"),
                         html.Br(style={"margin": "50px"}),
                         dbc.Row(id="card-row"),
                     ],
@@ -162,6 +249,90 @@ class generalComponents:
         return card
 
 
+class cardFormatter:
+    """
+    Class housing the formatting of the stat values shown on the cards.
+
+    Every function returns "NaN" when the value is missing.
+    """
+
+    def isMissing(value) -> bool:
+        """
+        Whether a stat value is missing.
+        """
+        return value is None or (isinstance(value, float) and math.isnan(value))
+
+    def percent(value: float) -> str:
+        """
+        Formats a fraction as a whole percentage.
+        """
+        if cardFormatter.isMissing(value):
+            return "NaN"
+        return str(int(round(value * 100))) + "%"
+
+    def mgdl(value: float) -> str:
+        """
+        Formats a glucose value.
+        """
+        if cardFormatter.isMissing(value):
+            return "NaN"
+        return str(int(value)) + "mg/dL"
+
+    def day(value: dict) -> str:
+        """
+        Formats a day and its average glucose value.
+        """
+        if value is None or value["Date"] is None:
+            return "NaN"
+        return value["Date"].strftime("%A %m/%d") + " " + str(value["Value"]) + " mg/dL"
+
+    def grams(value: float) -> str:
+        """
+        Formats an amount of carbohydrates.
+        """
+        if cardFormatter.isMissing(value):
+            return "NaN"
+        return str(int(round(value))) + "g"
+
+    def insulin(value: float) -> str:
+        """
+        Formats an approximate amount of insulin.
+        """
+        if cardFormatter.isMissing(value):
+            return "NaN"
+        return "~" + str(int(round(value))) + " Units"
+
+    def a1c(value: float) -> str:
+        """
+        Formats a projected A1C.
+        """
+        if cardFormatter.isMissing(value):
+            return "NaN"
+        return str(round(value, 2)) + "%*"
+
+    def number(value: float, unit: str = "") -> str:
+        """
+        Formats a metric with one decimal and an optional unit.
+        """
+        if cardFormatter.isMissing(value):
+            return "NaN"
+        return str(round(float(value), 1)) + unit
+
+    def risk(low: float, high: float) -> str:
+        """
+        Formats a pair of low and high risk indices.
+        """
+        return cardFormatter.number(low) + " / " + cardFormatter.number(high)
+
+    def reservoir(value: float) -> str:
+        """
+        Formats the amount of insulin used per reservoir.
+        """
+        if cardFormatter.isMissing(value):
+            return "NaN"
+        return str(round(value, 1)) + "U per res."
+
+
 class mainContainer:
     """
     Class housing all of the items to be stored within the main container.
@@ -213,76 +384,193 @@ class mainContainer:
         """
         Defines and returns the weekly view of the plot.
         """
+        return mainContainer.getTabs(
+            [
+                dbc.Tab(label="Weekly Glucose Overview", tab_id="weekly-line"),
+                dbc.Tab(label="Weekly Statistics Overview", tab_id="weekly-violin"),
+                dbc.Tab(label="Rolling Trends", tab_id="rolling-trends"),
+            ]
+        )
 
-        global PROCESSED_DATA
-
-        if PROCESSED_DATA == None:
-            tab1_content = None
-            tab2_content = None
-            tab3_content = None
-        else:
-            tab1_content = visualize.getWeeklyLinePlot(PROCESSED_DATA["chunk3"])
-            tab2_content = visualize.getViolinPlot(PROCESSED_DATA["chunk3"])
-            tab3_content = None
+    def getDailyView() -> any:
+        """
+        Defines and returns the daily view of the plot.
+        """
+        return mainContainer.getTabs(
+            [
+                dbc.Tab(label="Daily Overview", tab_id="daily-line"),
+                dbc.Tab(label="Ambulatory Glucose Profile", tab_id="agp"),
+                # dbc.Tab(label="Placeholder", tab_id="placeholder"),
+            ]
+        )
 
-        tabs = dbc.Tabs(
+    def otherView() -> any:
+        """
+        A yet to be determined view. This is a placeholder function for the time being.
+        """
+        return mainContainer.getTabs(
             [
-                dbc.Tab(tab1_content, label="Weekly Glucose Overview"),
-                dbc.Tab(tab2_content, label="Weekly Statistics Overview"),
-                # dbc.Tab(tab3_content, label="Placeholder"),
+                dbc.Tab(label="Overall Distribution", tab_id="distribution"),
+                dbc.Tab(label="Carb and Insulin Intake", tab_id="carb-insulin"),
+                # dbc.Tab(label="Placeholder", tab_id="placeholder"),
             ]
         )
 
-        return tabs
+    def getTabs(tab_list: list) -> any:
+        """
+        Wraps the tabs of a view with the container of the active tab's content.
 
-    def getDailyView() -> any:
+        The tabs themselves are empty. The graph of the active tab is filled in by
+        onTabChange, so only the graph that is visible is built and sent.
         """
-        Defines and returns the daily view of the plot.
+        tabs = dbc.Tabs(tab_list, id="view-tabs", active_tab=tab_list[0].tab_id)
+        return html.Div([tabs, html.Div(id="tab-content")])
+
+    @app.callback(
+        Output("tab-content", "children"),
+        [Input("view-tabs", "active_tab"), State("view-radios", "value")],
+    )
+    def onTabChange(active_tab, value) -> any:
+        """
+        Returns the graph of the tab opened in the selected view.
         """
         global PROCESSED_DATA
 
-        if PROCESSED_DATA == None:
-            tab1_content = None
-            tab2_content = None
-            tab3_content = None
-        else:
-            tab1_content = visualize.getDailyLinePlot(PROCESSED_DATA["chunk3"])
-            tab2_content = None
-            tab3_content = None
+        if PROCESSED_DATA == None or active_tab is None:
+            return None
+        return mainContainer.getTabContent(value, active_tab)
 
-        tabs = dbc.Tabs(
-            [
-                dbc.Tab(tab1_content, label="Daily Overview"),
-                # dbc.Tab(tab2_content, label="Placeholder"),
-                # dbc.Tab(tab3_content, label="Placeholder"),
-            ]
+    def getTabBuilders() -> dict:
+        """
+        Returns the builder of the graph of every tab, indexed by (view, tab).
+
+        The builders hold the data loaded when this is called, so a warm-up running in
+        the background is not affected by a reload.
+        """
+        global PROCESSED_DATA, DAILY_DATA, ROLLING_DATA, AGP_SKETCH
+
+        chunk1, chunk3 = PROCESSED_DATA["chunk1"], PROCESSED_DATA["chunk3"]
+        daily, rolling, agp = DAILY_DATA, ROLLING_DATA, AGP_SKETCH
+
+        return {
+            (1, "weekly-line"): lambda: visualize.getWeeklyLinePlot(chunk3),
+            (1, "weekly-violin"): lambda: visualize.getViolinPlot(chunk3),
+            (1, "rolling-trends"): lambda: visualize.getRollingTrendPlot(rolling),
+            (2, "daily-line"): lambda: visualize.getDailyLinePlot(chunk3),
+            (2, "agp"): lambda: visualize.getAGPPlot(agp.getRecentPercentiles()),
+            (3, "distribution"): lambda: visualize.getViolinDistPlot(chunk3),
+            (3, "carb-insulin"): lambda: visualize.getCarbInsulinPlot(chunk1, daily),
+        }
+
+    def getTabContent(view: int, tab: str) -> any:
+        """
+        Returns the graph of a tab from the figure cache, building it on a miss.
+        """
+        global DATA_KEY, FIGURE_CACHE
+
+        return FIGURE_CACHE.getGraph(
+            DATA_KEY, view, tab, mainContainer.getTabBuilders()[(view, tab)]
         )
 
-        return tabs
+    # Records the width in pixels of the plot area of the weekly line plot in the
+    # browser, on its first render and on every resize or zoom.
+    app.clientside_callback(
+        """
+        function(relayout_data) {
+            var graph = document.getElementById("weekly-line-plot");
+            var plot = graph && graph.querySelector(".js-plotly-plot");
+            if (!plot || !plot._fullLayout) {
+                return window.dash_clientside.no_update;
+            }
+            return Math.round(plot._fullLayout._size.w);
+        }
+        """,
+        Output("weekly-plot-width", "data"),
+        [Input("weekly-line-plot", "relayoutData")],
+    )
 
-    def otherView() -> any:
+    @app.callback(
+        Output("weekly-line-plot", "figure"),
+        [
+            Input("weekly-line-plot", "relayoutData"),
+            State("weekly-plot-width", "data"),
+        ],
+        prevent_initial_call=True,
+    )
+    def onWeeklyZoom(relayout_data, width) -> any:
         """
-        A yet to be determined view. This is a placeholder function for the time being.
+        Re-resolves the weekly line plot for the zoomed window, so zooming in shows every
+        reading instead of the downsampled overview.
+
+        The window is downsampled to one point per pixel of the plot area in the browser,
+        or to Downsampler.WIDTH points while that width is unknown. Windows too wide for
+        the 5 minute readings to fit that width are drawn from the rollup tiers instead.
         """
         global PROCESSED_DATA
 
-        if PROCESSED_DATA == None:
-            tab1_content = None
-            tab2_content = None
-            tab3_content = None
+        if PROCESSED_DATA == None or relayout_data is None:
+            return no_update
+
+        if relayout_data.get("xaxis.autorange"):
+            start, end = None, None
+        elif "xaxis.range[0]" in relayout_data:
+            start = relayout_data["xaxis.range[0]"]
+            end = relayout_data["xaxis.range[1]"]
+        elif "xaxis.range" in relayout_data:
+            start, end = relayout_data["xaxis.range"]
         else:
-            tab1_content = visualize.getViolinDistPlot(PROCESSED_DATA["chunk3"])
-            tab2_content = visualize.getCarbInsulinPlot(PROCESSED_DATA["chunk1"])
-            tab3_content = None
+            # Changes not touching the x-axis, e.g. a y-axis only zoom.
+            return no_update
 
-        tabs = dbc.Tabs(
-            [
-                dbc.Tab(tab1_content, label="Overall Distribution"),
-                dbc.Tab(tab2_content, label="Carb and Insulin Intake"),
-                # dbc.Tab(tab3_content, label="Placeholder"),
-            ]
+        rollups = mainContainer.getZoomRollups(start, end, width)
+        if rollups is not None:
+            return FigureSerializer.compact(
+                visualize.getWeeklyRollupFigure(rollups, start, end)
+            )
+
+        return FigureSerializer.compact(
+            visualize.getWeeklyLineFigure(
+                mainContainer.getZoomReadings(start, end), start, end, width
+            )
         )
-        return tabs
+
+    def getZoomReadings(start, end) -> pd.DataFrame:
+        """
+        Returns the chunk3 readings the weekly line plot is resolved from for a window.
+
+        Zoomed windows are read from the DATABASE with an indexed range query, so panning
+        reaches the whole stored history instead of the latest export only. The range is
+        widened by Stats.MAX_GAP on each side so the line still reaches the plot edges.
+        """
+        global PROCESSED_DATA, DATABASE
+
+        if DATABASE is not None and start is not None:
+            window = DATABASE.queryRange(
+                "chunk3",
+                pd.Timestamp(start) - Stats.MAX_GAP,
+                pd.Timestamp(end) + Stats.MAX_GAP,
+            )
+            if len(window) > 0:
+                return window
+        return PROCESSED_DATA["chunk3"]
+
+    def getZoomRollups(start, end, width) -> pd.DataFrame:
+        """
+        Returns the rollup buckets of a zoomed window of the weekly line plot, or None
+        when the window is better drawn from the readings.
+
+        Rollups are used when the coarsest tier still holding `width` buckets in the
+        window is coarser than the 5 minute readings, i.e. the window spans weeks.
+        """
+        global ROLLUPS
+
+        if ROLLUPS is None or start is None:
+            return None
+        if ROLLUPS.selectTier(start, end, width) == RollupStore.TIERS[-1][0]:
+            return None
+
+        rollups = ROLLUPS.query(start, end, width)
+        return rollups if len(rollups) > 0 else None
 
     def getCardRow(stats_obj: Stats) -> any:
         """
@@ -293,25 +581,25 @@ class mainContainer:
                 generalComponents.createCard(
                     "card-value-tir",
                     "Time in Range",
-                    stats_obj.tir,
+                    cardFormatter.percent(stats_obj.tir),
                     "The percent of time spent within the defined glucose range.",
                 ),
                 generalComponents.createCard(
                     "card-value-tHigh",
                     "Time high",
-                    stats_obj.timeHigh,
+                    cardFormatter.percent(stats_obj.timeHigh),
                     "The percent of time spent above the defined upper bound.",
                 ),
                 generalComponents.createCard(
                     "card-value-tLow",
                     "Time low",
-                    stats_obj.timeLow,
+                    cardFormatter.percent(stats_obj.timeLow),
                     "The percent of time spent below the defined lower bound.",
                 ),
                 generalComponents.createCard(
                     "card-value-avgBG",
                     "Average mg/dL",
-                    stats_obj.avgBG,
+                    cardFormatter.mgdl(stats_obj.avgBG),
                     "Average blood glucose value among all data.",
                 ),
             ]
@@ -334,10 +622,10 @@ class sidebarContainer:
         explanation = html.Div(
             [
                 html.P(
-                    "\nDefine your target blood sugar range with the slider above then input your daily basal dosage."
+                    "\nDefine your target blood sugar range with the slider above; the cards below the graph update as it moves."
                 ),
                 html.P(
-                    "\n You can then click the refresh button to the left to update the statistics on the cards."
+                    "\n You can then click the refresh button to the left to update the statistics on the cards of the sidebar."
                 ),
             ],
             style={
@@ -362,6 +650,7 @@ class sidebarContainer:
                             step=5,
                             value=[80, 150],
                             allowCross=False,
+                            updatemode="drag",
                             tooltip={"placement": "bottom", "always_visible": False},
                             marks={
                                 70: {"label": "70 mg/dL"},
@@ -373,21 +662,6 @@ class sidebarContainer:
                 html.Br(style={"margin": "20px"}),
                 dbc.Row(
                     [
-                        dbc.Col(
-                            [
-                                dbc.FormFloating(
-                                    [
-                                        dbc.Input(
-                                            id="daily-basal-amount",
-                                            type="number",
-                                            placeholder=120,
-                                        ),
-                                        dbc.Label("Basal Units per day"),
-                                    ]
-                                ),
-                            ],
-                            width=8,
-                        ),
                         dbc.Col(
                             [
                                 dbc.Button(
@@ -452,60 +726,74 @@ class sidebarContainer:
 
         return sidebar_header
 
-    # Output of this slider must be the div ID of the card row below graph and card grid
     @app.callback(
         Output("card-row", "children"),
+        [Input("bg-target-slider", "value")],
+    )
+    def onSliderChange(s_arr) -> any:
+        """
+        Updates the range-dependent cards live as the target range slider moves.
+
+        The metrics are looked up in the precomputed HISTOGRAM, so an update costs the
+        same whatever the length of the history.
+        """
+        global PROCESSED_DATA, HISTOGRAM
+
+        if PROCESSED_DATA == None:
+            stats_obj = Stats(None, s_arr[0], s_arr[1])
+        else:
+            stats_obj = Stats.fromHistogram(HISTOGRAM, s_arr[0], s_arr[1])
+        return mainContainer.getCardRow(stats_obj)
+
+    # Output of this button must be the div ID of the card grid
+    @app.callback(
         Output("card-grid", "children"),
         [
             Input("refresh-button", "n_clicks"),
             State("bg-target-slider", "value"),
-            State("daily-basal-amount", "value"),
         ],
     )
-    def onRefreshClick(n_clicks, s_arr, daily_basal_amount) -> any:
+    def onRefreshClick(n_clicks, s_arr) -> any:
         """
-        Updates all of stat cards based on the provided values.
+        Updates the stat cards of the sidebar grid based on the provided values.
         """
-        global PROCESSED_DATA
+        global PROCESSED_DATA, HISTOGRAM, DATA_KEY, STATS_CACHE, ONLINE_STATS
 
-        # Where the button has not yet been clicked
-        if n_clicks == 0:
-            # will need to pass daily_basal_amount to stats
-            stats_obj = Stats(PROCESSED_DATA, s_arr[0], s_arr[1], 0)
-            return mainContainer.getCardRow(stats_obj), sidebarContainer.getCardGrid(
-                stats_obj
-            )
-        # Where the button is being clicked for the first time
-        if n_clicks == 1:
-            # attempt pipeline again
-            stats_obj = WeeklyDataPipeline.pipe()
-            temp = Stats(PROCESSED_DATA, s_arr[0], s_arr[1], daily_basal_amount)
-            return mainContainer.getCardRow(stats_obj), sidebarContainer.getCardGrid(
-                stats_obj
-            )
-        # Any time after that
+        if PROCESSED_DATA == None:
+            stats_obj = Stats(None, s_arr[0], s_arr[1])
         else:
-            stats_obj = Stats(PROCESSED_DATA, s_arr[0], s_arr[1], daily_basal_amount)
-            return mainContainer.getCardRow(stats_obj), sidebarContainer.getCardGrid(
-                stats_obj
+            # Repeat clicks and common ranges are served from the cache.
+            stats_obj = STATS_CACHE.getStats(
+                PROCESSED_DATA, DATA_KEY, s_arr[0], s_arr[1], HISTOGRAM
             )
 
-    def getCardGrid(stats_obj: Stats) -> any:
+        # History-wide metrics come from the accumulated state, no reading is scanned.
+        history_obj = None
+        if ONLINE_STATS is not None:
+            history_obj = Stats(None, s_arr[0], s_arr[1])
+            history_obj.setCoreMetrics(ONLINE_STATS.getCoreMetrics(s_arr[0], s_arr[1]))
+        return sidebarContainer.getCardGrid(stats_obj, history_obj)
+
+    def getCardGrid(stats_obj: Stats, history_obj: Stats = None) -> any:
         """
         Defines and returns a grid of cards to display stats on.
+
+        ## Parameters
+        `history_obj` Stats:
+            Core metrics of the whole stored history. Its cards are left out when None.
         """
         row1 = dbc.Row(
             [
                 generalComponents.createCard(
                     "card-value-a1c",
                     "Projected A1C",
-                    stats_obj.a1c,
+                    cardFormatter.a1c(stats_obj.a1c),
                     "A1C projected estimate based on 7 days of data. \nNote: This is not an accurate estimation or representation of true A1C given that only 7 days of blood glucose data are available.",
                 ),
                 generalComponents.createCard(
                     "card-value-resEstimate",
                     "Reservoir Estimate",
-                    stats_obj.resEstimate,
+                    cardFormatter.reservoir(stats_obj.resEstimate),
                     "The estimated amount of insulin used in each reservoir assuming infusion sites are changed every 3 days.",
                 ),
             ]
@@ -516,14 +804,14 @@ class sidebarContainer:
                 generalComponents.createCard(
                     "card-value-carbsCons",
                     "Carbs Consumed",
-                    stats_obj.carbsConsumed,
+                    cardFormatter.grams(stats_obj.carbsConsumed),
                     "The number of carbohydrates dosed for by the user.",
                 ),
                 generalComponents.createCard(
                     "card-value-insTotal",
                     "Insulin Dosed",
-                    stats_obj.insulinTotal,
-                    "The total amount of insulin used throughout the week including basal and bolus.",
+                    cardFormatter.insulin(stats_obj.insulinTotal),
+                    "The total amount of insulin used throughout the week including bolus and the basal delivered by the pump.",
                 ),
             ]
         )
@@ -533,17 +821,90 @@ class sidebarContainer:
                 generalComponents.createCard(
                     "card-value-highDay",
                     "Highest Avg. Day",
-                    stats_obj.highestDay,
+                    cardFormatter.day(stats_obj.highestDay),
                     "Day of the week that had the highest average blood glucose levels.",
                 ),
                 generalComponents.createCard(
                     "card-value-lowDay",
                     "Lowest Avg. Day",
-                    stats_obj.lowestDay,
+                    cardFormatter.day(stats_obj.lowestDay),
                     "Day of the week that had the lowest average blood glucose levels.",
                 ),
             ]
         )
 
-        grid = [html.Br(), row1, html.Br(), row2, html.Br(), row3, html.Br()]
+        variability = {} if stats_obj.variability is None else stats_obj.variability
+
+        row4 = dbc.Row(
+            [
+                generalComponents.createCard(
+                    "card-value-mage",
+                    "MAGE",
+                    cardFormatter.number(variability.get("mage"), " mg/dL"),
+                    "Mean Amplitude of Glycemic Excursions: the average size of the rises and falls larger than one standard deviation.",
+                ),
+                generalComponents.createCard(
+                    "card-value-conga",
+                    "CONGA-1",
+                    cardFormatter.number(variability.get("conga"), " mg/dL"),
+                    "Standard deviation of the change in blood glucose over one hour.",
+                ),
+            ]
+        )
+
+        row5 = dbc.Row(
+            [
+                generalComponents.createCard(
+                    "card-value-bgi",
+                    "LBGI / HBGI",
+                    cardFormatter.risk(
+                        variability.get("lbgi"), variability.get("hbgi")
+                    ),
+                    "Low and High Blood Glucose Indices: the risk of hypoglycemia and hyperglycemia from all readings.",
+                ),
+                generalComponents.createCard(
+                    "card-value-jIndex",
+                    "J-Index",
+                    cardFormatter.number(variability.get("j_index")),
+                    "Combined measure of the mean and variability of blood glucose, 0.001 x (mean + SD)^2.",
+                ),
+            ]
+        )
+
+        grid = [
+            html.Br(),
+            row1,
+            html.Br(),
+            row2,
+            html.Br(),
+            row3,
+            html.Br(),
+            row4,
+            html.Br(),
+            row5,
+            html.Br(),
+        ]
+
+        if history_obj is not None:
+            row6 = dbc.Row(
+                [
+                    generalComponents.createCard(
+                        "card-value-historyTir",
+                        "History TIR",
+                        cardFormatter.percent(history_obj.tir),
+                        "Time in range across every reading stored from all of the downloaded exports.",
+                    ),
+                    generalComponents.createCard(
+                        "card-value-historyGmi",
+                        "History GMI",
+                        cardFormatter.a1c(history_obj.gmi),
+                        "Glucose Management Indicator across every reading stored from all of the downloaded exports.",
+                    ),
+                ]
+            )
+            grid += [row6, html.Br()]
         return grid
+
+
+# Loads the data once every view is defined.
+loadData()
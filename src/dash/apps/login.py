@@ -7,6 +7,7 @@ import dash_bootstrap_components as dbc
 
 # Internal Application Imports
 from app import app
+from apps import home
 from src.data import update
 
 
@@ -134,6 +135,8 @@ def onLoginClick(n_clicks, user, token) -> any:
     else:
         try:
             update.main(user, token)
+            # Reloads the dashboard data and warms its figure cache in the background.
+            home.loadData()
             return dbc.Alert(
                 dcc.Link(
                     "Data download successful!\n\nClick here to continue to the dashboard.",
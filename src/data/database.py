@@ -0,0 +1,185 @@
+import os
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from src.data.history import HistoryStore
+
+
+class GlucoseDatabase:
+    """
+    Embedded SQLite storage of the cleaned pump (chunk1) and sensor (chunk3) data.
+
+    Rows are keyed by their HistoryStore fingerprint so that re-inserting overlapping
+    data is a no-op, and every table is indexed on its timestamp (seconds since epoch)
+    so range and aggregate queries only touch the selected time range. The fingerprint
+    version is kept as the `user_version` of the database, and the tables are recreated
+    empty when it changes (see `stale`).
+    """
+
+    # Class Attributes
+    database_loc = "data/processed/diadash.sqlite"
+
+    # Table name and value columns (feature -> SQL column) stored for each chunk.
+    TABLES = {
+        "chunk1": {
+            "table": "pump",
+            "columns": {
+                "Bolus Volume Delivered (U)": "bolus",
+                "Basal Rate (U/h)": "basal_rate",
+                "BWZ Carb Input (grams)": "carbs",
+            },
+        },
+        "chunk3": {
+            "table": "sensor",
+            "columns": {"Sensor Glucose (mg/dL)": "glucose"},
+        },
+    }
+
+    def __init__(self, database_loc: str = None) -> None:
+        """
+        Constructor. Creates the tables and indexes when they do not exist.
+        """
+        self.database_loc = (
+            GlucoseDatabase.database_loc if database_loc is None else database_loc
+        )
+
+        if os.path.dirname(self.database_loc) != "":
+            os.makedirs(os.path.dirname(self.database_loc), exist_ok=True)
+
+        # Whether the tables were just created, so they hold none of the stored history.
+        self.stale = False
+
+        with closing(self.connect()) as con, con:
+            con.execute("PRAGMA journal_mode=WAL")
+            version = con.execute("PRAGMA user_version").fetchone()[0]
+            if version != HistoryStore.FINGERPRINT_VERSION:
+                # Rows keyed by another fingerprint version cannot be matched anymore.
+                for spec in GlucoseDatabase.TABLES.values():
+                    con.execute("DROP TABLE IF EXISTS " + spec["table"])
+                con.execute(
+                    "PRAGMA user_version = " + str(HistoryStore.FINGERPRINT_VERSION)
+                )
+                self.stale = True
+
+            for spec in GlucoseDatabase.TABLES.values():
+                columns = "".join(
+                    ", " + column + " REAL" for column in spec["columns"].values()
+                )
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS "
+                    + spec["table"]
+                    + " (fingerprint INTEGER PRIMARY KEY, ts INTEGER NOT NULL"
+                    + columns
+                    + ")"
+                )
+                con.execute(
+                    "CREATE INDEX IF NOT EXISTS "
+                    + spec["table"]
+                    + "_ts ON "
+                    + spec["table"]
+                    + " (ts)"
+                )
+        pass
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Opens a new connection. Each call gets its own so callbacks can run on any thread.
+        """
+        return sqlite3.connect(self.database_loc)
+
+    def toSeconds(value) -> int:
+        """
+        Converts a timestamp-like value to integer seconds since epoch.
+        """
+        return int(pd.Timestamp(value).value // 10**9)
+
+    def getBounds(start, end) -> tuple:
+        """
+        Converts an optional [start, end) time range to seconds since epoch.
+        """
+        low = -(2**62) if start is None else GlucoseDatabase.toSeconds(start)
+        high = 2**62 if end is None else GlucoseDatabase.toSeconds(end)
+        return low, high
+
+    def insert(self, data_dict: dict) -> int:
+        """
+        Inserts cleaned chunks into the database, skipping rows already stored.
+
+        ## Parameters
+        `data_dict` dict:
+            Dictionary of cleaned DataFrames indexed by chunk, as produced by
+            WeeklyDataPipeline.pipe() or HistoryStore.ingest().
+
+        ## Returns
+        `count` int:
+            Number of rows inserted.
+        """
+        count = 0
+        with closing(self.connect()) as con, con:
+            for chunk, spec in GlucoseDatabase.TABLES.items():
+                if chunk not in data_dict or len(data_dict[chunk]) == 0:
+                    continue
+                df = data_dict[chunk]
+
+                columns = {
+                    "fingerprint": HistoryStore.fingerprint(df)
+                    .to_numpy()
+                    .view("int64"),
+                    "ts": df["Timestamp"].to_numpy("datetime64[s]").astype("int64"),
+                }
+                for feature, column in spec["columns"].items():
+                    values = df[feature].to_numpy("float64")
+                    columns[column] = np.where(np.isnan(values), None, values)
+
+                before = con.total_changes
+                con.executemany(
+                    "INSERT OR IGNORE INTO "
+                    + spec["table"]
+                    + " ("
+                    + ", ".join(columns.keys())
+                    + ") VALUES ("
+                    + ", ".join("?" * len(columns))
+                    + ")",
+                    zip(*[_.tolist() for _ in columns.values()]),
+                )
+                count += con.total_changes - before
+
+        return count
+
+    def queryRange(self, chunk: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Returns the rows of `chunk` within the [start, end) time range.
+
+        The frame has the same features as the cleaned chunk produced by the pipeline,
+        so it can be handed to Stats and the visualize functions directly.
+        """
+        spec = GlucoseDatabase.TABLES[chunk]
+        low, high = GlucoseDatabase.getBounds(start, end)
+
+        with closing(self.connect()) as con:
+            df = pd.read_sql_query(
+                "SELECT ts, "
+                + ", ".join(spec["columns"].values())
+                + " FROM "
+                + spec["table"]
+                + " WHERE ts >= ? AND ts < ? ORDER BY ts",
+                con,
+                params=(low, high),
+            )
+
+        timestamps = pd.to_datetime(df["ts"], unit="s").astype("datetime64[ns]")
+        ret_df = pd.DataFrame(
+            {
+                "Index": np.arange(len(df), dtype="float32"),
+                "Date": timestamps.dt.normalize(),
+                "Time": timestamps.dt.time,
+            }
+        )
+        for feature, column in spec["columns"].items():
+            ret_df[feature] = df[column].astype("float32")
+        ret_df["Timestamp"] = timestamps
+
+        return ret_df
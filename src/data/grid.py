@@ -0,0 +1,191 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class GlucoseGrid:
+    """
+    Sensor glucose resampled onto a regular 5-minute grid.
+
+    The grid starts at midnight of the first day and always covers whole days, so slot
+    `i` is at `origin + i * STEP` and day `d` spans slots `d * SLOTS_PER_DAY` to
+    `(d + 1) * SLOTS_PER_DAY`. Finding the reading for a timestamp or a day is therefore
+    index arithmetic. Slots without a reading are NaN in `glucose` and False in `mask`.
+
+    Grids are saved as plain `.npy` files and loaded memory-mapped, so years of data are
+    available to dashboard workers and notebooks without parsing anything.
+    """
+
+    # Class Attributes
+    grid_dir = "data/processed/grid"
+    STEP = pd.Timedelta(minutes=5)
+    SLOTS_PER_DAY = 288
+
+    def __init__(self, origin, glucose: np.ndarray, mask: np.ndarray) -> None:
+        """
+        Constructor.
+
+        ## Parameters
+        `origin`:
+            Timestamp of the first slot (midnight).
+        `glucose` np.ndarray:
+            float32 glucose value of every slot, NaN where no reading exists.
+        `mask` np.ndarray:
+            bool array, True where a slot holds a reading.
+        """
+        self.origin = pd.Timestamp(origin)
+        self.glucose = glucose
+        self.mask = mask
+        pass
+
+    def fromFrame(df: pd.DataFrame) -> "GlucoseGrid":
+        """
+        Resamples cleaned chunk3 rows onto the grid.
+
+        Every reading goes to the slot its timestamp falls in. When two readings share a
+        slot (e.g. after a sensor clock change) the later one is kept.
+        """
+        df = df.dropna(subset=["Sensor Glucose (mg/dL)"])
+        if len(df) == 0:
+            return GlucoseGrid(
+                pd.Timestamp(0), np.empty(0, dtype="float32"), np.empty(0, dtype=bool)
+            )
+
+        df = df.sort_values("Timestamp", kind="stable")
+        origin = df["Timestamp"].iloc[0].normalize()
+        slots = GlucoseGrid.toSlots(df["Timestamp"], origin)
+
+        days = slots[-1] // GlucoseGrid.SLOTS_PER_DAY + 1
+        glucose = np.full(days * GlucoseGrid.SLOTS_PER_DAY, np.nan, dtype="float32")
+        mask = np.zeros(days * GlucoseGrid.SLOTS_PER_DAY, dtype=bool)
+
+        glucose[slots] = df["Sensor Glucose (mg/dL)"].to_numpy("float32")
+        mask[slots] = True
+
+        return GlucoseGrid(origin, glucose, mask)
+
+    def toSlots(timestamps, origin) -> np.ndarray:
+        """
+        Converts timestamps to slot numbers relative to `origin`.
+        """
+        offsets = pd.DatetimeIndex(timestamps) - pd.Timestamp(origin)
+        return np.asarray(offsets // GlucoseGrid.STEP, dtype="int64")
+
+    def save(self, path: str = None) -> None:
+        """
+        Writes the grid to `path` as .npy arrays and a small JSON metadata file.
+        """
+        path = GlucoseGrid.grid_dir if path is None else path
+        os.makedirs(path, exist_ok=True)
+
+        for name, values in [("glucose", self.glucose), ("mask", self.mask)]:
+            np.save(os.path.join(path, name + ".tmp.npy"), values)
+            os.replace(
+                os.path.join(path, name + ".tmp.npy"),
+                os.path.join(path, name + ".npy"),
+            )
+
+        with open(os.path.join(path, "grid.json"), "w") as f:
+            json.dump(
+                {
+                    "origin": self.origin.isoformat(),
+                    "step": GlucoseGrid.STEP.total_seconds(),
+                },
+                f,
+            )
+        pass
+
+    def load(path: str = None, mmap_mode: str = "r") -> "GlucoseGrid":
+        """
+        Loads a grid saved with save(), memory-mapped by default.
+        """
+        path = GlucoseGrid.grid_dir if path is None else path
+
+        with open(os.path.join(path, "grid.json")) as f:
+            meta = json.load(f)
+
+        return GlucoseGrid(
+            meta["origin"],
+            np.load(os.path.join(path, "glucose.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, "mask.npy"), mmap_mode=mmap_mode),
+        )
+
+    def merge(self, other: "GlucoseGrid") -> "GlucoseGrid":
+        """
+        Returns a grid covering both grids. Readings of `other` win on shared slots.
+        """
+        if len(self.glucose) == 0:
+            return other
+        if len(other.glucose) == 0:
+            return self
+
+        origin = min(self.origin, other.origin)
+        days = (max(self.getEnd(), other.getEnd()) - origin) // pd.Timedelta(days=1)
+
+        glucose = np.full(days * GlucoseGrid.SLOTS_PER_DAY, np.nan, dtype="float32")
+        mask = np.zeros(days * GlucoseGrid.SLOTS_PER_DAY, dtype=bool)
+
+        for grid in [self, other]:
+            offset = GlucoseGrid.toSlots([grid.origin], origin)[0]
+            window = slice(offset, offset + len(grid.glucose))
+            glucose[window] = np.where(grid.mask, grid.glucose, glucose[window])
+            mask[window] |= grid.mask
+
+        return GlucoseGrid(origin, glucose, mask)
+
+    def getEnd(self) -> pd.Timestamp:
+        """
+        Returns the timestamp right after the last slot.
+        """
+        return self.origin + len(self.glucose) * GlucoseGrid.STEP
+
+    def getIndex(self, timestamp) -> int:
+        """
+        Returns the slot holding `timestamp`.
+        """
+        return int((pd.Timestamp(timestamp) - self.origin) // GlucoseGrid.STEP)
+
+    def valueAt(self, timestamp) -> float:
+        """
+        Returns the reading at `timestamp`, or NaN when there is none.
+        """
+        index = self.getIndex(timestamp)
+        if index < 0 or index >= len(self.glucose):
+            return np.nan
+        return float(self.glucose[index])
+
+    def getSlice(self, start, end) -> tuple:
+        """
+        Returns (timestamps, glucose, mask) of the slots within [start, end).
+
+        `glucose` and `mask` are views into the (possibly memory-mapped) arrays.
+        """
+        first = min(max(self.getIndex(start), 0), len(self.glucose))
+        last = min(max(self.getIndex(end), first), len(self.glucose))
+
+        timestamps = pd.date_range(
+            self.origin + first * GlucoseGrid.STEP,
+            periods=last - first,
+            freq=GlucoseGrid.STEP,
+        )
+        return timestamps, self.glucose[first:last], self.mask[first:last]
+
+    def getDay(self, day) -> np.ndarray:
+        """
+        Returns a view of the 288 slots of `day`.
+        """
+        return self.asDays()[(pd.Timestamp(day) - self.origin).days]
+
+    def asDays(self) -> np.ndarray:
+        """
+        Returns a (days x 288) view of the glucose values.
+        """
+        return self.glucose.reshape(-1, GlucoseGrid.SLOTS_PER_DAY)
+
+    def getDates(self) -> pd.DatetimeIndex:
+        """
+        Returns the date of every row of asDays().
+        """
+        return pd.date_range(self.origin, periods=len(self.asDays()), freq="D")
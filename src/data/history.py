@@ -0,0 +1,280 @@
+import json
+import os
+
+import pandas as pd
+
+from src.pipelines.cache import ProcessedCache
+from src.pipelines.pipelines import WeeklyDataPipeline
+
+
+class HistoryStore:
+    """
+    Append-only local history of cleaned CareLink exports.
+
+    Every ingested export only appends the rows that are not already stored, as a new
+    Parquet segment per chunk. Consecutive exports overlap ("Device data shown may exceed
+    selected date range"), so rows are de-duplicated by a fingerprint of their timestamp
+    and values. Only the segments overlapping the time range of the new export are read
+    to do so, keeping the cost of an ingest proportional to the new export.
+    """
+
+    # Class Attributes
+    history_dir = "data/history"
+    CHUNKS = ["chunk1", "chunk3"]
+    MANIFEST = "manifest.json"
+
+    # Columns hashed by fingerprint(), in order, by fingerprint version. The lists are
+    # fixed so that keeping more features in WeeklyDataPipeline.FEATURES does not change
+    # the fingerprint of rows already stored (here and in GlucoseDatabase). Columns are
+    # only added by bumping FINGERPRINT_VERSION, which re-fingerprints stored segments.
+    FINGERPRINT_VERSION = 2
+    FINGERPRINT = {
+        1: [
+            "Sensor Glucose (mg/dL)",
+            "Bolus Volume Delivered (U)",
+            "Basal Rate (U/h)",
+            "BWZ Carb Input (grams)",
+            "Timestamp",
+        ],
+        2: [
+            "Sensor Glucose (mg/dL)",
+            "Bolus Volume Delivered (U)",
+            "Basal Rate (U/h)",
+            "Temp Basal Amount",
+            "Temp Basal Type",
+            "Temp Basal Duration (h:mm:ss)",
+            "Suspend",
+            "Bolus Source",
+            "Alarm",
+            "BWZ Carb Input (grams)",
+            "Timestamp",
+        ],
+    }
+
+    def __init__(self, history_dir: str = None) -> None:
+        """
+        Constructor. Loads the manifest of the store.
+        """
+        self.history_dir = (
+            HistoryStore.history_dir if history_dir is None else history_dir
+        )
+        self.manifest = self.loadManifest()
+        if self.manifest.get("fingerprint", 1) != HistoryStore.FINGERPRINT_VERSION:
+            self.refingerprint()
+        pass
+
+    def loadManifest(self) -> dict:
+        """
+        Loads the manifest listing the ingested exports and the stored segments.
+        """
+        try:
+            with open(os.path.join(self.history_dir, HistoryStore.MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {
+                "exports": [],
+                "segments": [],
+                "fingerprint": HistoryStore.FINGERPRINT_VERSION,
+            }
+
+    def saveManifest(self) -> None:
+        """
+        Atomically writes the manifest of the store.
+        """
+        os.makedirs(self.history_dir, exist_ok=True)
+        path = os.path.join(self.history_dir, HistoryStore.MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+        pass
+
+    def fingerprint(df: pd.DataFrame, version: int = None) -> pd.Series:
+        """
+        Hashes the timestamp and values of each row of a cleaned chunk.
+
+        Only the FINGERPRINT columns of `version` present in `df` are hashed. `Index` is
+        left out as it is relative to the export, and `Date`/`Time` are already covered
+        by `Timestamp`. From version 2 on, identical rows (e.g. the day markers of an
+        export) also hash their occurrence number, so each of them is kept.
+
+        ## Parameters
+        `version` int:
+            Fingerprint version. Defaults to FINGERPRINT_VERSION.
+        """
+        version = HistoryStore.FINGERPRINT_VERSION if version is None else version
+        columns = [_ for _ in HistoryStore.FINGERPRINT[version] if _ in df.columns]
+        hashes = pd.util.hash_pandas_object(df[columns], index=False)
+        if version < 2:
+            return hashes
+
+        occurrence = hashes.groupby(hashes, sort=False).cumcount()
+        return pd.util.hash_pandas_object(
+            pd.DataFrame(
+                {"row": hashes.to_numpy(), "occurrence": occurrence.to_numpy()}
+            ),
+            index=False,
+        ).set_axis(df.index)
+
+    def refingerprint(self) -> None:
+        """
+        Recomputes the Fingerprint column of every stored segment with the current
+        FINGERPRINT_VERSION, and records it in the manifest.
+
+        Each chunk is hashed as a whole, so identical rows split across segments still
+        get distinct occurrence numbers.
+        """
+        for chunk in HistoryStore.CHUNKS:
+            segments = self.getSegments(chunk)
+            if len(segments) == 0:
+                continue
+
+            frames = [
+                pd.read_parquet(os.path.join(self.history_dir, segment["file"]))
+                for segment in segments
+            ]
+            df = pd.concat(frames, ignore_index=True)
+            fingerprints = HistoryStore.fingerprint(df.drop(columns="Fingerprint"))
+
+            offset = 0
+            for segment, frame in zip(segments, frames):
+                frame["Fingerprint"] = fingerprints.iloc[
+                    offset : offset + len(frame)
+                ].to_numpy()
+                offset += len(frame)
+                path = os.path.join(self.history_dir, segment["file"])
+                frame.to_parquet(path + ".tmp", index=False)
+                os.replace(path + ".tmp", path)
+
+        self.manifest["fingerprint"] = HistoryStore.FINGERPRINT_VERSION
+        self.saveManifest()
+        pass
+
+    def getSegments(self, chunk: str, start=None, end=None) -> list:
+        """
+        Returns the segments of `chunk` overlapping the [start, end] time range.
+        """
+        segments = []
+        for segment in self.manifest["segments"]:
+            if segment["chunk"] != chunk:
+                continue
+            if end is not None and pd.Timestamp(segment["start"]) > end:
+                continue
+            if start is not None and pd.Timestamp(segment["end"]) < start:
+                continue
+            segments.append(segment)
+        return segments
+
+    def ingest(self, filename: str, blocksize: int = None) -> dict:
+        """
+        Merges a CareLink export into the history.
+
+        ## Parameters
+        `filename` str:
+            Path to the CareLink CSV export.
+        `blocksize` int:
+            When set, the export is read in streaming mode with blocks of this many
+            bytes (see WeeklyDataPipeline.pipe).
+
+        ## Returns
+        `new_dict` dict:
+            Dictionary of the newly appended rows indexed by chunk.
+        """
+        key = ProcessedCache.hashFile(filename)
+        data_dict = WeeklyDataPipeline.pipe(filename, blocksize)
+
+        new_dict = {}
+        for chunk in HistoryStore.CHUNKS:
+            df = data_dict[chunk]
+            if key in self.manifest["exports"]:
+                new_dict[chunk] = df.iloc[0:0]
+                continue
+
+            df = df.assign(Fingerprint=HistoryStore.fingerprint(df))
+            start = df["Timestamp"].min()
+            end = df["Timestamp"].max()
+
+            # Only the stored rows within the time range of this export can overlap it.
+            known = [
+                pd.read_parquet(
+                    os.path.join(self.history_dir, segment["file"]),
+                    columns=["Fingerprint"],
+                )["Fingerprint"]
+                for segment in self.getSegments(chunk, start, end)
+            ]
+            if len(known) > 0:
+                df = df[~df["Fingerprint"].isin(pd.concat(known))]
+
+            if len(df) > 0:
+                self.appendSegment(chunk, df)
+
+            new_dict[chunk] = df.drop(columns="Fingerprint").reset_index(drop=True)
+
+        if key not in self.manifest["exports"]:
+            self.manifest["exports"].append(key)
+            self.saveManifest()
+
+        return new_dict
+
+    def appendSegment(self, chunk: str, df: pd.DataFrame) -> None:
+        """
+        Writes a new segment of rows for `chunk` and records it in the manifest.
+        """
+        number = len(self.manifest["segments"]) + 1
+        file = os.path.join(chunk, str(number).zfill(6) + ".parquet")
+
+        os.makedirs(os.path.join(self.history_dir, chunk), exist_ok=True)
+        df.to_parquet(os.path.join(self.history_dir, file), index=False)
+
+        self.manifest["segments"].append(
+            {
+                "chunk": chunk,
+                "file": file,
+                "start": df["Timestamp"].min().isoformat(),
+                "end": df["Timestamp"].max().isoformat(),
+                "rows": len(df),
+            }
+        )
+        pass
+
+    def load(self, chunk: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Loads the stored rows of `chunk` within the [start, end) time range.
+
+        ## Parameters
+        `chunk` str:
+            Chunk name, `chunk1` or `chunk3`.
+        `start`, `end`:
+            Bounds of the time range, end excluded. The range is open-ended when None.
+
+        ## Returns
+        `df` pd.DataFrame:
+            The rows sorted by Timestamp, or None when nothing is stored for `chunk`.
+        """
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+
+        frames = [
+            pd.read_parquet(os.path.join(self.history_dir, segment["file"]))
+            for segment in self.getSegments(chunk, start, end)
+        ]
+        if len(frames) == 0:
+            return None
+
+        df = pd.concat(frames, ignore_index=True).drop(columns="Fingerprint")
+        if start is not None:
+            df = df[df["Timestamp"] >= start]
+        if end is not None:
+            df = df[df["Timestamp"] < end]
+
+        return WeeklyDataPipeline.sortByTimestamp(df)
+
+    def asProcessed(self, start=None, end=None) -> dict:
+        """
+        Loads a time range of the history in the same shape as WeeklyDataPipeline.pipe().
+        """
+        data_dict = {
+            chunk: self.load(chunk, start, end) for chunk in HistoryStore.CHUNKS
+        }
+        if any(df is None for df in data_dict.values()):
+            return None
+        return data_dict
@@ -0,0 +1,200 @@
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from src.data.database import GlucoseDatabase
+
+
+class RollupStore:
+    """
+    Multi-resolution rollups of sensor glucose (5 minute, hourly and daily tiers).
+
+    Each tier is a table in the GlucoseDatabase holding the count, sum, min, max and the
+    number of readings below, within and above the standard 70-180 mg/dL range of every
+    bucket. Tiers are updated incrementally from newly ingested rows, and queries read
+    the coarsest tier that still gives at least one bucket per pixel of the plot.
+    """
+
+    # Tier name and bucket size in seconds, from coarsest to finest.
+    TIERS = [("1d", 86400), ("1h", 3600), ("5min", 300)]
+
+    # Bounds (inclusive) of the in-range band counted by the rollups.
+    LOW_BOUND = 70
+    HIGH_BOUND = 180
+
+    # Default plot width used to select a tier when none is given.
+    WIDTH = 1000
+
+    def __init__(self, database: GlucoseDatabase = None) -> None:
+        """
+        Constructor. Creates the tier tables when they do not exist.
+        """
+        self.database = GlucoseDatabase() if database is None else database
+
+        with closing(self.database.connect()) as con, con:
+            for name, _ in RollupStore.TIERS:
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS "
+                    + RollupStore.getTable(name)
+                    + " (bucket INTEGER PRIMARY KEY, count INTEGER, sum REAL,"
+                    " min REAL, max REAL, low INTEGER, in_range INTEGER, high INTEGER)"
+                )
+        pass
+
+    def getTable(name: str) -> str:
+        """
+        Returns the table name of a tier.
+        """
+        return "rollup_" + name
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Folds newly ingested sensor rows into every tier.
+
+        Rows must not have been folded in before, e.g. the chunk3 rows returned by
+        HistoryStore.ingest().
+
+        ## Parameters
+        `df` pd.DataFrame:
+            Cleaned chunk3 rows.
+        """
+        df = df.dropna(subset=["Sensor Glucose (mg/dL)"])
+        if len(df) == 0:
+            return
+
+        seconds = df["Timestamp"].to_numpy("datetime64[s]").astype("int64")
+        glucose = df["Sensor Glucose (mg/dL)"].to_numpy("float64")
+
+        with closing(self.database.connect()) as con, con:
+            for name, size in RollupStore.TIERS:
+                rollup = (
+                    pd.DataFrame(
+                        {
+                            "bucket": seconds // size * size,
+                            "glucose": glucose,
+                            "low": glucose < RollupStore.LOW_BOUND,
+                            "in_range": (glucose >= RollupStore.LOW_BOUND)
+                            & (glucose <= RollupStore.HIGH_BOUND),
+                            "high": glucose > RollupStore.HIGH_BOUND,
+                        }
+                    )
+                    .groupby("bucket")
+                    .agg(
+                        count=("glucose", "count"),
+                        sum=("glucose", "sum"),
+                        min=("glucose", "min"),
+                        max=("glucose", "max"),
+                        low=("low", "sum"),
+                        in_range=("in_range", "sum"),
+                        high=("high", "sum"),
+                    )
+                )
+
+                con.executemany(
+                    "INSERT INTO "
+                    + RollupStore.getTable(name)
+                    + " VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(bucket) DO UPDATE SET"
+                    " count = count + excluded.count, sum = sum + excluded.sum,"
+                    " min = MIN(min, excluded.min), max = MAX(max, excluded.max),"
+                    " low = low + excluded.low, in_range = in_range + excluded.in_range,"
+                    " high = high + excluded.high",
+                    rollup.reset_index().itertuples(index=False, name=None),
+                )
+        pass
+
+    def rebuild(self) -> None:
+        """
+        Recomputes every tier from the sensor table of the database.
+        """
+        with closing(self.database.connect()) as con, con:
+            for name, size in RollupStore.TIERS:
+                table = RollupStore.getTable(name)
+                con.execute("DELETE FROM " + table)
+                con.execute(
+                    "INSERT INTO "
+                    + table
+                    + " SELECT (ts / ?) * ?, COUNT(glucose), SUM(glucose),"
+                    " MIN(glucose), MAX(glucose), SUM(glucose < ?),"
+                    " SUM(glucose BETWEEN ? AND ?), SUM(glucose > ?)"
+                    " FROM sensor WHERE glucose IS NOT NULL GROUP BY ts / ?",
+                    (
+                        size,
+                        size,
+                        RollupStore.LOW_BOUND,
+                        RollupStore.LOW_BOUND,
+                        RollupStore.HIGH_BOUND,
+                        RollupStore.HIGH_BOUND,
+                        size,
+                    ),
+                )
+        pass
+
+    def selectTier(self, start, end, width: int = None) -> str:
+        """
+        Picks the coarsest tier with at least `width` buckets between start and end.
+
+        Falls back to the finest tier when none of them has enough buckets.
+        """
+        width = RollupStore.WIDTH if width is None else width
+        low, high = GlucoseDatabase.getBounds(start, end)
+
+        if start is None or end is None:
+            with closing(self.database.connect()) as con:
+                first, last = con.execute(
+                    "SELECT MIN(bucket), MAX(bucket) FROM "
+                    + RollupStore.getTable(RollupStore.TIERS[-1][0])
+                ).fetchone()
+            if first is None:
+                return RollupStore.TIERS[-1][0]
+            low = max(low, first)
+            high = min(high, last + RollupStore.TIERS[-1][1])
+
+        for name, size in RollupStore.TIERS:
+            if (high - low) / size >= width:
+                return name
+        return RollupStore.TIERS[-1][0]
+
+    def query(self, start=None, end=None, width: int = None) -> pd.DataFrame:
+        """
+        Returns the rollup buckets within [start, end) from the most suitable tier.
+
+        ## Parameters
+        `start`, `end`:
+            Bounds of the time range, end excluded. The range is open-ended when None.
+        `width` int:
+            Width of the plot in pixels. Defaults to WIDTH.
+
+        ## Returns
+        `df` pd.DataFrame:
+            count, mean, min, max and the low/in-range/high fractions of each bucket,
+            indexed by bucket start. The tier used is stored in `df.attrs["tier"]`.
+        """
+        tier = self.selectTier(start, end, width)
+        low, high = GlucoseDatabase.getBounds(start, end)
+
+        with closing(self.database.connect()) as con:
+            df = pd.read_sql_query(
+                "SELECT * FROM "
+                + RollupStore.getTable(tier)
+                + " WHERE bucket >= ? AND bucket < ? ORDER BY bucket",
+                con,
+                params=(low, high),
+            )
+
+        count = df["count"].to_numpy("float64")
+        ret_df = pd.DataFrame(
+            {
+                "count": df["count"],
+                "mean": np.divide(df["sum"], count),
+                "min": df["min"],
+                "max": df["max"],
+                "low": np.divide(df["low"], count),
+                "in_range": np.divide(df["in_range"], count),
+                "high": np.divide(df["high"], count),
+            }
+        )
+        ret_df.index = pd.to_datetime(df["bucket"], unit="s").astype("datetime64[ns]")
+        ret_df.attrs["tier"] = tier
+
+        return ret_df
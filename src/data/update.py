@@ -1,8 +1,16 @@
 import argparse
+import os
 from time import sleep
 from os import listdir, rename
+from src.data.database import GlucoseDatabase
+from src.data.grid import GlucoseGrid
+from src.data.history import HistoryStore
+from src.data.rollups import RollupStore
 from src.data.mcl_interface import MCL_Interface
 from src.pipelines.pipelines import WeeklyDataPipeline
+from src.pipelines.reader import CareLinkReader
+from src.statistics.agp import AGPSketch
+from src.statistics.online import OnlineStats
 
 # CLI Argument settings.
 # parser = argparse.ArgumentParser()
@@ -36,6 +44,28 @@ def main(user, token):
             if _.endswith(".csv"):
                 # rename(external_path + _, external_path + args.filename)
                 rename(external_path + _, external_path + "raw_data.csv")
+
+        # Merges the new export into the local history so older weeks are kept. The
+        # export is streamed so that memory does not grow with its size.
+        history = HistoryStore()
+        new_data = history.ingest(
+            external_path + "raw_data.csv", blocksize=CareLinkReader.BLOCKSIZE
+        )
+        database = GlucoseDatabase()
+        # A new or re-keyed database and its rollups are filled from the whole history.
+        if database.stale:
+            database.insert(history.asProcessed())
+            RollupStore(database).rebuild()
+        else:
+            database.insert(new_data)
+            RollupStore(database).update(new_data["chunk3"])
+        OnlineStats.load().update(new_data["chunk3"]).save()
+        AGPSketch.load().merge(AGPSketch.fromFrame(new_data["chunk3"])).save()
+
+        grid = GlucoseGrid.fromFrame(new_data["chunk3"])
+        if os.path.exists(GlucoseGrid.grid_dir):
+            grid = GlucoseGrid.load(mmap_mode=None).merge(grid)
+        grid.save()
     except:
         raise
     finally:
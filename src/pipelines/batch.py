@@ -0,0 +1,155 @@
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.pipelines.cache import ProcessedCache
+from src.pipelines.pipelines import WeeklyDataPipeline
+
+logger = logging.getLogger(__name__)
+
+
+class BatchPipeline:
+    """
+    Runs WeeklyDataPipeline over many CareLink exports across a process pool.
+
+    Every export is processed independently in a worker process and written to the
+    ProcessedCache, so the batch scales with the number of cores and a failing export
+    does not stop the others.
+    """
+
+    def listExports(source) -> list:
+        """
+        Returns the exports to process.
+
+        ## Parameters
+        `source`:
+            Directory holding the exports (every .csv file in it is used), or a list of
+            export paths.
+        """
+        if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+            return sorted(
+                os.path.join(source, _)
+                for _ in os.listdir(source)
+                if _.endswith(".csv")
+            )
+        if isinstance(source, (str, os.PathLike)):
+            return [source]
+        return list(source)
+
+    def processExport(
+        filename: str, cache_dir: str = None, blocksize: int = None
+    ) -> dict:
+        """
+        Runs the pipeline on one export and stores its output in the ProcessedCache.
+
+        Exports already in the cache are not processed again, and only the row counts
+        of their Parquet files are read. With a `blocksize`, the export is processed in
+        streaming mode (see WeeklyDataPipeline.pipe).
+
+        ## Returns
+        `result` dict:
+            Cache `key` of the export and the number of `rows` of each chunk.
+        """
+        cache = ProcessedCache(cache_dir)
+        key = ProcessedCache.hashFile(filename)
+
+        rows = cache.getRowCounts(key)
+        if rows is None:
+            data_dict = WeeklyDataPipeline.pipe(filename, blocksize)
+            cache.store(key, data_dict)
+            rows = {chunk: len(data_dict[chunk]) for chunk in ProcessedCache.CHUNKS}
+
+        return {"key": key, "rows": rows}
+
+    def run(
+        source, workers: int = None, cache_dir: str = None, blocksize: int = None
+    ) -> dict:
+        """
+        Processes every export of `source` across a process pool.
+
+        ## Parameters
+        `source`:
+            Directory or list of exports, see listExports.
+        `workers` int:
+            Number of worker processes. Defaults to the number of CPUs.
+        `cache_dir` str:
+            Directory of the ProcessedCache. Defaults to ProcessedCache.cache_dir.
+        `blocksize` int:
+            When set, exports are processed in streaming mode with blocks of this many
+            bytes, capping the memory of every worker.
+
+        ## Returns
+        `results` dict:
+            Result of every export indexed by its path. Each result holds a `status` of
+            "ok" with the output of processExport, or "error" with the `error` message.
+        """
+        results = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                filename: pool.submit(
+                    BatchPipeline.processExport, filename, cache_dir, blocksize
+                )
+                for filename in BatchPipeline.listExports(source)
+            }
+
+            for filename, future in futures.items():
+                try:
+                    results[filename] = {"status": "ok", **future.result()}
+                except Exception as e:
+                    results[filename] = {
+                        "status": "error",
+                        "error": type(e).__name__ + ": " + str(e),
+                    }
+
+        return results
+
+
+def main() -> None:
+    """
+    Command line entry point of the batch pipeline.
+    """
+    parser = argparse.ArgumentParser(
+        description="Process many CareLink exports across a process pool."
+    )
+    parser.add_argument(
+        "source",
+        nargs="+",
+        help="Directory holding the exports, or a list of export files.",
+    )
+    parser.add_argument(
+        "--workers",
+        default=None,
+        type=int,
+        help="Number of worker processes (defaults to the number of CPUs).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        type=str,
+        help="Directory of the processed data cache.",
+    )
+    parser.add_argument(
+        "--blocksize",
+        default=None,
+        type=int,
+        help="Bytes read per block to stream every export (reads it whole when unset).",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    source = args.source[0] if len(args.source) == 1 else args.source
+    results = BatchPipeline.run(source, args.workers, args.cache_dir, args.blocksize)
+
+    for filename, result in results.items():
+        if result["status"] == "ok":
+            logger.info("%s: ok %s", filename, result["rows"])
+        else:
+            logger.error("%s: failed (%s)", filename, result["error"])
+
+
+if __name__ == "__main__":
+    """
+    Execute main method.
+    """
+    main()
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.pipelines.reader import CareLinkReader, LazySection
+
+
+class ProcessedCache:
+    """
+    Content-addressed cache of the cleaned pipeline output.
+
+    The cleaned chunks of an export are stored as Parquet files in a directory named
+    after the SHA-256 of the raw file, so a cache entry is only ever reused for the exact
+    bytes it was built from.
+    """
+
+    # Class Attributes
+    cache_dir = "data/processed"
+    # Bumped whenever the output of the pipeline changes shape or types.
+    VERSION = 4
+    CHUNKS = ["chunk1", "chunk3"]
+    BLOCKSIZE = 1024 * 1024
+
+    def __init__(self, cache_dir: str = None) -> None:
+        """
+        Constructor.
+        """
+        self.cache_dir = ProcessedCache.cache_dir if cache_dir is None else cache_dir
+        pass
+
+    def hashFile(filename: str) -> str:
+        """
+        Returns the SHA-256 hex digest of a raw export.
+        """
+        digest = hashlib.sha256()
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(ProcessedCache.BLOCKSIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def getPath(self, key: str) -> str:
+        """
+        Returns the directory holding the cache entry for `key`.
+        """
+        return os.path.join(self.cache_dir, "v" + str(ProcessedCache.VERSION), key)
+
+    def contains(self, key: str) -> bool:
+        """
+        Whether a complete cache entry exists for `key`.
+        """
+        return all(
+            os.path.exists(os.path.join(self.getPath(key), chunk + ".parquet"))
+            for chunk in ProcessedCache.CHUNKS
+        )
+
+    def load(self, key: str, filename: str = None) -> dict:
+        """
+        Loads the cleaned chunks stored under `key`.
+
+        ## Parameters
+        `key` str:
+            Hash of the raw export.
+        `filename` str:
+            Path to the raw export. When given, the chunk2 handle of the export is
+            restored from its recorded section offsets.
+
+        ## Returns
+        `data_dict` dict:
+            Dictionary of cleaned DataFrames indexed by chunk, or None on a cache miss.
+        """
+        if not self.contains(key):
+            return None
+
+        data_dict = {
+            chunk: pd.read_parquet(os.path.join(self.getPath(key), chunk + ".parquet"))
+            for chunk in ProcessedCache.CHUNKS
+        }
+
+        sections_path = os.path.join(self.getPath(key), "sections.json")
+        if filename is not None and os.path.exists(sections_path):
+            with open(sections_path) as f:
+                sections = json.load(f)
+            data_dict["chunk2"] = LazySection(
+                filename, "chunk2", sections, CareLinkReader.getStat(filename)
+            )
+
+        return data_dict
+
+    def getRowCounts(self, key: str) -> dict:
+        """
+        Returns the number of rows of each chunk stored under `key`, or None on a cache
+        miss.
+
+        The counts are read from the Parquet footers, so no column data is loaded.
+        """
+        if not self.contains(key):
+            return None
+
+        return {
+            chunk: pq.read_metadata(
+                os.path.join(self.getPath(key), chunk + ".parquet")
+            ).num_rows
+            for chunk in ProcessedCache.CHUNKS
+        }
+
+    def store(self, key: str, data_dict: dict) -> None:
+        """
+        Persists the cleaned chunks under `key`.
+
+        The entry is written to a temporary directory first and then renamed into place,
+        so concurrent workers never observe a partially written entry.
+        """
+        parent_dir = os.path.dirname(self.getPath(key))
+        os.makedirs(parent_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent_dir, prefix=".tmp-")
+
+        try:
+            for chunk in ProcessedCache.CHUNKS:
+                data_dict[chunk].to_parquet(
+                    os.path.join(tmp_dir, chunk + ".parquet"), index=False
+                )
+            if isinstance(data_dict.get("chunk2"), LazySection):
+                with open(os.path.join(tmp_dir, "sections.json"), "w") as f:
+                    json.dump(data_dict["chunk2"].sections, f)
+            os.rename(tmp_dir, self.getPath(key))
+        except OSError:
+            # Another worker already stored this entry.
+            if not self.contains(key):
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        pass
@@ -1,17 +1,55 @@
 import pandas as pd
 
+from src.pipelines.cache import ProcessedCache
+from src.pipelines.reader import CareLinkReader, LazySection
+
 
 class WeeklyDataPipeline:
     """
     Pipeline dedicated to generating and cleaning the CSV data sourced from the MCL interface.
 
     WeeklyDataPipeline.pipe() performs the following methods in order:
-    Proc 1: readData
-    Proc 2: sectionalizeData
-    Proc 3: scrubFeatures
-    Proc 4: castFeatures
+    Proc 1: readSections (replaces readData and sectionalizeData)
+    Proc 2: scrubFeatures
+    Proc 3: castFeatures
     """
 
+    # Features kept for each chunk.
+    FEATURES = {
+        "chunk1": [
+            "Index",
+            "Date",
+            "Time",
+            "Bolus Volume Delivered (U)",
+            "Basal Rate (U/h)",
+            "Temp Basal Amount",
+            "Temp Basal Type",
+            "Temp Basal Duration (h:mm:ss)",
+            "Suspend",
+            "Bolus Source",
+            "Alarm",
+            "BWZ Carb Input (grams)",
+        ],
+        "chunk3": ["Index", "Date", "Time", "Sensor Glucose (mg/dL)"],
+    }
+
+    # dtypes the features are parsed with by readSections.
+    DTYPES = {
+        "Index": "float32",
+        "Date": str,
+        "Time": str,
+        "Bolus Volume Delivered (U)": "float32",
+        "Basal Rate (U/h)": "float32",
+        "Temp Basal Amount": "float32",
+        "Temp Basal Type": str,
+        "Temp Basal Duration (h:mm:ss)": str,
+        "Suspend": str,
+        "Bolus Source": str,
+        "Alarm": str,
+        "BWZ Carb Input (grams)": "float32",
+        "Sensor Glucose (mg/dL)": "float32",
+    }
+
     def readData(filename: str = "data/raw/raw_data.csv") -> pd.DataFrame:
         """
         Reads the updated Medtronic CareLink data export.
@@ -19,6 +57,40 @@ class WeeklyDataPipeline:
         """
         return pd.read_csv(filename, header=4)
 
+    def readSections(filename: str = "data/raw/raw_data.csv") -> dict:
+        """
+        Reads the chunks of the Medtronic CareLink data export section by section.
+
+        Section boundaries are found with a single scan of the raw bytes, and each chunk
+        is then parsed with only its own features and dtypes. This avoids the all-object
+        intermediate DataFrame produced by readData and sectionalizeData.
+
+        ## Parameters
+        `filename` str:
+            Path to the CareLink CSV export.
+
+        ## Returns
+        `ret_dict` dict:
+            dictionary of parsed DataFrames indexed by chunk. chunk2, when present, is a
+            LazySection handle that is only parsed when loaded.
+        """
+        reader = CareLinkReader(filename)
+
+        ret_dict = {}
+        for chunk, features in WeeklyDataPipeline.FEATURES.items():
+            if reader.hasChunk(chunk):
+                ret_dict[chunk] = reader.readChunk(
+                    chunk,
+                    usecols=features,
+                    dtype={_: WeeklyDataPipeline.DTYPES[_] for _ in features},
+                )
+
+        # Chunk2 -- only indexed, parsed on demand through the handle.
+        if reader.hasChunk("chunk2"):
+            ret_dict["chunk2"] = LazySection.fromReader(reader, "chunk2")
+
+        return ret_dict
+
     def sectionalizeData(df: pd.DataFrame) -> dict:
         """
         Slices a dataframe into 3 smaller DataFrames by index
@@ -68,25 +140,21 @@ class WeeklyDataPipeline:
             Dictionary of DataFrames with the appropriate features removed.
         """
         # Chunk 1
-        chunk_dict["chunk1"] = chunk_dict["chunk1"][
-            [
-                "Index",
-                "Date",
-                "Time",
-                "Bolus Volume Delivered (U)",
-                "Basal Rate (U/h)",
-                "BWZ Carb Input (grams)",
+        if "chunk1" in chunk_dict:
+            chunk_dict["chunk1"] = chunk_dict["chunk1"][
+                WeeklyDataPipeline.FEATURES["chunk1"]
             ]
-        ]
 
-        # Chunk2 -- removed for space saving, currently does not have a use. (may change in future)
-        if "chunk2" in chunk_dict:
+        # Chunk2 -- a parsed chunk2 is removed for space saving, it currently does not have
+        # a use. A LazySection handle costs nothing until loaded, so it is kept.
+        if "chunk2" in chunk_dict and not isinstance(chunk_dict["chunk2"], LazySection):
             del chunk_dict["chunk2"]
 
         # Chunk3
-        chunk_dict["chunk3"] = chunk_dict["chunk3"][
-            ["Index", "Date", "Time", "Sensor Glucose (mg/dL)"]
-        ]
+        if "chunk3" in chunk_dict:
+            chunk_dict["chunk3"] = chunk_dict["chunk3"][
+                WeeklyDataPipeline.FEATURES["chunk3"]
+            ]
 
         return chunk_dict
 
@@ -94,6 +162,9 @@ class WeeklyDataPipeline:
         """
         Casts to appropriate type and re-sorts data.
 
+        A `Timestamp` column (datetime64[ns]) combining `Date` and `Time` is added to
+        chunks 1 and 3, and both chunks are sorted on it in ascending order.
+
         ## Parameters:
         `chunk_dict`: dict
             dictionary of chunks post-feature scrubbing
@@ -103,35 +174,160 @@ class WeeklyDataPipeline:
             Dictionary of DataFrames with features casted and re-sorted.
         """
         # Converting the Index, Date, and Time for chunks 1 and 3
-        for _ in ["chunk1", "chunk3"]:
+        for _ in [key for key in ["chunk1", "chunk3"] if key in chunk_dict]:
             chunk_dict[_]["Index"] = chunk_dict[_]["Index"].astype("float32")
-            chunk_dict[_]["Date"] = pd.to_datetime(chunk_dict[_]["Date"])
-            chunk_dict[_]["Time"] = pd.to_datetime(chunk_dict[_]["Time"]).apply(
-                lambda x: x.time()
+            chunk_dict[_]["Date"] = pd.to_datetime(chunk_dict[_]["Date"]).astype(
+                "datetime64[ns]"
             )
+            chunk_dict[_]["Timestamp"] = chunk_dict[_]["Date"] + pd.to_timedelta(
+                chunk_dict[_]["Time"]
+            )
+            chunk_dict[_]["Time"] = chunk_dict[_]["Timestamp"].dt.time
 
-        for _ in [
-            "Bolus Volume Delivered (U)",
-            "Basal Rate (U/h)",
-            "BWZ Carb Input (grams)",
-        ]:
-            chunk_dict["chunk1"][_] = chunk_dict["chunk1"][_].astype("float32")
+        if "chunk1" in chunk_dict:
+            for _ in [
+                "Bolus Volume Delivered (U)",
+                "Basal Rate (U/h)",
+                "Temp Basal Amount",
+                "BWZ Carb Input (grams)",
+            ]:
+                chunk_dict["chunk1"][_] = chunk_dict["chunk1"][_].astype("float32")
+            chunk_dict["chunk1"]["Temp Basal Duration (h:mm:ss)"] = pd.to_timedelta(
+                chunk_dict["chunk1"]["Temp Basal Duration (h:mm:ss)"]
+            )
 
         # Chunk2 -- Nothing to do as of now
 
         # Chunk3 --
-        chunk_dict["chunk3"]["Sensor Glucose (mg/dL)"] = chunk_dict["chunk3"][
-            "Sensor Glucose (mg/dL)"
-        ].astype("float32")
+        if "chunk3" in chunk_dict:
+            chunk_dict["chunk3"]["Sensor Glucose (mg/dL)"] = chunk_dict["chunk3"][
+                "Sensor Glucose (mg/dL)"
+            ].astype("float32")
+
+        for _ in [key for key in ["chunk1", "chunk3"] if key in chunk_dict]:
+            chunk_dict[_] = WeeklyDataPipeline.sortByTimestamp(chunk_dict[_])
 
         return chunk_dict
 
-    def pipe():
+    def sortByTimestamp(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Sorts a cleaned chunk by its Timestamp column (ties keep their export order).
+        """
+        return df.sort_values("Timestamp", kind="stable").reset_index(drop=True)
+
+    def streamSections(
+        filename: str = "data/raw/raw_data.csv",
+        blocksize: int = None,
+        reader: CareLinkReader = None,
+    ):
+        """
+        Streams the chunks of a CareLink export in fixed-size blocks.
+
+        Rows are routed to their chunk through the section offsets of the export, and
+        scrubFeatures and castFeatures are applied to every block as it is read. Peak
+        memory is therefore set by `blocksize` rather than by the size of the export.
+
+        ## Parameters
+        `filename` str:
+            Path to the CareLink CSV export.
+        `blocksize` int:
+            Number of raw bytes read per block. Defaults to CareLinkReader.BLOCKSIZE.
+        `reader` CareLinkReader:
+            Reader already indexing `filename`, to avoid scanning the export again.
+
+        ## Yields
+        `(chunk, df)` tuple:
+            Chunk name and the cleaned DataFrame of one block.
+        """
+        if reader is None:
+            reader = CareLinkReader(filename)
+
+        for chunk, features in WeeklyDataPipeline.FEATURES.items():
+            if not reader.hasChunk(chunk):
+                continue
+            blocks = reader.iterChunk(
+                chunk,
+                blocksize=blocksize,
+                usecols=features,
+                dtype={_: WeeklyDataPipeline.DTYPES[_] for _ in features},
+            )
+            for block in blocks:
+                block_dict = WeeklyDataPipeline.scrubFeatures({chunk: block})
+                block_dict = WeeklyDataPipeline.castFeatures(block_dict)
+                yield chunk, block_dict[chunk]
+
+    def pipe(filename: str = "data/raw/raw_data.csv", blocksize: int = None) -> dict:
         """
-        Placeholder Pipeline function.
+        Runs the full pipeline on a CareLink export.
+
+        ## Parameters
+        `filename` str:
+            Path to the CareLink CSV export.
+        `blocksize` int:
+            When set, the export is processed in streaming mode (see streamSections)
+            reading this many bytes at a time, so that only the cleaned features are
+            ever held for the whole file.
+
+        ## Returns
+        `data_dict` dict:
+            Dictionary of cleaned DataFrames indexed by chunk.
         """
-        raw_data = WeeklyDataPipeline.readData()
-        data_dict = WeeklyDataPipeline.sectionalizeData(raw_data)
+        if blocksize is not None:
+            reader = CareLinkReader(filename)
+            blocks = {}
+            for chunk, df in WeeklyDataPipeline.streamSections(
+                filename, blocksize, reader
+            ):
+                blocks.setdefault(chunk, []).append(df)
+
+            data_dict = {
+                chunk: WeeklyDataPipeline.sortByTimestamp(
+                    pd.concat(frames, ignore_index=True)
+                )
+                for chunk, frames in blocks.items()
+            }
+
+            # Chunk2 -- kept as a handle, as in readSections.
+            if reader.hasChunk("chunk2"):
+                data_dict["chunk2"] = LazySection.fromReader(reader, "chunk2")
+
+            return data_dict
+
+        data_dict = WeeklyDataPipeline.readSections(filename)
         data_dict = WeeklyDataPipeline.scrubFeatures(data_dict)
         data_dict = WeeklyDataPipeline.castFeatures(data_dict)
         return data_dict
+
+    def cachedPipe(
+        filename: str = "data/raw/raw_data.csv",
+        cache_dir: str = None,
+        blocksize: int = None,
+    ) -> dict:
+        """
+        Runs the pipeline through the processed data cache.
+
+        The raw export is hashed and, when cleaned chunks already exist for that hash,
+        they are loaded directly without parsing the export. Otherwise the full pipeline
+        runs and its output is stored for the next call.
+
+        ## Parameters
+        `filename` str:
+            Path to the CareLink CSV export.
+        `cache_dir` str:
+            Directory of the cache. Defaults to ProcessedCache.cache_dir.
+        `blocksize` int:
+            When set, a cache miss is processed in streaming mode, see pipe.
+
+        ## Returns
+        `data_dict` dict:
+            Dictionary of cleaned DataFrames indexed by chunk.
+        """
+        cache = ProcessedCache(cache_dir)
+        key = ProcessedCache.hashFile(filename)
+
+        data_dict = cache.load(key, filename)
+        if data_dict is None:
+            data_dict = WeeklyDataPipeline.pipe(filename, blocksize)
+            cache.store(key, data_dict)
+
+        return data_dict
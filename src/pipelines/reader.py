@@ -0,0 +1,307 @@
+import io
+import mmap
+import os
+
+import pandas as pd
+
+
+class CareLinkReader:
+    """
+    Offset-indexed reader for the Medtronic CareLink CSV export.
+
+    The export is made up of sections, each introduced by a banner row
+    (`-------,<device>,<section>,<serial>,-------`) followed by its own `Index,...` header.
+    The raw bytes are scanned once (memory-mapped) to record where each section starts
+    and ends, so that every section can then be parsed on its own with only the columns
+    and dtypes it needs.
+    """
+
+    HEADER = b"\nIndex,"
+    BANNER = b"\n-------,"
+
+    # Default number of bytes read per block by iterChunk.
+    BLOCKSIZE = 8 * 1024 * 1024
+
+    # Banner labels mapped to the chunk names used by WeeklyDataPipeline.
+    # Any other labelled section (e.g. aggregated insulin data) is treated as chunk2.
+    SECTION_CHUNKS = {"Pump": "chunk1", "Sensor": "chunk3"}
+
+    def __init__(self, filename: str) -> None:
+        """
+        Constructor. Indexes the sections of `filename`.
+
+        Raises a ValueError when the file holds no CareLink sections.
+        """
+        self.filename = filename
+        self.stat = CareLinkReader.getStat(filename)
+        self.sections = CareLinkReader.scanSections(filename)
+
+        if len(self.sections) == 0:
+            raise ValueError(
+                str(filename) + " is not a CareLink export (no section headers found)."
+            )
+        pass
+
+    def getStat(filename: str) -> tuple:
+        """
+        Returns the size and modification time of a file, used to detect changes.
+        """
+        stat = os.stat(filename)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def scanSections(filename: str) -> list:
+        """
+        Scans the raw export once and records the byte offsets of each section.
+
+        ## Parameters
+        `filename` str:
+            Path to the CareLink CSV export.
+
+        ## Returns
+        `sections` list:
+            List of dicts with the `chunk` name, banner `label`, and the `start`/`end`
+            byte offsets of the section (header row included, banner excluded).
+        """
+        with open(filename, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file, nothing to index.
+                return []
+
+            with mm:
+                headers = (
+                    [0] if mm[: len(CareLinkReader.HEADER) - 1] == b"Index," else []
+                )
+                pos = mm.find(CareLinkReader.HEADER)
+                while pos != -1:
+                    headers.append(pos + 1)
+                    pos = mm.find(CareLinkReader.HEADER, pos + 1)
+
+                sections = []
+                for i, start in enumerate(headers):
+                    end = headers[i + 1] if i + 1 < len(headers) else len(mm)
+
+                    # The banner of the next section is not part of this one.
+                    banner = mm.rfind(CareLinkReader.BANNER, start, end)
+                    if banner != -1:
+                        end = banner + 1
+
+                    sections.append(
+                        {
+                            "label": CareLinkReader.readLabel(mm, start),
+                            "start": start,
+                            "end": end,
+                        }
+                    )
+
+        for i, section in enumerate(sections):
+            section["chunk"] = CareLinkReader.chunkFor(
+                section["label"], i, len(sections)
+            )
+
+        return sections
+
+    def readLabel(mm: mmap.mmap, header_start: int) -> str:
+        """
+        Returns the section label from the banner row preceding a header, if any.
+        """
+        if header_start == 0:
+            return None
+
+        line_start = mm.rfind(b"\n", 0, header_start - 1) + 1
+        line = bytes(mm[line_start : header_start - 1])
+
+        if not line.startswith(b"-------,"):
+            return None
+
+        fields = line.decode("utf-8", errors="replace").split(",")
+        return fields[2].strip() if len(fields) > 2 else None
+
+    def chunkFor(label: str, position: int, count: int) -> str:
+        """
+        Determines which chunk a section belongs to.
+
+        Labelled sections are mapped through SECTION_CHUNKS. Unlabelled sections fall back
+        to the positional layout used by WeeklyDataPipeline.sectionalizeData:
+        first section is chunk1, last section is chunk3 and anything in between is chunk2.
+        """
+        if label is not None:
+            return CareLinkReader.SECTION_CHUNKS.get(label, "chunk2")
+
+        if position == 0:
+            return "chunk1"
+        elif position == count - 1:
+            return "chunk3"
+        return "chunk2"
+
+    def hasChunk(self, chunk: str) -> bool:
+        """
+        Whether the export contains at least one section for `chunk`.
+        """
+        return any(section["chunk"] == chunk for section in self.sections)
+
+    def readChunk(
+        self, chunk: str, usecols: list = None, dtype: dict = None
+    ) -> pd.DataFrame:
+        """
+        Parses every section belonging to `chunk` into a single DataFrame.
+
+        ## Parameters
+        `chunk` str:
+            Chunk name, one of `chunk1`, `chunk2` or `chunk3`.
+        `usecols` list:
+            Columns to parse. All columns are parsed when None.
+        `dtype` dict:
+            dtypes to parse the selected columns with.
+
+        ## Returns
+        `df` pd.DataFrame:
+            The parsed section(s), or None when the export has no such section.
+        """
+        sections = [s for s in self.sections if s["chunk"] == chunk]
+        if len(sections) == 0:
+            return None
+
+        return CareLinkReader.parseSections(self.filename, sections, usecols, dtype)
+
+    def parseSections(
+        filename: str, sections: list, usecols: list = None, dtype: dict = None
+    ) -> pd.DataFrame:
+        """
+        Parses the given sections of an export into a single DataFrame.
+        """
+        frames = []
+        with open(filename, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for section in sections:
+                    frames.append(
+                        pd.read_csv(
+                            io.BytesIO(mm[section["start"] : section["end"]]),
+                            usecols=usecols,
+                            dtype=dtype,
+                        )
+                    )
+
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+    def iterChunk(
+        self,
+        chunk: str,
+        blocksize: int = None,
+        usecols: list = None,
+        dtype: dict = None,
+    ):
+        """
+        Parses the sections belonging to `chunk` in fixed-size blocks.
+
+        Only one block of raw bytes (cut at the last complete line) is held at a time,
+        so memory use is bounded by `blocksize` rather than by the size of the export.
+
+        ## Parameters
+        `chunk` str:
+            Chunk name, one of `chunk1`, `chunk2` or `chunk3`.
+        `blocksize` int:
+            Number of bytes read per block. Defaults to BLOCKSIZE.
+        `usecols` list:
+            Columns to parse. All columns are parsed when None.
+        `dtype` dict:
+            dtypes to parse the selected columns with.
+
+        ## Yields
+        `df` pd.DataFrame:
+            The rows parsed from one block.
+        """
+        if blocksize is None:
+            blocksize = CareLinkReader.BLOCKSIZE
+
+        with open(self.filename, "rb") as f:
+            for section in self.sections:
+                if section["chunk"] != chunk:
+                    continue
+
+                f.seek(section["start"])
+                header = f.readline()
+                remaining = section["end"] - section["start"] - len(header)
+
+                pending = b""
+                while remaining > 0:
+                    block = f.read(min(blocksize, remaining))
+                    if not block:
+                        break
+                    remaining -= len(block)
+
+                    block = pending + block
+                    cut = block.rfind(b"\n") + 1 if remaining > 0 else len(block)
+                    pending = block[cut:]
+
+                    if block[:cut].strip():
+                        yield pd.read_csv(
+                            io.BytesIO(header + block[:cut]),
+                            usecols=usecols,
+                            dtype=dtype,
+                        )
+
+
+class LazySection:
+    """
+    Deferred handle on the sections of a chunk within a raw export.
+
+    Only the byte offsets of the sections are kept, and they are parsed the first time
+    load() is called. Used for chunk2 (carb and insulin data), which most views never use.
+    """
+
+    def __init__(self, filename: str, chunk: str, sections: list, stat: tuple) -> None:
+        """
+        Constructor.
+
+        ## Parameters
+        `filename` str:
+            Path to the CareLink CSV export.
+        `chunk` str:
+            Chunk name of the sections.
+        `sections` list:
+            Sections of the chunk as recorded by CareLinkReader.scanSections.
+        `stat` tuple:
+            CareLinkReader.getStat of the export when the sections were recorded.
+        """
+        self.filename = filename
+        self.chunk = chunk
+        self.sections = sections
+        self.stat = stat
+        self.data = None
+        pass
+
+    def fromReader(reader: CareLinkReader, chunk: str) -> "LazySection":
+        """
+        Creates a handle on the sections of `chunk` indexed by `reader`.
+        """
+        return LazySection(
+            reader.filename,
+            chunk,
+            [_ for _ in reader.sections if _["chunk"] == chunk],
+            reader.stat,
+        )
+
+    def isLoaded(self) -> bool:
+        """
+        Whether the sections have been parsed already.
+        """
+        return self.data is not None
+
+    def load(self) -> pd.DataFrame:
+        """
+        Parses the sections (once) and returns them as a DataFrame.
+
+        Raises a ValueError when the export changed since its sections were recorded.
+        """
+        if self.data is None:
+            if CareLinkReader.getStat(self.filename) != self.stat:
+                raise ValueError(
+                    str(self.filename) + " changed since its sections were indexed."
+                )
+            self.data = CareLinkReader.parseSections(self.filename, self.sections)
+
+        return self.data
@@ -0,0 +1,193 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data.grid import GlucoseGrid
+from src.statistics.histogram import GlucoseHistogram
+
+
+class AGPSketch:
+    """
+    Per-day histograms of sensor glucose by 5-minute time of day, for the Ambulatory
+    Glucose Profile (AGP).
+
+    The sketch of a day counts its readings in 288 time-of-day slots by whole mg/dL value
+    (40-400), and is stored sparsely as (day, bin, count) triplets. Sketches merge by
+    adding counts, so the profile of any date range is the sum of its daily sketches,
+    and the percentile bands are read off the cumulative counts of each slot without
+    ever sorting readings. The resulting profile always has 288 points.
+    """
+
+    # Class Attributes
+    agp_loc = "data/processed/agp.npz"
+    PERCENTILES = [5, 25, 50, 75, 95]
+    # Number of days of the standard AGP report.
+    DAYS = 14
+    VALUES = GlucoseHistogram.MAX - GlucoseHistogram.MIN + 1
+
+    def __init__(self, days: np.ndarray, bins: np.ndarray, counts: np.ndarray) -> None:
+        """
+        Constructor.
+
+        ## Parameters
+        `days` np.ndarray:
+            Day of every triplet, in days since epoch, sorted.
+        `bins` np.ndarray:
+            `slot * VALUES + value - MIN` of every triplet.
+        `counts` np.ndarray:
+            Number of readings of every triplet.
+        """
+        self.days = np.asarray(days, dtype="int64")
+        self.bins = np.asarray(bins, dtype="int64")
+        self.counts = np.asarray(counts, dtype="int64")
+        pass
+
+    def fromTriplets(days, bins, counts) -> "AGPSketch":
+        """
+        Builds a sketch from unsorted triplets, adding up the counts of repeated ones.
+        """
+        keys = np.asarray(days, dtype="int64") * (
+            GlucoseGrid.SLOTS_PER_DAY * AGPSketch.VALUES
+        ) + np.asarray(bins, dtype="int64")
+        keys, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=counts, minlength=len(keys))
+
+        days, bins = np.divmod(keys, GlucoseGrid.SLOTS_PER_DAY * AGPSketch.VALUES)
+        return AGPSketch(days, bins, totals.astype("int64"))
+
+    def fromFrame(df: pd.DataFrame) -> "AGPSketch":
+        """
+        Builds the sketch of cleaned chunk3 rows.
+        """
+        df = df.dropna(subset=["Sensor Glucose (mg/dL)"])
+        timestamps = df["Timestamp"]
+        dates = timestamps.dt.normalize()
+
+        days = (dates - pd.Timestamp(0)) // pd.Timedelta(days=1)
+        slots = (timestamps - dates) // GlucoseGrid.STEP
+        values = np.clip(
+            np.rint(df["Sensor Glucose (mg/dL)"].to_numpy("float64")),
+            GlucoseHistogram.MIN,
+            GlucoseHistogram.MAX,
+        ).astype("int64")
+
+        return AGPSketch.fromTriplets(
+            days.to_numpy("int64"),
+            slots.to_numpy("int64") * AGPSketch.VALUES + values - GlucoseHistogram.MIN,
+            np.ones(len(df), dtype="int64"),
+        )
+
+    def merge(self, other: "AGPSketch") -> "AGPSketch":
+        """
+        Returns the sketch of the readings of both sketches.
+        """
+        return AGPSketch.fromTriplets(
+            np.concatenate([self.days, other.days]),
+            np.concatenate([self.bins, other.bins]),
+            np.concatenate([self.counts, other.counts]),
+        )
+
+    def getCounts(self, start=None, end=None) -> np.ndarray:
+        """
+        Merges the daily sketches of the days within [start, end).
+
+        ## Returns
+        `counts` np.ndarray:
+            (288 x 361) number of readings of every time-of-day slot and value.
+        """
+        first, last = 0, len(self.days)
+        if start is not None:
+            first = np.searchsorted(self.days, AGPSketch.toDay(start), "left")
+        if end is not None:
+            last = np.searchsorted(self.days, AGPSketch.toDay(end), "left")
+
+        counts = np.bincount(
+            self.bins[first:last],
+            weights=self.counts[first:last],
+            minlength=GlucoseGrid.SLOTS_PER_DAY * AGPSketch.VALUES,
+        )
+        return counts.astype("int64").reshape(
+            GlucoseGrid.SLOTS_PER_DAY, AGPSketch.VALUES
+        )
+
+    def toDay(value) -> int:
+        """
+        Converts a date to days since epoch.
+        """
+        return (pd.Timestamp(value).normalize() - pd.Timestamp(0)) // pd.Timedelta(
+            days=1
+        )
+
+    def getPercentiles(
+        self, start=None, end=None, percentiles: list = None
+    ) -> pd.DataFrame:
+        """
+        Computes the AGP percentile bands of the days within [start, end).
+
+        A percentile is the smallest value whose cumulative count reaches that share of
+        the readings of the slot (nearest rank).
+
+        ## Parameters
+        `percentiles` list:
+            Percentiles to compute. Defaults to PERCENTILES.
+
+        ## Returns
+        `bands` pd.DataFrame:
+            One row per time-of-day slot (index in minutes after midnight), one column
+            per percentile and the `count` of readings. Slots without readings are NaN.
+        """
+        percentiles = AGPSketch.PERCENTILES if percentiles is None else percentiles
+        cumulative = np.cumsum(self.getCounts(start, end), axis=1)
+        total = cumulative[:, -1]
+
+        bands = pd.DataFrame(
+            index=pd.Index(
+                np.arange(GlucoseGrid.SLOTS_PER_DAY)
+                * int(GlucoseGrid.STEP.total_seconds() // 60),
+                name="Minute",
+            )
+        )
+        for percentile in percentiles:
+            reached = cumulative >= (percentile / 100 * total)[:, None]
+            values = np.argmax(reached, axis=1) + GlucoseHistogram.MIN
+            bands["p" + str(percentile)] = np.where(total > 0, values, np.nan)
+        bands["count"] = total
+
+        return bands
+
+    def getRecentPercentiles(self, days: int = None) -> pd.DataFrame:
+        """
+        Computes the AGP percentile bands of the last `days` days with readings.
+        Defaults to DAYS.
+        """
+        days = AGPSketch.DAYS if days is None else days
+        if len(self.days) == 0:
+            return self.getPercentiles()
+
+        start = pd.Timestamp(0) + pd.Timedelta(days=int(self.days[-1]) - days + 1)
+        return self.getPercentiles(start=start)
+
+    def save(self, agp_loc: str = None) -> None:
+        """
+        Atomically writes the sketch to a .npz file.
+        """
+        agp_loc = AGPSketch.agp_loc if agp_loc is None else agp_loc
+        if os.path.dirname(agp_loc) != "":
+            os.makedirs(os.path.dirname(agp_loc), exist_ok=True)
+
+        with open(agp_loc + ".tmp", "wb") as f:
+            np.savez(f, days=self.days, bins=self.bins, counts=self.counts)
+        os.replace(agp_loc + ".tmp", agp_loc)
+        pass
+
+    def load(agp_loc: str = None) -> "AGPSketch":
+        """
+        Loads a sketch written by save(), or an empty sketch when there is none.
+        """
+        agp_loc = AGPSketch.agp_loc if agp_loc is None else agp_loc
+        try:
+            with np.load(agp_loc) as arrays:
+                return AGPSketch(arrays["days"], arrays["bins"], arrays["counts"])
+        except FileNotFoundError:
+            return AGPSketch(np.empty(0), np.empty(0), np.empty(0))
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+
+
+class BasalTimeline:
+    """
+    Reconstruction of the basal insulin delivered by the pump from the chunk1 events.
+
+    Scheduled rate changes (`Basal Rate (U/h)`), temp basals (`Temp Basal Amount`, `Type`
+    and `Duration`) and suspends (`Suspend`) are merged into one sorted list of change
+    points, and the state of each is forward-filled across it. Between two change points
+    the delivery rate is constant, so the insulin delivered up to any time is the
+    cumulative sum over the segments plus one partial segment. Totals per day or per hour
+    are differences of that cumulative delivery at the bucket boundaries.
+
+    In Auto Mode (closed loop) the pump does not follow the basal schedule, even though
+    it keeps logging its rate changes. It delivers micro-boluses instead, which are
+    logged as boluses. The scheduled rate is therefore 0 from a micro-bolus until an
+    Auto Mode exit alarm, and the micro-boluses are counted as basal.
+    """
+
+    # Suspend value logged when delivery resumes.
+    RESUME = "NORMAL_PUMPING"
+
+    # Bolus source of the basal delivered in Auto Mode.
+    MICRO_BOLUS = "CLOSED_LOOP_MICRO_BOLUS"
+
+    # Prefixes of the alarms logged when the pump leaves Auto Mode.
+    AUTO_MODE_EXITS = ("AUTO MODE OPEN LOOP", "AUTO MODE EXIT")
+
+    def getChangePoints(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Builds the basal state at every change point of cleaned chunk1 rows.
+
+        Temp basal, suspend, bolus source and alarm columns are optional, older cleaned
+        data without them is treated as having no temp basal, suspend or Auto Mode.
+
+        ## Returns
+        `points` pd.DataFrame:
+            `Timestamp` and effective `Rate` (U/h) from that change point on. The rate is
+            NaN before the first scheduled rate is known.
+        """
+        timestamps = df["Timestamp"]
+        empty = pd.Series(np.nan, index=df.index)
+
+        amount = df.get("Temp Basal Amount", empty).astype("float64")
+        temp_type = df.get("Temp Basal Type", empty)
+        duration = pd.to_timedelta(df.get("Temp Basal Duration (h:mm:ss)", empty))
+        suspend = df.get("Suspend", empty)
+
+        is_micro = BasalTimeline.getMicroBoluses(df)
+        is_exit = (
+            df.get("Alarm", empty)
+            .astype("str")
+            .str.startswith(BasalTimeline.AUTO_MODE_EXITS)
+        )
+
+        is_temp = amount.notna() & duration.notna()
+        events = pd.DataFrame(
+            {
+                "Timestamp": timestamps,
+                "Scheduled": df["Basal Rate (U/h)"].astype("float64"),
+                "TempAmount": amount.where(is_temp),
+                "TempPercent": temp_type.astype("str")
+                .str.lower()
+                .str.contains("percent")
+                .where(is_temp),
+                "TempEnd": (timestamps + duration).where(is_temp),
+                "Suspended": (suspend != BasalTimeline.RESUME).where(suspend.notna()),
+                "AutoMode": pd.Series(True, index=df.index)
+                .where(is_micro)
+                .mask(is_exit, False),
+            }
+        )
+
+        events = events[
+            events[["Scheduled", "TempAmount", "Suspended", "AutoMode"]]
+            .notna()
+            .any(axis=1)
+        ]
+
+        # Temp basals also change the rate when they run out.
+        ends = pd.DataFrame({"Timestamp": events["TempEnd"].dropna()})
+
+        points = pd.concat([events, ends], ignore_index=True)
+        points = points.sort_values("Timestamp", kind="stable").reset_index(drop=True)
+        points = points.ffill().drop_duplicates("Timestamp", keep="last")
+
+        scheduled = points["Scheduled"].to_numpy("float64")
+        temp_active = (points["TempEnd"] > points["Timestamp"]).to_numpy()
+        temp_percent = points["TempPercent"].fillna(False).to_numpy(dtype=bool)
+        temp_amount = points["TempAmount"].to_numpy("float64")
+
+        rate = np.where(
+            temp_active,
+            np.where(temp_percent, scheduled * temp_amount / 100, temp_amount),
+            scheduled,
+        )
+        rate = np.where(points["Suspended"].fillna(False).to_numpy(dtype=bool), 0, rate)
+        # Whatever the pump delivers in Auto Mode is logged as micro-boluses.
+        rate = np.where(points["AutoMode"].fillna(False).to_numpy(dtype=bool), 0, rate)
+
+        return pd.DataFrame(
+            {"Timestamp": points["Timestamp"].to_numpy(), "Rate": rate}
+        ).reset_index(drop=True)
+
+    def getMicroBoluses(df: pd.DataFrame) -> pd.Series:
+        """
+        Returns whether each row of cleaned chunk1 rows is an Auto Mode micro-bolus.
+        """
+        return df.get("Bolus Source", pd.Series(np.nan, index=df.index)).eq(
+            BasalTimeline.MICRO_BOLUS
+        )
+
+    def getMicroBolusVolumes(df: pd.DataFrame, end) -> pd.Series:
+        """
+        Returns the volumes (U) of the micro-boluses delivered up to `end`, indexed by
+        Timestamp.
+        """
+        is_micro = BasalTimeline.getMicroBoluses(df) & (df["Timestamp"] <= end)
+        volumes = df.get(
+            "Bolus Volume Delivered (U)", pd.Series(np.nan, index=df.index)
+        )
+        return pd.Series(
+            volumes[is_micro].astype("float64").to_numpy(),
+            index=pd.DatetimeIndex(df.loc[is_micro, "Timestamp"]),
+        ).fillna(0.0)
+
+    def getCumulative(points: pd.DataFrame, timestamps) -> np.ndarray:
+        """
+        Returns the basal insulin (U) delivered from the first change point to each of
+        `timestamps`. Segments of unknown rate deliver nothing.
+        """
+        times = points["Timestamp"].to_numpy("datetime64[ns]")
+        rate = np.nan_to_num(points["Rate"].to_numpy("float64"))
+        hours = np.diff(times) / np.timedelta64(1, "h")
+
+        # Insulin delivered up to each change point.
+        delivered = np.concatenate([[0.0], np.cumsum(rate[:-1] * hours)])
+
+        timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        segment = np.searchsorted(times, timestamps, side="right") - 1
+        before = segment < 0
+        segment = np.maximum(segment, 0)
+
+        partial = rate[segment] * (
+            (timestamps - times[segment]) / np.timedelta64(1, "h")
+        )
+        return np.where(before, 0.0, delivered[segment] + partial)
+
+    def getTotals(df: pd.DataFrame, freq: str = "D", end=None) -> pd.Series:
+        """
+        Computes the basal insulin delivered per time bucket.
+
+        ## Parameters
+        `df` pd.DataFrame:
+            Cleaned chunk1 rows.
+        `freq` str:
+            Bucket size, e.g. "D" for per-day or "h" for per-hour totals.
+        `end`:
+            Time the delivery is integrated up to. Defaults to the last chunk1 event.
+
+        ## Returns
+        `totals` pd.Series:
+            Basal units delivered in each bucket, Auto Mode micro-boluses included,
+            indexed by bucket start.
+        """
+        if len(df) == 0:
+            return pd.Series(dtype="float64", name="Basal (U)")
+
+        points = BasalTimeline.getChangePoints(df)
+        end = df["Timestamp"].max() if end is None else pd.Timestamp(end)
+
+        boundaries = pd.date_range(
+            points["Timestamp"].iloc[0].floor(freq),
+            end.floor(freq) + pd.tseries.frequencies.to_offset(freq),
+            freq=freq,
+        )
+
+        edges = np.minimum(boundaries.to_numpy(), end.to_datetime64())
+        cumulative = BasalTimeline.getCumulative(points, edges)
+
+        micro = BasalTimeline.getMicroBolusVolumes(df, end)
+        micro = (
+            micro.groupby(micro.index.floor(freq))
+            .sum()
+            .reindex(boundaries[:-1], fill_value=0.0)
+        )
+
+        return pd.Series(
+            np.diff(cumulative) + micro.to_numpy(),
+            index=boundaries[:-1],
+            name="Basal (U)",
+        ).rename_axis("Timestamp")
+
+    def getTotal(df: pd.DataFrame, end=None) -> float:
+        """
+        Returns the total basal insulin delivered over cleaned chunk1 rows, Auto Mode
+        micro-boluses included.
+        """
+        if len(df) == 0:
+            return 0.0
+        points = BasalTimeline.getChangePoints(df)
+        end = df["Timestamp"].max() if end is None else pd.Timestamp(end)
+        return float(
+            BasalTimeline.getCumulative(points, [end])[0]
+            + BasalTimeline.getMicroBolusVolumes(df, end).sum()
+        )
@@ -0,0 +1,189 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+from src.cache import LRUCache
+from src.statistics.statistics import Stats
+
+
+class StatsCache(LRUCache):
+    """
+    Bounded LRU cache of computed Stats objects.
+
+    Entries are keyed by (dataset hash, low_bound, high_bound), so repeated
+    refreshes and commonly used ranges are served without recomputing anything. A single
+    instance is shared by the dashboard callbacks. When a `cache_dir` is given, entries are
+    also pickled there so that other workers serving the same dataset can reuse them.
+    """
+
+    # Class Attributes
+    cache_dir = "data/processed/stats"
+    # Bumped whenever the attributes of Stats change.
+    VERSION = 4
+    MAXSIZE = 128
+
+    def __init__(self, maxsize: int = None, cache_dir: str = None) -> None:
+        """
+        Constructor.
+
+        ## Parameters
+        `maxsize` int:
+            Number of entries kept in memory. Defaults to MAXSIZE.
+        `cache_dir` str:
+            Directory of the disk-backed entries. Entries are only kept in memory when None.
+        """
+        LRUCache.__init__(self, maxsize)
+        self.cache_dir = cache_dir
+        pass
+
+    def hashData(cleaned_dict: dict) -> str:
+        """
+        Returns a content hash of the cleaned chunk1 and chunk3 DataFrames.
+        """
+        digest = hashlib.sha256()
+        for chunk in ["chunk1", "chunk3"]:
+            digest.update(
+                pd.util.hash_pandas_object(cleaned_dict[chunk], index=False)
+                .to_numpy()
+                .tobytes()
+            )
+        return digest.hexdigest()
+
+    def getKey(data_key: str, low_bound: int, high_bound: int) -> tuple:
+        """
+        Returns the cache key of a set of Stats parameters.
+        """
+        return (data_key, int(low_bound), int(high_bound))
+
+    def getEntryDir(self) -> str:
+        """
+        Returns the directory holding the disk-backed entries of the current VERSION.
+        """
+        return os.path.join(self.cache_dir, "v" + str(StatsCache.VERSION))
+
+    def getPath(self, key: tuple) -> str:
+        """
+        Returns the file holding the disk-backed entry for `key`.
+        """
+        name = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.getEntryDir(), name + ".pickle")
+
+    def get(self, key: tuple) -> Stats:
+        """
+        Returns the Stats stored under `key`, or None on a cache miss.
+        """
+        with self.lock:
+            stats_obj = self.lookup(key)
+            if stats_obj is not None:
+                self.hits += 1
+                return stats_obj
+
+        stats_obj = self.loadEntry(key)
+
+        with self.lock:
+            if stats_obj is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.addEntry(key, stats_obj)
+        return stats_obj
+
+    def put(self, key: tuple, stats_obj: Stats) -> None:
+        """
+        Stores `stats_obj` under `key`, in memory and on disk when enabled.
+        """
+        LRUCache.put(self, key, stats_obj)
+        self.storeEntry(key, stats_obj)
+        pass
+
+    def loadEntry(self, key: tuple) -> Stats:
+        """
+        Loads the disk-backed entry for `key`, or None when there is none.
+        """
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.getPath(key), "rb") as f:
+                stats_obj = pickle.load(f)
+            # Marks the entry as recently used for pruneEntries.
+            os.utime(self.getPath(key))
+            return stats_obj
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def storeEntry(self, key: tuple, stats_obj: Stats) -> None:
+        """
+        Atomically writes the disk-backed entry for `key` when enabled.
+        """
+        if self.cache_dir is None:
+            return
+
+        path = self.getPath(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(stats_obj, f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self.pruneEntries()
+        pass
+
+    def pruneEntries(self) -> None:
+        """
+        Deletes the least recently used disk-backed entries beyond `maxsize`.
+
+        Entries are ordered by modification time, which loadEntry refreshes on every
+        hit, so the disk store is bounded like the in-memory one whatever the number of
+        datasets and ranges requested.
+        """
+        entry_dir = self.getEntryDir()
+        paths = []
+        for name in os.listdir(entry_dir):
+            if name.endswith(".pickle"):
+                try:
+                    path = os.path.join(entry_dir, name)
+                    paths.append((os.path.getmtime(path), path))
+                except OSError:
+                    # Already pruned by another worker.
+                    continue
+
+        for _, path in sorted(paths)[: max(len(paths) - self.maxsize, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+        pass
+
+    def getStats(
+        self,
+        cleaned_dict: dict,
+        data_key: str,
+        low_bound: int,
+        high_bound: int,
+        histogram=None,
+    ) -> Stats:
+        """
+        Returns the Stats of `cleaned_dict`, computing and storing them on a cache miss.
+
+        ## Parameters
+        `cleaned_dict` dict:
+            Dictionary of cleaned DataFrames indexed by chunk.
+        `data_key` str:
+            Content hash of `cleaned_dict`, see hashData.
+        `histogram` GlucoseHistogram:
+            Passed on to Stats on a cache miss.
+        """
+        key = StatsCache.getKey(data_key, low_bound, high_bound)
+
+        stats_obj = self.get(key)
+        if stats_obj is None:
+            stats_obj = Stats(cleaned_dict, low_bound, high_bound, histogram)
+            self.put(key, stats_obj)
+        return stats_obj
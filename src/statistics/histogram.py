@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class GlucoseHistogram:
+    """
+    Cumulative histogram of integer sensor glucose values.
+
+    CareLink sensors report whole mg/dL values between 40 and 400, so the readings of a
+    dataset fit in 361 bins. The histogram is built once per dataset; afterwards the time
+    in range, high and low for any pair of bounds are two lookups in the cumulative
+    counts, and the mean and SD come from sums kept alongside them.
+    """
+
+    # Class Attributes
+    MIN = 40
+    MAX = 400
+
+    def __init__(self, counts: np.ndarray) -> None:
+        """
+        Constructor.
+
+        ## Parameters
+        `counts` np.ndarray:
+            Number of readings of every value from MIN to MAX.
+        """
+        self.counts = np.asarray(counts, dtype="int64")
+        values = np.arange(GlucoseHistogram.MIN, GlucoseHistogram.MAX + 1)
+
+        # cumulative[i] is the number of readings below MIN + i.
+        self.cumulative = np.concatenate([[0], np.cumsum(self.counts)])
+        self.count = int(self.cumulative[-1])
+        self.total = float(np.dot(self.counts, values))
+        self.sum_sq = float(np.dot(self.counts, values.astype("float64") ** 2))
+        pass
+
+    def fromValues(glucose: np.ndarray) -> "GlucoseHistogram":
+        """
+        Builds the histogram of a glucose series. NaN readings are excluded and values are
+        rounded and clipped to the MIN-MAX sensor range.
+        """
+        values = np.asarray(glucose, dtype="float64")
+        values = np.rint(values[~np.isnan(values)])
+        values = np.clip(values, GlucoseHistogram.MIN, GlucoseHistogram.MAX)
+
+        return GlucoseHistogram(
+            np.bincount(
+                values.astype("int64") - GlucoseHistogram.MIN,
+                minlength=GlucoseHistogram.MAX - GlucoseHistogram.MIN + 1,
+            )
+        )
+
+    def countBelow(self, bound: float) -> int:
+        """
+        Returns the number of readings strictly below `bound`.
+        """
+        index = int(np.ceil(bound)) - GlucoseHistogram.MIN
+        return int(self.cumulative[min(max(index, 0), len(self.counts))])
+
+    def countAbove(self, bound: float) -> int:
+        """
+        Returns the number of readings strictly above `bound`.
+        """
+        index = int(np.floor(bound)) + 1 - GlucoseHistogram.MIN
+        return self.count - int(self.cumulative[min(max(index, 0), len(self.counts))])
+
+    def getCoreMetrics(self, low_bound: int, high_bound: int) -> dict:
+        """
+        Same metrics as Stats.getCoreMetrics, without scanning the readings.
+
+        ## Parameters
+        `low_bound`, `high_bound` int:
+            Bounds (inclusive) of the target range.
+        """
+        if self.count == 0:
+            return {
+                "count": 0,
+                "tir": np.nan,
+                "time_high": np.nan,
+                "time_low": np.nan,
+                "mean": np.nan,
+                "sd": np.nan,
+                "cv": np.nan,
+                "a1c": np.nan,
+                "gmi": np.nan,
+            }
+
+        low = self.countBelow(low_bound)
+        high = self.countAbove(high_bound)
+
+        mean = self.total / self.count
+        sd = (
+            np.sqrt(max(self.sum_sq - self.total * mean, 0.0) / (self.count - 1))
+            if self.count > 1
+            else 0.0
+        )
+
+        return {
+            "count": self.count,
+            "tir": (self.count - low - high) / self.count,
+            "time_high": high / self.count,
+            "time_low": low / self.count,
+            "mean": mean,
+            "sd": sd,
+            "cv": sd / mean,
+            "a1c": (mean + 46.7) / 28.7,
+            "gmi": 3.31 + 0.02392 * mean,
+        }
@@ -0,0 +1,241 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.statistics.histogram import GlucoseHistogram
+from src.statistics.statistics import Stats
+
+
+class OnlineStats:
+    """
+    Mergeable accumulator of sensor glucose statistics.
+
+    The state of a set of readings is a GlucoseHistogram (counts per value, so the time in
+    any band), the Welford count/mean/M2 for the mean and variance, the min and max, and
+    the run-length state of the in-range stints. States of disjoint sets of readings merge
+    exactly, so appending a day of readings to a year of history only costs that day.
+
+    Only the first and last runs of a state can still grow when more readings arrive, so
+    the run-length state is the head run (state and end), the tail run (state and start)
+    and the longest in-range run seen. Runs are joined across two states when the second
+    starts after the first ends, within Stats.MAX_GAP, in the same band. States that
+    overlap in time (e.g. different patients) are merged without joining runs.
+    """
+
+    # Class Attributes
+    stats_loc = "data/history/online_stats.json"
+
+    # Bounds (inclusive) of the in-range band used for the stints.
+    LOW_BOUND = 70
+    HIGH_BOUND = 180
+
+    def __init__(self) -> None:
+        """
+        Constructor. Creates the state of an empty set of readings.
+        """
+        self.histogram = GlucoseHistogram(
+            np.zeros(GlucoseHistogram.MAX - GlucoseHistogram.MIN + 1, dtype="int64")
+        )
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+        # Run-length state, timestamps of the first/last readings of the runs.
+        self.first = None
+        self.last = None
+        self.head_state = None
+        self.head_end = None
+        self.tail_state = None
+        self.tail_start = None
+        self.longest = pd.Timedelta(0)
+        pass
+
+    def fromFrame(df: pd.DataFrame) -> "OnlineStats":
+        """
+        Builds the state of cleaned chunk3 rows.
+        """
+        glucose = df["Sensor Glucose (mg/dL)"].to_numpy("float64")
+        glucose = glucose[~np.isnan(glucose)]
+
+        state = OnlineStats()
+        if len(glucose) == 0:
+            return state
+
+        state.histogram = GlucoseHistogram.fromValues(glucose)
+        state.count = len(glucose)
+        state.mean = float(glucose.mean())
+        state.m2 = float(((glucose - state.mean) ** 2).sum())
+        state.min = float(glucose.min())
+        state.max = float(glucose.max())
+
+        episodes = Stats.getEpisodes(df, OnlineStats.LOW_BOUND, OnlineStats.HIGH_BOUND)
+        state.first = episodes["Start"].iloc[0]
+        state.last = episodes["End"].iloc[-1]
+        state.head_state = episodes["State"].iloc[0]
+        state.head_end = episodes["End"].iloc[0]
+        state.tail_state = episodes["State"].iloc[-1]
+        state.tail_start = episodes["Start"].iloc[-1]
+        state.longest = Stats.getLongestEpisode(episodes)
+
+        return state
+
+    def merge(self, other: "OnlineStats") -> "OnlineStats":
+        """
+        Returns the state of the readings of both states. Neither state is modified.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+
+        ret = OnlineStats()
+        ret.histogram = GlucoseHistogram(self.histogram.counts + other.histogram.counts)
+
+        # Chan et al. parallel update of the Welford state.
+        ret.count = self.count + other.count
+        delta = other.mean - self.mean
+        ret.mean = self.mean + delta * other.count / ret.count
+        ret.m2 = self.m2 + other.m2 + delta**2 * self.count * other.count / ret.count
+        ret.min = min(self.min, other.min)
+        ret.max = max(self.max, other.max)
+
+        # Order the states in time so the runs can be joined.
+        first, second = (self, other) if self.first <= other.first else (other, self)
+
+        ret.first = first.first
+        ret.last = max(first.last, second.last)
+        ret.head_state, ret.head_end = first.head_state, first.head_end
+        ret.tail_state, ret.tail_start = second.tail_state, second.tail_start
+        ret.longest = max(first.longest, second.longest)
+
+        joined = (
+            first.last < second.first
+            and second.first - first.last <= Stats.MAX_GAP
+            and first.tail_state == second.head_state
+        )
+        if joined:
+            if first.tail_state == "in_range":
+                ret.longest = max(ret.longest, second.head_end - first.tail_start)
+            # A state made of a single run extends into the other one.
+            if first.head_end == first.last:
+                ret.head_end = second.head_end
+            if second.tail_start == second.first:
+                ret.tail_start = first.tail_start
+        elif first.last >= second.first:
+            ret.tail_state, ret.tail_start = (
+                (first.tail_state, first.tail_start)
+                if first.last > second.last
+                else (second.tail_state, second.tail_start)
+            )
+
+        return ret
+
+    def update(self, df: pd.DataFrame) -> "OnlineStats":
+        """
+        Returns the state with newly appended chunk3 rows folded in.
+        """
+        return self.merge(OnlineStats.fromFrame(df))
+
+    def getVariance(self) -> float:
+        """
+        Returns the sample variance of the readings.
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def getCoreMetrics(self, low_bound: int, high_bound: int) -> dict:
+        """
+        Same metrics as Stats.getCoreMetrics, with the mean and SD of the Welford state.
+        """
+        metrics = self.histogram.getCoreMetrics(low_bound, high_bound)
+        if self.count == 0:
+            return metrics
+
+        metrics["mean"] = self.mean
+        metrics["sd"] = float(np.sqrt(self.getVariance()))
+        metrics["cv"] = metrics["sd"] / self.mean
+        metrics["a1c"] = (self.mean + 46.7) / 28.7
+        metrics["gmi"] = 3.31 + 0.02392 * self.mean
+        return metrics
+
+    def formatStamp(value) -> str:
+        """
+        Converts an optional timestamp to ISO format for JSON.
+        """
+        return None if value is None else value.isoformat()
+
+    def parseStamp(value: str) -> pd.Timestamp:
+        """
+        Converts an optional ISO timestamp back from JSON.
+        """
+        return None if value is None else pd.Timestamp(value)
+
+    def toDict(self) -> dict:
+        """
+        Returns the state as a JSON-serializable dict.
+        """
+        stamp = OnlineStats.formatStamp
+        return {
+            "counts": self.histogram.counts.tolist(),
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min,
+            "max": self.max,
+            "first": stamp(self.first),
+            "last": stamp(self.last),
+            "head_state": self.head_state,
+            "head_end": stamp(self.head_end),
+            "tail_state": self.tail_state,
+            "tail_start": stamp(self.tail_start),
+            "longest": self.longest.total_seconds(),
+        }
+
+    def fromDict(state_dict: dict) -> "OnlineStats":
+        """
+        Restores a state returned by toDict().
+        """
+        stamp = OnlineStats.parseStamp
+
+        state = OnlineStats()
+        state.histogram = GlucoseHistogram(np.array(state_dict["counts"]))
+        state.count = state_dict["count"]
+        state.mean = state_dict["mean"]
+        state.m2 = state_dict["m2"]
+        state.min = state_dict["min"]
+        state.max = state_dict["max"]
+        state.first = stamp(state_dict["first"])
+        state.last = stamp(state_dict["last"])
+        state.head_state = state_dict["head_state"]
+        state.head_end = stamp(state_dict["head_end"])
+        state.tail_state = state_dict["tail_state"]
+        state.tail_start = stamp(state_dict["tail_start"])
+        state.longest = pd.Timedelta(seconds=state_dict["longest"])
+        return state
+
+    def save(self, stats_loc: str = None) -> None:
+        """
+        Atomically writes the state as JSON.
+        """
+        stats_loc = OnlineStats.stats_loc if stats_loc is None else stats_loc
+        if os.path.dirname(stats_loc) != "":
+            os.makedirs(os.path.dirname(stats_loc), exist_ok=True)
+
+        with open(stats_loc + ".tmp", "w") as f:
+            json.dump(self.toDict(), f)
+        os.replace(stats_loc + ".tmp", stats_loc)
+        pass
+
+    def load(stats_loc: str = None) -> "OnlineStats":
+        """
+        Loads a state written by save(), or an empty state when there is none.
+        """
+        stats_loc = OnlineStats.stats_loc if stats_loc is None else stats_loc
+        try:
+            with open(stats_loc) as f:
+                return OnlineStats.fromDict(json.load(f))
+        except FileNotFoundError:
+            return OnlineStats()
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from src.data.grid import GlucoseGrid
+
+
+class RollingMetrics:
+    """
+    Time series of TIR, mean, GMI and CV over sliding multi-day windows.
+
+    The readings are reduced to per-day sums (count, sum, sum of squares and in-range
+    count) with one groupby, and every window is the difference of two rows of the
+    cumulative sums of that table. Each step of a window is therefore O(1), whatever the
+    window length and the length of the history.
+    """
+
+    # Window lengths in days.
+    WINDOWS = [14, 30, 90]
+
+    # Share of the possible 5-minute readings of a window needed for a reliable value,
+    # following the 70% CGM wear time of the international TIR consensus.
+    MIN_COVERAGE = 0.7
+
+    def getDailySums(
+        df: pd.DataFrame, low_bound: int = 70, high_bound: int = 180
+    ) -> pd.DataFrame:
+        """
+        Reduces cleaned chunk3 rows to per-day sums.
+
+        ## Returns
+        `sums` pd.DataFrame:
+            `count`, `sum`, `sum_sq` and `in_range` of the readings of every day between
+            the first and last reading, days without readings included as zeros.
+        """
+        df = df.dropna(subset=["Sensor Glucose (mg/dL)"])
+        glucose = df["Sensor Glucose (mg/dL)"].astype("float64")
+
+        sums = (
+            pd.DataFrame(
+                {
+                    "Date": df["Timestamp"].dt.normalize(),
+                    "count": 1,
+                    "sum": glucose,
+                    "sum_sq": glucose**2,
+                    "in_range": glucose.between(low_bound, high_bound).astype("int64"),
+                }
+            )
+            .groupby("Date")
+            .sum()
+        )
+        if len(sums) == 0:
+            return sums
+
+        return sums.reindex(
+            pd.date_range(sums.index.min(), sums.index.max(), freq="D", name="Date"),
+            fill_value=0,
+        )
+
+    def getGridSums(
+        grid: GlucoseGrid, low_bound: int = 70, high_bound: int = 180
+    ) -> pd.DataFrame:
+        """
+        Reduces a GlucoseGrid to per-day sums, see getDailySums.
+
+        Each row of the grid is one day, so the sums are row reductions of the
+        (days x 288) arrays and no reading has to be parsed or grouped.
+        """
+        glucose = grid.asDays().astype("float64")
+        mask = np.asarray(grid.mask).reshape(glucose.shape)
+        values = np.where(mask, glucose, 0)
+
+        return pd.DataFrame(
+            {
+                "count": mask.sum(axis=1).astype("int64"),
+                "sum": values.sum(axis=1),
+                "sum_sq": (values**2).sum(axis=1),
+                "in_range": (mask & (glucose >= low_bound) & (glucose <= high_bound))
+                .sum(axis=1)
+                .astype("int64"),
+            },
+            index=grid.getDates().rename("Date"),
+        )
+
+    def getRolling(
+        df: pd.DataFrame,
+        windows: list = None,
+        low_bound: int = 70,
+        high_bound: int = 180,
+    ) -> pd.DataFrame:
+        """
+        Computes the rolling metrics of cleaned chunk3 rows.
+
+        ## Parameters
+        `df` pd.DataFrame or GlucoseGrid:
+            Cleaned chunk3 rows, or the grid of the stored history.
+        `windows` list:
+            Window lengths in days. Defaults to WINDOWS.
+        `low_bound`, `high_bound` int:
+            Bounds (inclusive) of the target range used for `tir`.
+
+        ## Returns
+        `rolling` pd.DataFrame:
+            One row per window and day, the window ending with that day: `Date`,
+            `Window` (in days), `count`, `coverage`, `tir`, `mean`, `sd`, `cv` and `gmi`.
+            Windows starting before the first day only hold the days available.
+        """
+        windows = RollingMetrics.WINDOWS if windows is None else windows
+        if isinstance(df, GlucoseGrid):
+            sums = RollingMetrics.getGridSums(df, low_bound, high_bound)
+        else:
+            sums = RollingMetrics.getDailySums(df, low_bound, high_bound)
+
+        values = sums[["count", "sum", "sum_sq", "in_range"]].to_numpy("float64")
+        prefix = np.vstack([np.zeros((1, 4)), np.cumsum(values, axis=0)])
+        days = np.arange(len(sums))
+
+        frames = []
+        for window in windows:
+            totals = prefix[days + 1] - prefix[np.maximum(days + 1 - window, 0)]
+            count, total, sum_sq, in_range = totals.T
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = total / count
+                sd = np.where(
+                    count > 1,
+                    np.sqrt(np.maximum(sum_sq - total * mean, 0) / (count - 1)),
+                    np.nan,
+                )
+                frames.append(
+                    pd.DataFrame(
+                        {
+                            "Date": sums.index,
+                            "Window": window,
+                            "count": count.astype("int64"),
+                            "coverage": count / (window * GlucoseGrid.SLOTS_PER_DAY),
+                            "tir": in_range / count,
+                            "mean": mean,
+                            "sd": sd,
+                            "cv": sd / mean,
+                            "gmi": 3.31 + 0.02392 * mean,
+                        }
+                    )
+                )
+
+        if len(frames) == 0:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
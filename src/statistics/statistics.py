@@ -1,226 +1,397 @@
+import numpy as np
 import pandas as pd
 from datetime import date
 
+from src.data.grid import GlucoseGrid
+from src.statistics.basal import BasalTimeline
+from src.statistics.histogram import GlucoseHistogram
+from src.statistics.variability import Variability
+
 
 class Stats:
     """
     Class to house and update all of the stat card values.
+
+    Values are kept numeric; formatting them for the cards is left to the dashboard.
     """
 
+    # Largest time between two sensor readings of the same episode.
+    MAX_GAP = pd.Timedelta(minutes=15)
+
     def __init__(
-        self, cleaned_dict: dict, low_bound: int, high_bound: int, basal_rate: float
+        self,
+        cleaned_dict: dict,
+        low_bound: int,
+        high_bound: int,
+        histogram: GlucoseHistogram = None,
     ) -> None:
+        """
+        Constructor.
+
+        ## Parameters
+        `histogram` GlucoseHistogram:
+            Histogram of the sensor readings of `cleaned_dict`. When given, the core
+            metrics are looked up in it instead of scanning the readings.
+        """
         # TODO: Change these to setX methods.
         if cleaned_dict == None:
-            self.tir = "NaN"
-            self.timeHigh = "NaN"
-            self.timeLow = "NaN"
-            self.avgBG = "NaN"
-            self.highestDay = "NaN"
-            self.lowestDay = "NaN"
-            self.longestStint = "NaN"
-            self.carbsConsumed = "NaN"
-            self.insulinTotal = "NaN"
-            self.a1c = "NaN"
-            self.resEstimate = "NaN"
+            self.tir = None
+            self.timeHigh = None
+            self.timeLow = None
+            self.avgBG = None
+            self.sd = None
+            self.cv = None
+            self.highestDay = None
+            self.lowestDay = None
+            self.daily = None
+            self.longestStint = None
+            self.episodes = None
+            self.carbsConsumed = None
+            self.insulinTotal = None
+            self.basalTotal = None
+            self.a1c = None
+            self.gmi = None
+            self.resEstimate = None
+            self.variability = None
         else:
-            self.tir = Stats.getTimeInRange(
+            if histogram is None:
+                metrics = Stats.getCoreMetrics(
+                    cleaned_dict["chunk3"]["Sensor Glucose (mg/dL)"].to_numpy(),
+                    low_bound,
+                    high_bound,
+                )
+            else:
+                metrics = histogram.getCoreMetrics(low_bound, high_bound)
+            self.setCoreMetrics(metrics)
+            self.daily = Stats.getDailyAggregates(cleaned_dict, low_bound, high_bound)
+            self.highestDay = Stats.getHighestDay(self.daily)
+            self.lowestDay = Stats.getLowestDay(self.daily)
+            self.episodes = Stats.getEpisodes(
                 cleaned_dict["chunk3"], low_bound, high_bound
             )
-            self.timeHigh = Stats.getTimeHigh(cleaned_dict["chunk3"], high_bound)
-            self.timeLow = Stats.getTimeLow(cleaned_dict["chunk3"], low_bound)
-            self.avgBG = Stats.getAvgBG(cleaned_dict["chunk3"])
-            self.highestDay = Stats.getHighestDay(cleaned_dict["chunk3"])
-            self.lowestDay = Stats.getLowestDay(cleaned_dict["chunk3"])
-            self.longestStint = Stats.getLongestStint(
-                cleaned_dict["chunk3"], low_bound, high_bound
+            self.longestStint = Stats.getLongestEpisode(self.episodes)
+            self.variability = Variability.getMetrics(
+                GlucoseGrid.fromFrame(cleaned_dict["chunk3"])
             )
             self.carbsConsumed = Stats.getCarbsConsumed(cleaned_dict["chunk1"])
-            self.insulinTotal = Stats.getInsulinTotal(
-                cleaned_dict["chunk1"], basal_rate
-            )
-            self.a1c = Stats.getProjectedA1C(cleaned_dict["chunk3"])
-            self.resEstimate = Stats.getReservoirEstimate(
-                cleaned_dict["chunk1"], basal_rate
-            )
+            self.basalTotal = BasalTimeline.getTotal(cleaned_dict["chunk1"])
+            self.insulinTotal = Stats.getInsulinTotal(cleaned_dict["chunk1"])
+            self.resEstimate = Stats.getReservoirEstimate(cleaned_dict["chunk1"])
         pass
 
-    def getTimeInRange(df: pd.DataFrame, low_bound: int, high_bound: int) -> str:
+    def setCoreMetrics(self, metrics: dict) -> None:
         """
-        Calculates percent of time in range based on user bounds
+        Sets the attributes holding the output of getCoreMetrics.
         """
-        temp = df["Sensor Glucose (mg/dL)"].fillna(
-            df["Sensor Glucose (mg/dL)"].median()
-        )
-        count = temp.between(low_bound, high_bound, inclusive="both").value_counts()[
-            True
-        ]
-        percent = int(round(count / len(temp), 2) * 100)
-        return str(percent) + "%"
+        self.tir = metrics["tir"]
+        self.timeHigh = metrics["time_high"]
+        self.timeLow = metrics["time_low"]
+        self.avgBG = metrics["mean"]
+        self.sd = metrics["sd"]
+        self.cv = metrics["cv"]
+        self.a1c = metrics["a1c"]
+        self.gmi = metrics["gmi"]
+        pass
 
-    def getTimeHigh(df: pd.DataFrame, high_bound: int) -> str:
+    def fromHistogram(
+        histogram: GlucoseHistogram, low_bound: int, high_bound: int
+    ) -> "Stats":
         """
-        Calculates percent of time high based on upper bound
-        """
-        temp = df["Sensor Glucose (mg/dL)"].fillna(
-            df["Sensor Glucose (mg/dL)"].median()
-        )
-        temp = temp > high_bound
-        count = temp.value_counts()[True]
-        percent = int(round(count / len(temp), 2) * 100)
-        return str(percent) + "%"
+        Returns a Stats holding only the core metrics, looked up in `histogram`.
 
-    def getTimeLow(df: pd.DataFrame, low_bound: int) -> str:
+        Used to update the range-dependent cards live as the target range changes.
         """
-        Calculates percent of time low based on lower bound
-        """
-        temp = df["Sensor Glucose (mg/dL)"].fillna(
-            df["Sensor Glucose (mg/dL)"].median()
-        )
-        temp = temp < low_bound
-        try:
-            count = temp.value_counts()[True]
-            percent = int(round(count / len(temp), 2) * 100)
-            return str(percent) + "%"
-        except KeyError:
-            # This is the scenario in which no low values are found in the dataset.
-            return "0%"
+        stats_obj = Stats(None, low_bound, high_bound)
+        stats_obj.setCoreMetrics(histogram.getCoreMetrics(low_bound, high_bound))
+        return stats_obj
 
-    def getAvgBG(df: pd.DataFrame) -> str:
+    def getCoreMetrics(glucose: np.ndarray, low_bound: int, high_bound: int) -> dict:
         """
-        Calculates average Blood sugar through all of the data
-        """
-        average = df["Sensor Glucose (mg/dL)"].mean().astype("int32")
-        return str(average) + "mg/dL"
+        Computes the core glycemic metrics of a glucose series in a single pass.
 
-    def getHighestDay(df: pd.DataFrame) -> str:
-        """
-        Calculates and returns the day with the highest average blood sugar.
-        """
-        # Need to exclude today
-        days = df["Date"].unique()
-        ret_dict = {"Date": None, "Value": 0}
+        Missing readings (NaN) are excluded.
 
-        for day in days:
-            # If date is today's date then skip it due to possibility of incomplete data
-            if pd.Timestamp(day) == pd.Timestamp(date.today()):
-                break
+        ## Parameters
+        `glucose` np.ndarray:
+            Sensor glucose values in mg/dL.
+        `low_bound`, `high_bound` int:
+            Bounds (inclusive) of the target range.
 
-            found_value = (
-                df.loc[df["Date"] == pd.Timestamp(day)]["Sensor Glucose (mg/dL)"].mean()
-            ).astype("int")
+        ## Returns
+        `metrics` dict:
+            `count` of readings, `tir`, `time_high` and `time_low` as fractions of the
+            readings, `mean`, `sd` (sample), `cv`, `a1c` and `gmi` (both in %).
 
-            found_value = found_value.item()
+        Incredibly important note on `a1c`: This is not an accurate estimation
+        or representation of true A1C given that only 7 days of blood
+        glucose data is available. It is only a representation of an A1C
+        value of the previous 7 days and is intended to show the user a projection
+        of an A1C value should the previous 7 days be characteristic of the next
+        3 months.
 
-            if found_value > ret_dict["Value"]:
-                ret_dict["Date"] = pd.Timestamp(day).strftime("%A %m/%d")
-                ret_dict["Value"] = found_value
+        Described as:
+        28.7 X A1C – 46.7 = eAG
+        therefore
+        (eAG + 46.7) / 28.7 = A1C
+        Equation was sourced from: https://care.diabetesjournals.org/content/diacare/early/2008/06/07/dc08-0545.full.pdf
+        See the description of table 2 on page 4.
 
-        return ret_dict["Date"] + " " + str(ret_dict["Value"]) + " mg/dL"
+        `gmi` is the Glucose Management Indicator: 3.31 + 0.02392 X mean glucose.
+        Equation was sourced from: https://doi.org/10.2337/dc18-1581
+        """
+        values = np.asarray(glucose, dtype="float64")
+        values = values[~np.isnan(values)]
+        count = values.size
+
+        if count == 0:
+            return {
+                "count": 0,
+                "tir": np.nan,
+                "time_high": np.nan,
+                "time_low": np.nan,
+                "mean": np.nan,
+                "sd": np.nan,
+                "cv": np.nan,
+                "a1c": np.nan,
+                "gmi": np.nan,
+            }
+
+        low = np.count_nonzero(values < low_bound)
+        high = np.count_nonzero(values > high_bound)
+
+        total = values.sum()
+        mean = total / count
+        sum_sq = np.dot(values, values)
+        sd = (
+            np.sqrt(max(sum_sq - total * mean, 0.0) / (count - 1)) if count > 1 else 0.0
+        )
 
-    def getLowestDay(df: pd.DataFrame) -> str:
+        return {
+            "count": count,
+            "tir": (count - low - high) / count,
+            "time_high": high / count,
+            "time_low": low / count,
+            "mean": mean,
+            "sd": sd,
+            "cv": sd / mean,
+            "a1c": (mean + 46.7) / 28.7,
+            "gmi": 3.31 + 0.02392 * mean,
+        }
+
+    def getDailyAggregates(
+        cleaned_dict: dict, low_bound: int = 70, high_bound: int = 180
+    ) -> pd.DataFrame:
         """
-        Calculates and returns the day with the lowest average blood sugar.
+        Builds the per-day aggregation table shared by the stats and the plots.
+
+        Each chunk is grouped by `Date` once, so the cost is linear in the number of rows
+        whatever the number of days. Chunks missing from `cleaned_dict` are skipped.
+
+        ## Parameters
+        `cleaned_dict` dict:
+            Dictionary of cleaned DataFrames indexed by chunk.
+        `low_bound`, `high_bound` int:
+            Bounds (inclusive) of the target range used for `tir`.
+
+        ## Returns
+        `daily` pd.DataFrame:
+            Indexed by Date: `mean`, `min`, `max` and `count` of the sensor readings and
+            the `tir` fraction (chunk3), `carbs`, `bolus` (micro-boluses excluded) and
+            reconstructed `basal` totals (chunk1).
         """
-        # Need to exclude today
-        days = df["Date"].unique()
-        ret_dict = {"Date": None, "Value": 500}
-
-        for day in days:
-            # If date is today's date then skip it due to possibility of incomplete data
-            if pd.Timestamp(day) == pd.Timestamp(date.today()):
-                break
+        frames = []
+
+        if cleaned_dict.get("chunk3") is not None:
+            df = cleaned_dict["chunk3"]
+            glucose = df["Sensor Glucose (mg/dL)"]
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "Date": df["Date"],
+                        "glucose": glucose,
+                        "in_range": glucose.between(low_bound, high_bound)
+                        .astype("float64")
+                        .where(glucose.notna()),
+                    }
+                )
+                .groupby("Date")
+                .agg(
+                    mean=("glucose", "mean"),
+                    min=("glucose", "min"),
+                    max=("glucose", "max"),
+                    count=("glucose", "count"),
+                    tir=("in_range", "mean"),
+                )
+            )
 
-            found_value = (
-                df.loc[df["Date"] == pd.Timestamp(day)]["Sensor Glucose (mg/dL)"].mean()
-            ).astype("int")
+        if cleaned_dict.get("chunk1") is not None:
+            df = cleaned_dict["chunk1"]
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "Date": df["Date"],
+                        "carbs": df["BWZ Carb Input (grams)"],
+                        # Micro-boluses are part of the basal.
+                        "bolus": df["Bolus Volume Delivered (U)"].where(
+                            ~BasalTimeline.getMicroBoluses(df)
+                        ),
+                    }
+                )
+                .groupby("Date")
+                .sum()
+            )
+            frames.append(
+                BasalTimeline.getTotals(cleaned_dict["chunk1"], "D")
+                .rename("basal")
+                .rename_axis("Date")
+            )
 
-            found_value = found_value.item()
+        daily = pd.concat(frames, axis=1).sort_index()
+        for column in ["count", "carbs", "bolus", "basal"]:
+            if column in daily.columns:
+                daily[column] = daily[column].fillna(0)
 
-            if found_value < ret_dict["Value"]:
-                ret_dict["Date"] = pd.Timestamp(day).strftime("%A %m/%d")
-                ret_dict["Value"] = found_value
+        return daily
 
-        return ret_dict["Date"] + " " + str(ret_dict["Value"]) + " mg/dL"
+    def getHighestDay(daily: pd.DataFrame) -> dict:
+        """
+        Returns the day (`Date`) with the highest average blood sugar (`Value`).
 
-    def getLongestStint(df: pd.DataFrame, lower_bound: int, upper_bound: int) -> str:
+        ## Parameters
+        `daily` pd.DataFrame:
+            Per-day aggregates from getDailyAggregates.
         """
-        Finds the longest duration of hours that sensor perceived a blood sugar value in range.
-        (Excludes any NaN values.)
+        return Stats.getExtremeDay(daily, highest=True)
+
+    def getLowestDay(daily: pd.DataFrame) -> dict:
         """
+        Returns the day (`Date`) with the lowest average blood sugar (`Value`).
 
-        sorted_df = df.sort_values(["Date", "Time"], ascending=(True, True))
-        sorted_df = sorted_df.dropna(axis=0)
+        ## Parameters
+        `daily` pd.DataFrame:
+            Per-day aggregates from getDailyAggregates.
+        """
+        return Stats.getExtremeDay(daily, highest=False)
 
-        duration = None
-        # Set the initial start time
-        start = pd.Timestamp.combine(sorted_df.iloc[0, 1], sorted_df.iloc[0, 2])
+    def getExtremeDay(daily: pd.DataFrame, highest: bool) -> dict:
+        """
+        Picks the day with the highest or lowest `mean` of the per-day aggregates.
 
-        for index, row in df.iterrows():
-            if (row["Sensor Glucose (mg/dL)"] >= lower_bound) and (
-                row["Sensor Glucose (mg/dL)"] <= upper_bound
-            ):
-                continue
-            else:
-                stop = pd.Timestamp.combine(row["Date"], row["Time"])
-                duration = pd.to_timedelta(stop - start, unit="hours")
-                start = stop
+        Today is skipped due to the possibility of incomplete data, as are days without
+        any sensor reading.
+        """
+        means = daily["mean"].dropna()
+        means = means[means.index != pd.Timestamp(date.today())]
 
-        # TODO: do string formatting on duration before exiting
-        return duration.components
+        if len(means) == 0:
+            return {"Date": None, "Value": None}
 
-    def getCarbsConsumed(df: pd.DataFrame) -> str:
-        """ """
-        total = df["BWZ Carb Input (grams)"].sum().item()
-        return str(total) + "g"
+        day = means.idxmax() if highest else means.idxmin()
+        return {"Date": pd.Timestamp(day), "Value": int(means[day])}
 
-    def getInsulinTotal(df: pd.DataFrame, basal_rate: float) -> str:
+    def getEpisodes(
+        df: pd.DataFrame, low_bound: int, high_bound: int, max_gap=None
+    ) -> pd.DataFrame:
         """
-        Calculates the approximate amount of insulin used throughout the given period
-
-        ## Parameters:
-        `df`
-        `basal_rate`: The basal rate defined in the form on the main app page.
+        Splits the sensor readings into runs of consecutive low, in-range and high values.
+
+        Readings are sorted by Timestamp and NaN values are excluded. A run ends when the
+        glucose leaves its band or when two consecutive readings are more than `max_gap`
+        apart (sensor warm-up, signal loss, ...), so gaps never count as time in range.
+
+        ## Parameters
+        `df` pd.DataFrame:
+            Cleaned chunk3 rows.
+        `low_bound`, `high_bound` int:
+            Bounds (inclusive) of the target range.
+        `max_gap`:
+            Largest time between two readings of the same run. Defaults to MAX_GAP.
+
+        ## Returns
+        `episodes` pd.DataFrame:
+            One row per run with its `State` ("low", "in_range" or "high"), `Start` and
+            `End` (first and last reading), `Duration` and number of `Readings`.
         """
-        basal_total = basal_rate * 7
-        total = int(df["Bolus Volume Delivered (U)"].sum()) + basal_total
-        return "~" + str(total) + " Units"
+        max_gap = Stats.MAX_GAP if max_gap is None else pd.Timedelta(max_gap)
 
-    def getProjectedA1C(df: pd.DataFrame) -> str:
-        """
-        Calculates an **projected** A1C based on blood glucose data.
+        df = df.dropna(subset=["Sensor Glucose (mg/dL)"]).sort_values(
+            "Timestamp", kind="stable"
+        )
+        timestamps = df["Timestamp"].to_numpy("datetime64[ns]")
+        glucose = df["Sensor Glucose (mg/dL)"].to_numpy("float64")
 
-        Incredibly important note: This is not an accurate estimation
-        or representation of true A1C given that only 7 days of blood
-        glucose data is available. It is only a representation of an A1C
-        value of the previous 7 days and is intended to show the user a projection
-        of an A1C value should the previous 7 days be characteristic of the next
-        3 months.
+        # 0: low, 1: in range, 2: high
+        state = (glucose >= low_bound).astype("int8") + (glucose > high_bound)
 
+        breaks = (state[1:] != state[:-1]) | (
+            np.diff(timestamps) > max_gap.to_timedelta64()
+        )
+        starts = np.flatnonzero(np.concatenate([[len(state) > 0], breaks]))
+        ends = np.flatnonzero(np.concatenate([breaks, [len(state) > 0]]))
+
+        return pd.DataFrame(
+            {
+                "State": pd.Categorical.from_codes(
+                    state[starts], categories=["low", "in_range", "high"]
+                ),
+                "Start": timestamps[starts],
+                "End": timestamps[ends],
+                "Duration": timestamps[ends] - timestamps[starts],
+                "Readings": ends - starts + 1,
+            }
+        )
 
-        Described as:
-        28.7 X A1C – 46.7 = eAG
-        therefore
-        (eAG + 46.7) / 28.7 = A1C
-        Equation was sourced from: https://care.diabetesjournals.org/content/diacare/early/2008/06/07/dc08-0545.full.pdf
-        See the description of table 2 on page 4.
+    def getLongestStint(
+        df: pd.DataFrame, lower_bound: int, upper_bound: int, max_gap=None
+    ) -> pd.Timedelta:
+        """
+        Finds the longest duration that sensor perceived a blood sugar value in range.
+        (Excludes any NaN values, see getEpisodes.)
         """
+        return Stats.getLongestEpisode(
+            Stats.getEpisodes(df, lower_bound, upper_bound, max_gap)
+        )
 
-        eAG = df["Sensor Glucose (mg/dL)"].mean().astype("int32")
-        A1C = (eAG + 46.7) / 28.7
+    def getLongestEpisode(
+        episodes: pd.DataFrame, state: str = "in_range"
+    ) -> pd.Timedelta:
+        """
+        Returns the longest Duration among the `state` episodes of getEpisodes.
+        """
+        durations = episodes.loc[episodes["State"] == state, "Duration"]
 
-        # Rounding for readability
-        A1C = round(A1C, 2)
+        if len(durations) == 0:
+            return pd.Timedelta(0)
+        return durations.max()
 
-        return str(A1C) + "%*"
+    def getCarbsConsumed(df: pd.DataFrame) -> float:
+        """
+        Calculates the grams of carbohydrates entered in the bolus wizard.
+        """
+        return df["BWZ Carb Input (grams)"].sum().item()
 
-    def getReservoirEstimate(df: pd.DataFrame, basal_rate: float) -> str:
+    def getBolusTotal(df: pd.DataFrame) -> float:
         """
-        Calculates and returns the estimated amount of insulin used every three days.
+        Calculates the bolus insulin delivered, leaving out the Auto Mode micro-boluses
+        that BasalTimeline counts as basal.
         """
-        basal_total = basal_rate * 7
-        ins_total = int(df["Bolus Volume Delivered (U)"].sum()) + basal_total
+        boluses = df["Bolus Volume Delivered (U)"].where(
+            ~BasalTimeline.getMicroBoluses(df)
+        )
+        return float(boluses.sum())
 
-        resEstimate = ins_total / 3
+    def getInsulinTotal(df: pd.DataFrame) -> float:
+        """
+        Calculates the amount of insulin delivered throughout the given period: the
+        bolus volumes plus the basal reconstructed from the pump events.
+        """
+        return Stats.getBolusTotal(df) + BasalTimeline.getTotal(df)
 
-        return str(resEstimate) + "U per res."
+    def getReservoirEstimate(df: pd.DataFrame) -> float:
+        """
+        Calculates and returns the estimated amount of insulin used every three days.
+        """
+        days = (df["Timestamp"].max() - df["Timestamp"].min()) / pd.Timedelta(days=1)
+        if not days > 0:
+            return np.nan
+        return Stats.getInsulinTotal(df) / days * 3
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+
+from src.data.grid import GlucoseGrid
+
+
+class Variability:
+    """
+    Glycemic variability metrics computed on the regular 5-minute GlucoseGrid.
+
+    On the grid, a reading n hours earlier or at the same time the day before is a fixed
+    number of slots away, so CONGA, MODD and the daily risk ranges are array shifts and
+    reshapes. Only MAGE walks a sequence, and only over the turning points of the series.
+    """
+
+    # Hours between the readings compared by CONGA.
+    CONGA_HOURS = 1
+
+    def getValues(grid: GlucoseGrid) -> np.ndarray:
+        """
+        Returns the readings of a grid, in time order, as float64.
+        """
+        return np.asarray(grid.glucose, dtype="float64")[np.asarray(grid.mask)]
+
+    def getJIndex(values: np.ndarray) -> float:
+        """
+        J-index: 0.001 X (mean + SD)^2, glucose in mg/dL.
+        Equation was sourced from: https://doi.org/10.1055/s-2007-979906
+        """
+        if len(values) < 2:
+            return np.nan
+        return 0.001 * (values.mean() + values.std(ddof=1)) ** 2
+
+    def getRisk(values: np.ndarray) -> tuple:
+        """
+        Returns the low and high blood glucose risk of every reading.
+
+        f(BG) = 1.509 X (ln(BG)^1.084 - 5.381) and risk = 10 X f(BG)^2, counted as low
+        risk where f(BG) < 0 and as high risk otherwise.
+        Equation was sourced from: https://doi.org/10.2337/diacare.21.11.1870
+        """
+        f = 1.509 * (np.log(values) ** 1.084 - 5.381)
+        risk = 10 * f**2
+        return np.where(f < 0, risk, 0.0), np.where(f > 0, risk, 0.0)
+
+    def getRiskIndices(values: np.ndarray) -> tuple:
+        """
+        Returns the Low and High Blood Glucose Indices (LBGI, HBGI).
+        """
+        if len(values) == 0:
+            return np.nan, np.nan
+        low_risk, high_risk = Variability.getRisk(values)
+        return low_risk.mean(), high_risk.mean()
+
+    def getADRR(grid: GlucoseGrid) -> float:
+        """
+        Average Daily Risk Range: mean over the days with readings of the maximum low
+        risk plus the maximum high risk of the day.
+        Equation was sourced from: https://doi.org/10.2337/dc06-1085
+        """
+        glucose = np.asarray(grid.glucose, dtype="float64")
+        mask = np.asarray(grid.mask)
+        if not mask.any():
+            return np.nan
+
+        low_risk, high_risk = Variability.getRisk(np.where(mask, glucose, 100.0))
+        low_risk = np.where(mask, low_risk, 0.0).reshape(-1, GlucoseGrid.SLOTS_PER_DAY)
+        high_risk = np.where(mask, high_risk, 0.0).reshape(
+            -1, GlucoseGrid.SLOTS_PER_DAY
+        )
+
+        days = mask.reshape(-1, GlucoseGrid.SLOTS_PER_DAY).any(axis=1)
+        return (low_risk.max(axis=1) + high_risk.max(axis=1))[days].mean()
+
+    def getLagDifferences(grid: GlucoseGrid, lag: int) -> np.ndarray:
+        """
+        Returns the differences between readings `lag` slots apart, where both exist.
+        """
+        glucose = np.asarray(grid.glucose, dtype="float64")
+        if lag >= len(glucose):
+            return np.empty(0)
+
+        differences = glucose[lag:] - glucose[:-lag]
+        return differences[~np.isnan(differences)]
+
+    def getCONGA(grid: GlucoseGrid, hours: int = None) -> float:
+        """
+        Continuous Overall Net Glycemic Action: SD of the differences between readings
+        `hours` apart. Defaults to CONGA_HOURS.
+        Equation was sourced from: https://doi.org/10.1089/dia.2005.7.253
+        """
+        hours = Variability.CONGA_HOURS if hours is None else hours
+        lag = int(pd.Timedelta(hours=hours) // GlucoseGrid.STEP)
+
+        differences = Variability.getLagDifferences(grid, lag)
+        if len(differences) < 2:
+            return np.nan
+        return differences.std(ddof=1)
+
+    def getMODD(grid: GlucoseGrid) -> float:
+        """
+        Mean Of Daily Differences: mean absolute difference between readings at the
+        same time on consecutive days.
+        Equation was sourced from: https://doi.org/10.1007/BF01218495
+        """
+        differences = Variability.getLagDifferences(grid, GlucoseGrid.SLOTS_PER_DAY)
+        if len(differences) == 0:
+            return np.nan
+        return np.abs(differences).mean()
+
+    def getMAGE(values: np.ndarray) -> float:
+        """
+        Mean Amplitude of Glycemic Excursions: mean amplitude of the rises and falls
+        larger than one SD of the readings.
+
+        The peaks and nadirs of the series are found with NumPy, leaving out both ends
+        of the series as their excursions are incomplete. Swings smaller than one SD are
+        then removed in vectorized rounds: every round drops the pairs of extremes
+        forming the locally smallest small swings, keeping the higher peak and lower
+        nadir around each pair, until only swings of at least one SD remain.
+        Equation was sourced from: https://doi.org/10.2337/diab.19.9.644
+        """
+        if len(values) < 3:
+            return np.nan
+        threshold = values.std(ddof=1)
+
+        # Keep the readings where the direction changes.
+        steps = np.sign(np.diff(values))
+        moving = np.flatnonzero(steps)
+        turns = moving[1:][steps[moving[1:]] != steps[moving[:-1]]]
+        points = values[turns]
+        is_peak = steps[moving[:-1]][steps[moving[1:]] != steps[moving[:-1]]] > 0
+
+        while len(points) > 1:
+            swings = np.abs(np.diff(points))
+            if not (swings < threshold).any():
+                break
+
+            # Ranks break ties, so the smallest swing is always a local minimum.
+            rank = np.argsort(np.argsort(swings, kind="stable"))
+            padded = np.concatenate([[len(rank)], rank, [len(rank)]])
+            pairs = np.flatnonzero(
+                (swings < threshold) & (rank < padded[:-2]) & (rank < padded[2:])
+            )
+            # Pairs updating the same neighbors are left for the next round.
+            pairs = pairs[np.concatenate([[True], np.diff(pairs) >= 4])]
+
+            # The neighbors of a pair take the extremes of the pair of the same kind.
+            for neighbor, same in [(pairs - 1, pairs + 1), (pairs + 2, pairs)]:
+                valid = (neighbor >= 0) & (neighbor < len(points))
+                neighbor, same = neighbor[valid], same[valid]
+                points[neighbor] = np.where(
+                    is_peak[neighbor],
+                    np.maximum(points[neighbor], points[same]),
+                    np.minimum(points[neighbor], points[same]),
+                )
+
+            keep = np.ones(len(points), dtype=bool)
+            keep[pairs] = False
+            keep[pairs + 1] = False
+            points, is_peak = points[keep], is_peak[keep]
+
+        if len(points) < 2:
+            return np.nan
+        return float(np.abs(np.diff(points)).mean())
+
+    def getMetrics(grid: GlucoseGrid, conga_hours: int = None) -> dict:
+        """
+        Computes every variability metric of a grid.
+
+        ## Returns
+        `metrics` dict:
+            `mage`, `conga`, `modd`, `lbgi`, `hbgi`, `adrr` and `j_index`.
+        """
+        values = Variability.getValues(grid)
+        lbgi, hbgi = Variability.getRiskIndices(values)
+
+        return {
+            "mage": Variability.getMAGE(values),
+            "conga": Variability.getCONGA(grid, conga_hours),
+            "modd": Variability.getMODD(grid),
+            "lbgi": lbgi,
+            "hbgi": hbgi,
+            "adrr": Variability.getADRR(grid),
+            "j_index": Variability.getJIndex(values),
+        }
+
+    def getReport(cleaned_dicts: dict) -> pd.DataFrame:
+        """
+        Computes the variability metrics of many patients, e.g. for a nightly report.
+
+        ## Parameters
+        `cleaned_dicts` dict:
+            Cleaned data of every patient (as produced by WeeklyDataPipeline.pipe() or
+            HistoryStore.asProcessed()) indexed by patient name.
+
+        ## Returns
+        `report` pd.DataFrame:
+            One row of getMetrics per patient.
+        """
+        return pd.DataFrame.from_dict(
+            {
+                name: Variability.getMetrics(GlucoseGrid.fromFrame(data["chunk3"]))
+                for name, data in cleaned_dicts.items()
+            },
+            orient="index",
+        )
@@ -0,0 +1,102 @@
+import threading
+
+from dash import dcc
+
+from src.cache import LRUCache
+from src.visualization.serialize import FigureSerializer
+
+
+class FigureCache(LRUCache):
+    """
+    Bounded LRU cache of the serialized graphs of the dashboard views.
+
+    Entries are keyed by (dataset hash, view, tab, parameters) and hold the id and the
+    figure dict of a dcc.Graph, so switching between views serves the graphs without
+    rebuilding any figure. The cache is warmed in a background thread as soon as a
+    dataset is loaded, and the entries of other datasets are dropped when it changes.
+    """
+
+    # Class Attributes
+    MAXSIZE = 64
+
+    def __init__(self, maxsize: int = None) -> None:
+        """
+        Constructor.
+
+        ## Parameters
+        `maxsize` int:
+            Number of graphs kept in memory. Defaults to MAXSIZE.
+        """
+        LRUCache.__init__(self, maxsize)
+        self.thread = None
+        pass
+
+    def getKey(data_key: str, view: int, tab: str, params: dict = None) -> tuple:
+        """
+        Returns the cache key of a graph.
+        """
+        params = {} if params is None else params
+        return (data_key, view, tab, tuple(sorted(params.items())))
+
+    def serialize(graph: dcc.Graph) -> dict:
+        """
+        Returns the id and compact figure dict of a dcc.Graph, see FigureSerializer.
+        """
+        return {"id": graph.id, "figure": FigureSerializer.compact(graph.figure)}
+
+    def getGraph(
+        self, data_key: str, view: int, tab: str, build, params: dict = None
+    ) -> dcc.Graph:
+        """
+        Returns the graph of a tab, building and storing it on a cache miss.
+
+        ## Parameters
+        `data_key` str:
+            Content hash of the dataset, see StatsCache.hashData.
+        `view`, `tab`:
+            View (value of `view-radios`) and tab the graph belongs to.
+        `build` callable:
+            Returns the dcc.Graph of the tab.
+        `params` dict:
+            Parameters the graph depends on besides the dataset.
+        """
+        key = FigureCache.getKey(data_key, view, tab, params)
+
+        entry = self.get(key)
+        if entry is None:
+            entry = FigureCache.serialize(build())
+            self.put(key, entry)
+        return dcc.Graph(id=entry["id"], figure=entry["figure"])
+
+    def invalidate(self, data_key: str = None) -> None:
+        """
+        Drops the entries of every dataset other than `data_key`, or all entries when
+        None.
+        """
+        self.clear(None if data_key is None else lambda key: key[0] == data_key)
+        pass
+
+    def warm(self, data_key: str, builders: dict) -> threading.Thread:
+        """
+        Builds and stores the graphs of `builders` in a background thread.
+
+        ## Parameters
+        `builders` dict:
+            Builder of every graph, indexed by (view, tab).
+
+        ## Returns
+        `thread` threading.Thread:
+            The daemon thread warming the cache.
+        """
+
+        def run() -> None:
+            for (view, tab), build in builders.items():
+                key = FigureCache.getKey(data_key, view, tab)
+                if self.contains(key):
+                    continue
+                self.put(key, FigureCache.serialize(build()))
+
+        self.thread = threading.Thread(target=run, name="figure-cache-warmer")
+        self.thread.daemon = True
+        self.thread.start()
+        return self.thread
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from src.statistics.statistics import Stats
+
+
+class Downsampler:
+    """
+    Largest-Triangle-Three-Buckets (LTTB) downsampling of the sensor glucose line.
+
+    LTTB splits the series into as many buckets as the plot has pixels and keeps, in each
+    bucket, the reading forming the largest triangle with the previously kept reading and
+    the average of the next bucket. Peaks and troughs therefore survive, and readings
+    below the low bound are always kept so no hypoglycemia disappears from the plot.
+    """
+
+    # Default number of points sent to the browser, about the width of the plot.
+    WIDTH = 1000
+
+    # Readings below this value are always kept.
+    LOW_BOUND = 70
+
+    def lttb(x: np.ndarray, y: np.ndarray, threshold: int, low_bound: float = None):
+        """
+        Selects about `threshold` points of a series with LTTB.
+
+        ## Parameters
+        `x`, `y` np.ndarray:
+            Coordinates of the series, sorted by `x`, without NaN.
+        `threshold` int:
+            Number of points to keep.
+        `low_bound` float:
+            The lowest reading of a bucket is kept as well when it is below `low_bound`.
+            Defaults to LOW_BOUND.
+
+        ## Returns
+        `indices` np.ndarray:
+            Sorted indices of the kept points.
+        """
+        low_bound = Downsampler.LOW_BOUND if low_bound is None else low_bound
+        count = len(x)
+        if threshold >= count or threshold < 3:
+            return np.arange(count)
+
+        # Buckets between the first and last points, which are always kept.
+        edges = (np.arange(threshold - 1) * ((count - 2) / (threshold - 2))).astype(
+            "int64"
+        ) + 1
+        edges[-1] = count - 1
+
+        indices = [0]
+        previous = 0
+        for i in range(threshold - 2):
+            start, end = edges[i], edges[i + 1]
+            if i + 2 < len(edges):
+                next_x = x[end : edges[i + 2]].mean()
+                next_y = y[end : edges[i + 2]].mean()
+            else:
+                next_x, next_y = x[-1], y[-1]
+
+            area = np.abs(
+                (x[previous] - next_x) * (y[start:end] - y[previous])
+                - (x[previous] - x[start:end]) * (next_y - y[previous])
+            )
+            previous = start + int(np.argmax(area))
+            indices.append(previous)
+
+            lowest = start + int(np.argmin(y[start:end]))
+            if y[lowest] < low_bound and lowest != previous:
+                indices.append(lowest)
+
+        indices.append(count - 1)
+        return np.unique(indices)
+
+    def downsample(
+        df: pd.DataFrame, start=None, end=None, width: int = None
+    ) -> pd.DataFrame:
+        """
+        Returns the chunk3 readings within [start, end), downsampled to `width` points.
+
+        One reading on each side of the range is kept so the line reaches the edges of
+        the plot. A NaN row is inserted wherever the readings between two kept points
+        have a gap longer than Stats.MAX_GAP, so sensor gaps stay visible.
+
+        ## Parameters
+        `df` pd.DataFrame:
+            Cleaned chunk3 rows.
+        `start`, `end`:
+            Bounds of the time range. The range is open-ended when None.
+        `width` int:
+            Number of points to keep. Defaults to WIDTH.
+        """
+        width = Downsampler.WIDTH if width is None else width
+
+        df = df.dropna(subset=["Sensor Glucose (mg/dL)"]).sort_values(
+            "Timestamp", kind="stable"
+        )
+        timestamps = df["Timestamp"].to_numpy("datetime64[ns]")
+        glucose = df["Sensor Glucose (mg/dL)"].to_numpy("float64")
+
+        first, last = 0, len(timestamps)
+        if start is not None:
+            first = max(
+                np.searchsorted(timestamps, pd.Timestamp(start).to_datetime64()) - 1, 0
+            )
+        if end is not None:
+            last = min(
+                np.searchsorted(timestamps, pd.Timestamp(end).to_datetime64()) + 1, last
+            )
+        timestamps, glucose = timestamps[first:last], glucose[first:last]
+
+        if len(timestamps) == 0:
+            return pd.DataFrame(
+                {"Timestamp": timestamps, "Sensor Glucose (mg/dL)": glucose}
+            )
+
+        seconds = (timestamps - timestamps[0]) / np.timedelta64(1, "s")
+        indices = Downsampler.lttb(seconds, glucose, width)
+
+        # Number of sensor gaps before each reading.
+        gaps = np.concatenate(
+            [[0], np.cumsum(np.diff(timestamps) > Stats.MAX_GAP.to_timedelta64())]
+        )
+        breaks = np.flatnonzero(np.diff(gaps[indices]) > 0) + 1
+
+        return pd.DataFrame(
+            {
+                "Timestamp": np.insert(
+                    timestamps[indices], breaks, timestamps[indices][breaks - 1]
+                ),
+                "Sensor Glucose (mg/dL)": np.insert(glucose[indices], breaks, np.nan),
+            }
+        )
@@ -0,0 +1,198 @@
+import base64
+
+import numpy as np
+import pandas as pd
+
+
+class FigureSerializer:
+    """
+    Compact serialization of the Plotly figures sent to the browser.
+
+    Numeric arrays are sent with the base64 typed-array encoding of Plotly
+    ({"dtype": ..., "bdata": ...}) instead of JSON lists. Floats are sent as float32, and
+    date arrays as float64 milliseconds since epoch on axes set to the date type, instead
+    of one ISO string per reading. Per-trace settings equal to the Plotly defaults, and
+    the template styling of trace types the figure does not use, are left out.
+    """
+
+    # NumPy dtypes supported by the typed-array encoding, by Plotly dtype code.
+    DTYPES = {
+        "f4": np.float32,
+        "f8": np.float64,
+        "i1": np.int8,
+        "u1": np.uint8,
+        "i2": np.int16,
+        "u2": np.uint16,
+        "i4": np.int32,
+        "u4": np.uint32,
+    }
+
+    # Trace attributes bound to an axis, whose date arrays set the axis type.
+    AXES = {"x": "xaxis", "y": "yaxis"}
+
+    # Trace settings that are the Plotly defaults.
+    DEFAULTS = {"xaxis": "x", "yaxis": "y", "legendgroup": "", "name": ""}
+
+    def encodeArray(values: np.ndarray) -> dict:
+        """
+        Returns the typed-array encoding of a numeric array.
+
+        Floats are narrowed to float32 and 64-bit integers to the smallest supported
+        type that holds them, as the encoding has no 64-bit integers.
+        """
+        values = np.asarray(values)
+        if values.dtype.kind == "f":
+            values = values.astype("float32")
+        elif values.dtype.kind in "iub" and values.dtype.itemsize > 4:
+            for dtype in ["i1", "u1", "i2", "u2", "i4", "u4"]:
+                info = np.iinfo(FigureSerializer.DTYPES[dtype])
+                if values.size == 0 or (
+                    values.min() >= info.min and values.max() <= info.max
+                ):
+                    values = values.astype(FigureSerializer.DTYPES[dtype])
+                    break
+            else:
+                values = values.astype("float64")
+        elif values.dtype.kind == "b":
+            values = values.astype("uint8")
+
+        dtype = values.dtype.str.lstrip("<>|=")
+        encoded = {
+            "dtype": dtype,
+            "bdata": base64.b64encode(
+                np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+            ).decode("ascii"),
+        }
+        if values.ndim > 1:
+            encoded["shape"] = ", ".join(str(_) for _ in values.shape)
+        return encoded
+
+    def decodeArray(encoded: dict) -> np.ndarray:
+        """
+        Returns the array of a typed-array encoding.
+        """
+        values = np.frombuffer(
+            base64.b64decode(encoded["bdata"]),
+            dtype=np.dtype(FigureSerializer.DTYPES[encoded["dtype"]]).newbyteorder("<"),
+        )
+        if "shape" in encoded:
+            values = values.reshape([int(_) for _ in encoded["shape"].split(",")])
+        return values
+
+    def isEncoded(value) -> bool:
+        """
+        Whether a value already uses the typed-array encoding.
+        """
+        return isinstance(value, dict) and "bdata" in value and "dtype" in value
+
+    def toEpoch(values) -> np.ndarray:
+        """
+        Converts dates to float64 milliseconds since epoch, NaN where missing.
+        """
+        dates = pd.to_datetime(pd.Series(values)).to_numpy("datetime64[ns]")
+        return np.where(np.isnat(dates), np.nan, dates.astype("int64") / 1e6).astype(
+            "float64"
+        )
+
+    def compactArray(value) -> tuple:
+        """
+        Returns the compact form of a trace attribute, and whether it holds dates.
+
+        Numeric and date arrays are encoded, object arrays of numbers or dates are
+        converted first, and anything else (e.g. text) is returned as a list.
+        """
+        if FigureSerializer.isEncoded(value):
+            if value["dtype"] == "f8":
+                return (
+                    FigureSerializer.encodeArray(FigureSerializer.decodeArray(value)),
+                    False,
+                )
+            return value, False
+
+        try:
+            values = np.asarray(value)
+        except ValueError:
+            # Ragged lists are left as they are.
+            return value, False
+        if values.dtype.kind == "O":
+            inferred = pd.api.types.infer_dtype(values.ravel(), skipna=True)
+            if inferred in ["datetime64", "datetime", "date"]:
+                values = values.astype("datetime64[ns]")
+            elif inferred in ["floating", "integer", "mixed-integer-float"]:
+                values = values.astype("float64")
+            else:
+                return values.tolist(), False
+
+        if values.dtype.kind == "M":
+            epoch = FigureSerializer.toEpoch(values.ravel()).reshape(values.shape)
+            # Milliseconds since epoch need the precision of float64.
+            return {
+                "dtype": "f8",
+                "bdata": base64.b64encode(epoch.astype("<f8")).decode("ascii"),
+            }, True
+        if values.dtype.kind in "fiub":
+            return FigureSerializer.encodeArray(values), False
+        return values.tolist(), False
+
+    def compactTrace(trace: dict, layout: dict) -> dict:
+        """
+        Returns the compact form of a trace, setting the type of its date axes in
+        `layout`.
+        """
+        compact = {}
+        for key, value in trace.items():
+            if isinstance(value, str) and FigureSerializer.DEFAULTS.get(key) == value:
+                continue
+            if isinstance(value, dict) and len(value) == 0:
+                continue
+
+            if isinstance(value, dict) and not FigureSerializer.isEncoded(value):
+                compact[key] = FigureSerializer.compactTrace(value, layout)
+            elif FigureSerializer.isEncoded(value) or isinstance(
+                value, (np.ndarray, pd.Series, pd.Index, list, tuple)
+            ):
+                compact[key], is_date = FigureSerializer.compactArray(value)
+                if is_date and key in FigureSerializer.AXES:
+                    axis = trace.get(key + "axis", key)
+                    name = FigureSerializer.AXES[key] + axis[1:]
+                    layout[name] = dict(layout.get(name, {}))
+                    layout[name].setdefault("type", "date")
+                elif is_date:
+                    # Dates off the axes, e.g. in customdata, are left as they are.
+                    compact[key] = value
+            else:
+                compact[key] = value
+        return compact
+
+    def compact(figure) -> dict:
+        """
+        Returns the compact figure dict of a go.Figure or figure dict.
+
+        ## Parameters
+        `figure` go.Figure or dict:
+            Figure to serialize. It is left unchanged.
+
+        ## Returns
+        `compact` dict:
+            Figure dict with typed arrays, date axes and trimmed styling, ready to be
+            passed to a dcc.Graph.
+        """
+        if not isinstance(figure, dict):
+            figure = figure.to_dict()
+
+        layout = dict(figure.get("layout", {}))
+        data = [
+            FigureSerializer.compactTrace(trace, layout)
+            for trace in figure.get("data", [])
+        ]
+
+        # The template holds the styling of every trace type, only the used ones are kept.
+        template = layout.get("template", None)
+        if isinstance(template, dict) and "data" in template:
+            types = set(trace.get("type", "scatter") for trace in data)
+            layout["template"] = dict(
+                template,
+                data={k: v for k, v in template["data"].items() if k in types},
+            )
+
+        return dict(figure, data=data, layout=layout)
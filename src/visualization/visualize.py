@@ -1,8 +1,15 @@
+import math
+
 import pandas as pd
 from dash import dcc
 import plotly.express as px
 import plotly.graph_objects as go
 
+from src.data.rollups import RollupStore
+from src.statistics.rolling import RollingMetrics
+from src.statistics.statistics import Stats
+from src.visualization.downsample import Downsampler
+
 
 """
 This may be converted into a class at some point.
@@ -20,13 +27,6 @@ color_bank = [
 ]
 
 
-def combineTimeAndDate(date, time) -> any:
-    """
-    Simple lambda function used to combine time and date into a single timestamp.
-    """
-    return pd.Timestamp.combine(date, time)
-
-
 """
 Weekly View Plots
 """
@@ -36,42 +36,132 @@ def getWeeklyLinePlot(df: pd.DataFrame) -> any:
     """
     Creates and returns a line plot of all blood sugar data.
     """
-    df = df.sort_values(["Date", "Time"], ascending=(True, True))
-    df["Date and Time"] = ""
-    df["Date and Time"] = df[["Date", "Time"]].apply(
-        lambda x: combineTimeAndDate(*x), axis=1
-    )
+    return dcc.Graph(id="weekly-line-plot", figure=getWeeklyLineFigure(df))
+
+
+def getWeeklyLineFigure(
+    df: pd.DataFrame, start=None, end=None, width: int = None
+) -> go.Figure:
+    """
+    Creates the figure of the weekly line plot.
+
+    Only the readings within [start, end) are plotted, downsampled with LTTB to about
+    `width` points (see Downsampler.downsample), so zooming in re-resolves the window.
+
+    ## Parameters
+    `df` pd.DataFrame:
+        Cleaned chunk3 rows.
+    `start`, `end`:
+        Zoomed x-axis range, or None for the full range.
+    `width` int:
+        Number of points to plot. Defaults to Downsampler.WIDTH.
+    """
+    points = Downsampler.downsample(df, start, end, width)
 
     fig = px.line(
-        df,
-        x="Date and Time",
+        points,
+        x="Timestamp",
         y="Sensor Glucose (mg/dL)",
         title="7 Day Sensor Glucose History",
     )
+    # Keeps the zoom of the user when the figure is replaced.
+    fig.update_layout(uirevision="weekly-line-plot")
+    if start is not None and end is not None:
+        fig.update_xaxes(range=[start, end])
+
+    addTargetRange(fig, df["Timestamp"].min(), df["Timestamp"].max())
+
+    return fig
+
+
+def getWeeklyRollupFigure(rollups: pd.DataFrame, start=None, end=None) -> go.Figure:
+    """
+    Creates the figure of the weekly line plot from rollup buckets, for windows spanning
+    too many readings to plot.
+
+    The mean of every bucket is drawn as a line over a band from its minimum to its
+    maximum. Missing buckets break the line, like sensor gaps in getWeeklyLineFigure.
+
+    ## Parameters
+    `rollups` pd.DataFrame:
+        Output of RollupStore.query.
+    `start`, `end`:
+        Zoomed x-axis range, or None for the range of the buckets.
+    """
+    size = pd.Timedelta(seconds=dict(RollupStore.TIERS)[rollups.attrs["tier"]])
+    rollups = rollups.reindex(
+        pd.date_range(rollups.index.min(), rollups.index.max(), freq=size)
+    )
+
+    fig = go.Figure(
+        [
+            go.Scatter(
+                x=rollups.index,
+                y=rollups["max"],
+                mode="lines",
+                line=dict(width=0),
+                showlegend=False,
+                hoverinfo="skip",
+            ),
+            go.Scatter(
+                x=rollups.index,
+                y=rollups["min"],
+                mode="lines",
+                line=dict(width=0),
+                fill="tonexty",
+                fillcolor="rgba(99, 110, 250, 0.25)",
+                showlegend=False,
+                hoverinfo="skip",
+            ),
+            go.Scatter(
+                x=rollups.index,
+                y=rollups["mean"],
+                mode="lines",
+                name="Mean per " + rollups.attrs["tier"],
+            ),
+        ]
+    )
+    fig.update_layout(
+        title="7 Day Sensor Glucose History",
+        yaxis_title="Sensor Glucose (mg/dL)",
+        xaxis_title="Timestamp",
+        uirevision="weekly-line-plot",
+    )
+    if start is not None and end is not None:
+        fig.update_xaxes(range=[start, end])
+
+    addTargetRange(fig, rollups.index.min(), rollups.index.max() + size)
 
+    return fig
+
+
+def addTargetRange(fig: go.Figure, x0, x1) -> None:
+    """
+    Draws the 80 and 180 mg/dL lines and the shaded target range between x0 and x1.
+    """
     fig.add_shape(
         type="line",
-        x0=min(df["Date and Time"]),
+        x0=x0,
         y0=80,
-        x1=max(df["Date and Time"]),
+        x1=x1,
         y1=80,
         line=dict(color="Red"),
     )
 
     fig.add_shape(
         type="line",
-        x0=min(df["Date and Time"]),
+        x0=x0,
         y0=180,
-        x1=max(df["Date and Time"]),
+        x1=x1,
         y1=180,
         line=dict(color="Orange"),
     )
 
     fig.add_shape(
         type="rect",
-        x0=min(df["Date and Time"]),
+        x0=x0,
         y0=80,
-        x1=max(df["Date and Time"]),
+        x1=x1,
         y1=180,
         line=dict(
             color="LightGreen",
@@ -80,8 +170,7 @@ def getWeeklyLinePlot(df: pd.DataFrame) -> any:
         fillcolor="LightGreen",
         opacity=0.30,
     )
-
-    return dcc.Graph(id="weekly-line-plot", figure=fig)
+    pass
 
 
 def getViolinPlot(df: pd.DataFrame) -> any:
@@ -92,13 +181,10 @@ def getViolinPlot(df: pd.DataFrame) -> any:
     global color_bank
     colors = color_bank.copy()
 
-    days = df["Date"].unique()
-
     fig = go.Figure()
 
-    for day in days:
-        window = df.loc[df["Date"] == pd.Timestamp(day)]
-
+    # A single groupby splits the rows by day instead of filtering once per day.
+    for i, (day, window) in enumerate(df.groupby("Date")):
         fig.add_trace(
             go.Violin(
                 x=window["Date"],
@@ -107,7 +193,7 @@ def getViolinPlot(df: pd.DataFrame) -> any:
                 box_visible=True,
                 meanline_visible=True,
                 line_color="black",
-                fillcolor=colors.pop(),
+                fillcolor=colors[-1 - i % len(colors)],
                 opacity=0.6,
             )
         )
@@ -123,84 +209,172 @@ def getViolinPlot(df: pd.DataFrame) -> any:
     return dcc.Graph(id="weekly-violin-plot", figure=fig)
 
 
+def getRollingTrendPlot(rolling: pd.DataFrame, min_coverage: float = None) -> any:
+    """
+    Creates and returns line plots of the rolling TIR, mean, GMI and CV by window length.
+
+    Windows holding a smaller share of their possible readings than `min_coverage`
+    (e.g. while less history than the window length is stored) are drawn dotted, and a
+    note says how many days of history a reliable window needs.
+
+    ## Parameters
+    `rolling` pd.DataFrame:
+        Output of RollingMetrics.getRolling.
+    `min_coverage` float:
+        Share of the possible readings a window needs to be drawn solid.
+        Defaults to RollingMetrics.MIN_COVERAGE.
+    """
+    if min_coverage is None:
+        min_coverage = RollingMetrics.MIN_COVERAGE
+
+    reliable = rolling["coverage"] >= min_coverage
+
+    trends = pd.DataFrame(
+        {
+            "Date": rolling["Date"],
+            "Window": rolling["Window"].astype("str") + " days",
+            "Coverage": reliable.map({True: "reliable", False: "partial"}),
+            "TIR (%)": rolling["tir"] * 100,
+            "Mean (mg/dL)": rolling["mean"],
+            "GMI (%)": rolling["gmi"],
+            "CV (%)": rolling["cv"] * 100,
+        }
+    ).melt(
+        id_vars=["Date", "Window", "Coverage"], var_name="Metric", value_name="Value"
+    )
+
+    fig = px.line(
+        trends,
+        x="Date",
+        y="Value",
+        color="Window",
+        line_dash="Coverage",
+        line_dash_map={"reliable": "solid", "partial": "dot"},
+        facet_row="Metric",
+        title="Rolling Glucose Trends",
+        height=800,
+    )
+
+    fig.update_yaxes(matches=None, title_text="")
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+
+    if not reliable.all():
+        shortest = rolling.loc[~reliable, "Window"].min()
+        fig.add_annotation(
+            text="Dotted windows hold less than %d%% of their readings. A %d day window "
+            "needs at least %d days of history."
+            % (min_coverage * 100, shortest, math.ceil(shortest * min_coverage)),
+            xref="paper",
+            yref="paper",
+            x=0,
+            y=1.05,
+            showarrow=False,
+            xanchor="left",
+        )
+
+    return dcc.Graph(id="rolling-trend-plot", figure=fig)
+
+
 """
 Daily View Plots
 """
 
 
-def getDailyLinePlot(df: pd.DataFrame) -> any:
+def getDailyLinePlot(df: pd.DataFrame, webgl: bool = True) -> any:
     """
-    Creates and returns a violin plot for each day in the data.
+    Creates and returns a line plot of each day in the data, overlaid by time of day.
     Note: This plot may need to omit the day on which the data was pulled.
+
+    ## Parameters
+    `df` pd.DataFrame:
+        Cleaned chunk3 rows.
+    `webgl` bool:
+        Draws the days as WebGL `Scattergl` traces on a numeric seconds-since-midnight
+        axis, labelled every 3 hours. Otherwise the days are SVG traces on a category
+        axis of `Time` values, which the browser has to sort and lay out as strings and
+        becomes slow past a few days.
     """
     global color_bank
     colors = color_bank.copy()
 
-    days = df["Date"].unique()
-
     fig = go.Figure()
 
-    for day in days:
-        window = df.loc[df["Date"] == pd.Timestamp(day)]
-        # window = window.sort_values(["Date", "Time"], ascending=(True, True))
-        window = window.sort_values(["Time"], ascending=(True))
+    # Sorting once by Timestamp keeps every day in Time order after the groupby.
+    df = df.sort_values("Timestamp", kind="stable")
 
-        fig.add_scatter(
-            x=window["Time"],
-            y=window["Sensor Glucose (mg/dL)"],
-            name=pd.Timestamp(day).strftime("%A %m/%d"),
-            line_color=colors.pop(),
+    if webgl:
+        x = (df["Timestamp"] - df["Timestamp"].dt.normalize()).dt.total_seconds()
+        x_min, x_max = 0, 24 * 60 * 60
+    else:
+        x = df["Time"]
+        x_min, x_max = min(x), max(x)
+
+    trace = go.Scattergl if webgl else go.Scatter
+    for i, (day, window) in enumerate(df.groupby("Date")):
+        fig.add_trace(
+            trace(
+                x=x[window.index],
+                y=window["Sensor Glucose (mg/dL)"],
+                customdata=window["Timestamp"].dt.strftime("%H:%M") if webgl else None,
+                mode="lines",
+                name=pd.Timestamp(day).strftime("%A %m/%d"),
+                line_color=colors[-1 - i % len(colors)],
+            )
         )
 
-    # fig.update_xaxes(
-    #     dict(
-    #         type="category",
-    #         categoryorder="category ascending",
-    #         tickangle = 45,
-    #         tickformat="%H:00",
-    #         tickmode="auto",
-    #         tickson="boundaries",
-    #         nticks=8,
-    #         tick0= time(hour=0, minute=0),
-    #         dtick=time(hour=3, minute=0),
-    #     )
-    # )
-
-    fig.update_xaxes(
-        dict(
-            type="category",
-            categoryorder="category ascending",
-            tickangle=45,
-            tickformat="%H\n:00",
-            tickmode="auto",
-            nticks=8,
+    if webgl:
+        hours = range(0, 25, 3)
+        fig.update_xaxes(
+            dict(
+                type="linear",
+                range=[x_min, x_max],
+                tickangle=45,
+                tickmode="array",
+                tickvals=[hour * 60 * 60 for hour in hours],
+                ticktext=["%02d:00" % hour for hour in hours],
+            )
+        )
+        # Shows the hovered time as hh:mm rather than in seconds.
+        fig.update_traces(
+            hovertemplate="%{customdata}<br>%{y} mg/dL",
+            selector=dict(type="scattergl"),
+        )
+    else:
+        fig.update_xaxes(
+            dict(
+                type="category",
+                categoryorder="category ascending",
+                tickangle=45,
+                tickformat="%H\n:00",
+                tickmode="auto",
+                nticks=8,
+            )
         )
-    )
 
     # This will need to be changed into a single shape (shaded box)
     fig.add_shape(
         type="line",
-        x0=min(df["Time"]),
+        x0=x_min,
         y0=80,
-        x1=max(df["Time"]),
+        x1=x_max,
         y1=80,
         line=dict(color="Red"),
     )
 
     fig.add_shape(
         type="line",
-        x0=min(df["Time"]),
+        x0=x_min,
         y0=180,
-        x1=max(df["Time"]),
+        x1=x_max,
         y1=180,
         line=dict(color="Brown"),
     )
 
     fig.add_shape(
         type="rect",
-        x0=min(df["Time"]),
+        x0=x_min,
         y0=80,
-        x1=max(df["Time"]),
+        x1=x_max,
         y1=180,
         line=dict(
             color="LightGreen",
@@ -221,24 +395,77 @@ def getDailyLinePlot(df: pd.DataFrame) -> any:
     return dcc.Graph(id="daily-line-plot", figure=fig)
 
 
+def getAGPPlot(bands: pd.DataFrame) -> any:
+    """
+    Creates and returns the Ambulatory Glucose Profile: the 5-95 and 25-75 percentile
+    bands and the median of each 5-minute time-of-day slot.
+
+    ## Parameters
+    `bands` pd.DataFrame:
+        Output of AGPSketch.getPercentiles.
+    """
+    times = pd.Timestamp("1900-01-01") + pd.to_timedelta(bands.index, unit="min")
+
+    fig = go.Figure()
+
+    for low, high, color, name in [
+        ("p5", "p95", "rgba(32, 178, 170, 0.2)", "5-95%"),
+        ("p25", "p75", "rgba(32, 178, 170, 0.45)", "25-75%"),
+    ]:
+        fig.add_scatter(
+            x=times, y=bands[high], mode="lines", line_width=0, showlegend=False
+        )
+        fig.add_scatter(
+            x=times,
+            y=bands[low],
+            mode="lines",
+            line_width=0,
+            fill="tonexty",
+            fillcolor=color,
+            name=name,
+        )
+
+    fig.add_scatter(
+        x=times, y=bands["p50"], mode="lines", line_color="black", name="Median"
+    )
+
+    fig.add_hrect(y0=70, y1=180, line_width=0, fillcolor="LightGreen", opacity=0.2)
+
+    fig.update_xaxes(dict(tickformat="%H:%M", dtick=3 * 60 * 60 * 1000))
+
+    fig.update_layout(
+        dict(
+            title="Ambulatory Glucose Profile",
+            yaxis_title="Sensor Glucose (mg/dL)",
+            xaxis_title="Time",
+        )
+    )
+
+    return dcc.Graph(id="agp-plot", figure=fig)
+
+
 """
 Other view plots.
 """
 
 
-def getCarbInsulinPlot(df: pd.DataFrame) -> any:
+def getCarbInsulinPlot(df: pd.DataFrame, daily: pd.DataFrame = None) -> any:
     """
     Creates and returns a bar graph of insulin dosed and carbs consumed by day.
-    """
 
-    days = df["Date"].unique()
-    carb_sums = []
-    insulin_sums = []
+    ## Parameters
+    `df` pd.DataFrame:
+        Cleaned chunk1 rows.
+    `daily` pd.DataFrame:
+        Per-day aggregates from Stats.getDailyAggregates. Computed from `df` when None.
+    """
+    if daily is None:
+        daily = Stats.getDailyAggregates({"chunk1": df})
 
-    for day in days:
-        window = df.loc[df["Date"] == pd.Timestamp(day)]
-        carb_sums.append(window["BWZ Carb Input (grams)"].sum().astype("int32"))
-        insulin_sums.append(window["Bolus Volume Delivered (U)"].sum().astype("int32"))
+    days = daily.index
+    carb_sums = daily["carbs"].astype("int32")
+    # Auto Mode micro-boluses are counted in the basal, see BasalTimeline.
+    insulin_sums = (daily["bolus"] + daily["basal"]).astype("int32")
 
     fig = go.Figure(
         data=[
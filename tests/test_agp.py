@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.agp import AGPSketch
+
+"""
+The following tests verify the AGPSketch percentile bands.
+"""
+
+
+@pytest.fixture
+def test_chunk3() -> pd.DataFrame:
+    """
+    Fixture that returns the cleaned sensor data of the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()["chunk3"]
+
+
+def test_getPercentiles(test_chunk3) -> None:
+    """
+    Verifies the bands against nearest-rank percentiles of the raw readings.
+    """
+    bands = AGPSketch.fromFrame(test_chunk3).getPercentiles()
+    readings = test_chunk3.dropna(subset=["Sensor Glucose (mg/dL)"])
+    minutes = readings["Timestamp"].dt.hour * 60 + readings["Timestamp"].dt.minute
+
+    assert len(bands) == 288
+    assert bands["count"].sum() == len(readings)
+    for minute, window in readings.groupby(minutes // 5 * 5):
+        for percentile in AGPSketch.PERCENTILES:
+            expected = np.percentile(
+                window["Sensor Glucose (mg/dL)"], percentile, method="inverted_cdf"
+            )
+            assert bands.loc[minute, "p" + str(percentile)] == expected
+
+
+def test_merge_date_range(test_chunk3, tmp_path) -> None:
+    """
+    Verifies that merged daily sketches give the bands of any date range.
+    """
+    middle = pd.Timestamp("2021-11-19")
+    early = AGPSketch.fromFrame(test_chunk3[test_chunk3["Timestamp"] < middle])
+    late = AGPSketch.fromFrame(test_chunk3[test_chunk3["Timestamp"] >= middle])
+
+    merged = late.merge(early)
+    merged.save(str(tmp_path / "agp.npz"))
+    loaded = AGPSketch.load(str(tmp_path / "agp.npz"))
+
+    assert (loaded.getCounts() == AGPSketch.fromFrame(test_chunk3).getCounts()).all()
+    assert (loaded.getCounts(end=middle) == early.getCounts()).all()
+    assert loaded.getPercentiles(start=middle).equals(late.getPercentiles())
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.basal import BasalTimeline
+from src.statistics.statistics import Stats
+
+"""
+The following tests verify the BasalTimeline reconstruction.
+"""
+
+
+@pytest.fixture
+def test_events() -> pd.DataFrame:
+    """
+    Fixture of pump events: rate changes, a suspend, and absolute and percent temp basals.
+    """
+    rows = [
+        ("2021-11-20 00:00", 1.0, np.nan, None, None, None),
+        ("2021-11-20 02:00", np.nan, np.nan, None, None, "USER_SUSPEND"),
+        ("2021-11-20 03:00", np.nan, np.nan, None, None, "NORMAL_PUMPING"),
+        ("2021-11-20 06:00", 2.0, np.nan, None, None, None),
+        ("2021-11-20 10:00", np.nan, 0.5, "Insulin", "2:00:00", None),
+        ("2021-11-20 20:00", np.nan, 150.0, "Percent", "1:00:00", None),
+        ("2021-11-21 12:00", np.nan, np.nan, None, None, None),
+    ]
+    df = pd.DataFrame(
+        rows,
+        columns=[
+            "Timestamp",
+            "Basal Rate (U/h)",
+            "Temp Basal Amount",
+            "Temp Basal Type",
+            "Temp Basal Duration (h:mm:ss)",
+            "Suspend",
+        ],
+    )
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+    return df
+
+
+def test_getTotals(test_events) -> None:
+    """
+    Verifies the daily and hourly totals against the delivery worked out by hand.
+    """
+    # Day 1: 2h at 1.0, suspended 1h, 3h at 1.0, 4h at 2.0, 2h temp at 0.5,
+    # 8h at 2.0, 1h temp at 150% of 2.0, 3h at 2.0.
+    day1 = 2 + 3 + 8 + 1 + 16 + 3 + 6
+    daily = BasalTimeline.getTotals(test_events, "D")
+
+    assert list(daily.index) == list(pd.to_datetime(["2021-11-20", "2021-11-21"]))
+    assert daily.iloc[0] == pytest.approx(day1)
+    assert daily.iloc[1] == pytest.approx(24)
+    assert BasalTimeline.getTotal(test_events) == pytest.approx(day1 + 24)
+
+    hourly = BasalTimeline.getTotals(test_events, "h")
+    assert hourly.sum() == pytest.approx(day1 + 24)
+    assert hourly["2021-11-20 02:00"] == 0
+    assert hourly["2021-11-20 10:00"] == pytest.approx(0.5)
+    assert hourly["2021-11-20 20:00"] == pytest.approx(3)
+
+
+def test_getTotals_pipeline() -> None:
+    """
+    Verifies that the cleaned chunk1 carries the basal features and yields a total.
+    """
+    df = WeeklyDataPipeline.pipe()["chunk1"]
+    for feature in ["Temp Basal Amount", "Temp Basal Type", "Suspend"]:
+        assert feature in df.columns, feature + " missing from chunk1."
+
+    daily = BasalTimeline.getTotals(df, "D")
+    assert daily.sum() == pytest.approx(BasalTimeline.getTotal(df))
+    assert (daily >= 0).all()
+
+
+def test_getTotals_auto_mode() -> None:
+    """
+    Verifies that the schedule is not delivered in Auto Mode, where micro-boluses are
+    counted as basal instead.
+    """
+    rows = [
+        ("2021-11-20 00:00", 1.0, np.nan, None, None),
+        ("2021-11-20 02:00", np.nan, 0.1, "CLOSED_LOOP_MICRO_BOLUS", None),
+        ("2021-11-20 02:05", np.nan, 0.2, "CLOSED_LOOP_MICRO_BOLUS", None),
+        ("2021-11-20 06:00", 2.0, np.nan, None, None),
+        ("2021-11-20 08:00", np.nan, np.nan, None, "AUTO MODE OPEN LOOP"),
+        ("2021-11-20 10:00", np.nan, 3.0, "BOLUS_WIZARD", None),
+        ("2021-11-20 12:00", np.nan, np.nan, None, None),
+    ]
+    df = pd.DataFrame(
+        rows,
+        columns=[
+            "Timestamp",
+            "Basal Rate (U/h)",
+            "Bolus Volume Delivered (U)",
+            "Bolus Source",
+            "Alarm",
+        ],
+    )
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+
+    # 2h at 1.0, Auto Mode until 08:00 (0.3 U of micro-boluses), then 4h at 2.0.
+    assert BasalTimeline.getTotal(df) == pytest.approx(2 + 0.3 + 8)
+    assert BasalTimeline.getTotals(df, "h").sum() == pytest.approx(2 + 0.3 + 8)
+    assert BasalTimeline.getTotals(df, "h")["2021-11-20 02:00"] == pytest.approx(0.3)
+
+
+def test_insulin_total_sample() -> None:
+    """
+    Verifies the insulin total of the sample export, in Auto Mode most of the week: the
+    boluses (micro-boluses included) plus the scheduled basal of the open loop hours
+    only, instead of the whole week of schedule on top of the micro-boluses.
+    """
+    df = WeeklyDataPipeline.pipe()["chunk1"]
+
+    assert Stats.getInsulinTotal(df) == pytest.approx(316.03, abs=0.01)
+    assert Stats.getInsulinTotal(df) == pytest.approx(
+        df["Bolus Volume Delivered (U)"].sum() + 15.17, abs=0.01
+    )
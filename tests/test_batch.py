@@ -0,0 +1,77 @@
+import shutil
+
+import pandas as pd
+import pytest
+from src.pipelines.batch import BatchPipeline
+from src.pipelines.cache import ProcessedCache
+
+"""
+The following tests verify the BatchPipeline.
+"""
+
+
+@pytest.fixture
+def test_export_dir(tmp_path) -> str:
+    """
+    Fixture that creates a directory with two valid exports and a broken one.
+    """
+    export_dir = tmp_path / "raw"
+    export_dir.mkdir()
+
+    shutil.copy("data/raw/raw_data.csv", export_dir / "a.csv")
+    shutil.copy("data/raw/raw_data.csv", export_dir / "b.csv")
+    with open(export_dir / "b.csv", "a") as f:
+        f.write("\n")
+    (export_dir / "broken.csv").write_text("not a CareLink export\n")
+
+    return str(export_dir)
+
+
+def test_run(test_export_dir, tmp_path) -> None:
+    """
+    Verifies that every export is processed and failures are reported per file.
+    """
+    cache_dir = str(tmp_path / "processed")
+    results = BatchPipeline.run(test_export_dir, workers=2, cache_dir=cache_dir)
+
+    assert len(results) == 3, "Not every export was processed."
+    for name in ["a.csv", "b.csv"]:
+        result = [v for k, v in results.items() if k.endswith(name)][0]
+        assert result["status"] == "ok", name + " failed: " + str(result)
+        assert ProcessedCache(cache_dir).contains(result["key"]), name + " not stored."
+
+    broken = [v for k, v in results.items() if k.endswith("broken.csv")][0]
+    assert broken["status"] == "error", "Broken export was not reported."
+    assert broken["error"].startswith("ValueError"), (
+        "Unexpected error: " + broken["error"]
+    )
+
+
+def test_processExport_cached(tmp_path, monkeypatch) -> None:
+    """
+    Verifies that cached exports report the same row counts without loading any chunk.
+    """
+    cache_dir = str(tmp_path / "processed")
+    first = BatchPipeline.processExport("data/raw/raw_data.csv", cache_dir)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("A cached chunk was loaded.")
+
+    monkeypatch.setattr(pd, "read_parquet", fail)
+    second = BatchPipeline.processExport("data/raw/raw_data.csv", cache_dir)
+
+    assert second == first, "Row counts differ on a cache hit."
+
+
+def test_processExport_streaming(tmp_path) -> None:
+    """
+    Verifies that exports processed in streaming mode report the same row counts.
+    """
+    expected = BatchPipeline.processExport(
+        "data/raw/raw_data.csv", str(tmp_path / "whole")
+    )
+    streamed = BatchPipeline.processExport(
+        "data/raw/raw_data.csv", str(tmp_path / "streamed"), blocksize=4096
+    )
+
+    assert streamed == expected, "Row counts differ when streamed."
@@ -0,0 +1,44 @@
+import shutil
+import pytest
+from src.pipelines.cache import ProcessedCache
+from src.pipelines.pipelines import WeeklyDataPipeline
+
+"""
+The following tests verify the content-addressed ProcessedCache.
+"""
+
+
+@pytest.fixture
+def test_raw_copy(tmp_path) -> str:
+    """
+    Fixture that copies the source CSV so it can be modified.
+    """
+    path = tmp_path / "raw_data.csv"
+    shutil.copy("data/raw/raw_data.csv", path)
+    return str(path)
+
+
+def test_cachedPipe_roundtrip(test_raw_copy, tmp_path) -> None:
+    """
+    Verifies that a cache hit returns the same data as the pipeline.
+    """
+    cache_dir = str(tmp_path / "processed")
+    expected = WeeklyDataPipeline.cachedPipe(test_raw_copy, cache_dir)
+
+    key = ProcessedCache.hashFile(test_raw_copy)
+    assert ProcessedCache(cache_dir).contains(key), "Pipeline output was not cached."
+
+    found = WeeklyDataPipeline.cachedPipe(test_raw_copy, cache_dir)
+    for chunk in ProcessedCache.CHUNKS:
+        assert found[chunk].equals(expected[chunk]), chunk + " changed when cached."
+
+
+def test_hashFile_changes(test_raw_copy) -> None:
+    """
+    Verifies that modifying the raw export changes its cache key.
+    """
+    before = ProcessedCache.hashFile(test_raw_copy)
+    with open(test_raw_copy, "a") as f:
+        f.write("\n")
+
+    assert ProcessedCache.hashFile(test_raw_copy) != before, "Cache key did not change."
@@ -0,0 +1,67 @@
+from contextlib import closing
+
+import pytest
+from src.data.database import GlucoseDatabase
+from src.pipelines.pipelines import WeeklyDataPipeline
+
+"""
+The following tests verify the SQLite GlucoseDatabase backend.
+"""
+
+
+@pytest.fixture
+def test_processed() -> dict:
+    """
+    Fixture that runs the pipeline on the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()
+
+
+@pytest.fixture
+def test_database(tmp_path, test_processed) -> GlucoseDatabase:
+    """
+    Fixture that creates a database holding the source CSV.
+    """
+    database = GlucoseDatabase(str(tmp_path / "test.sqlite"))
+    database.insert(test_processed)
+    return database
+
+
+def test_insert_idempotent(test_database, test_processed) -> None:
+    """
+    Verifies that inserting the same data twice does not duplicate rows.
+    """
+    assert test_database.insert(test_processed) == 0, "Duplicate rows were inserted."
+
+
+def test_queryRange(test_database, test_processed) -> None:
+    """
+    Verifies that range queries return the same rows as the pipeline.
+    """
+    df = test_database.queryRange("chunk3", "2021-11-16", "2021-11-17")
+    source = test_processed["chunk3"]
+    # Rows with identical timestamps and values (e.g. day markers) are all kept.
+    expected = source[source["Date"] == "2021-11-16"]
+
+    assert list(df["Timestamp"]) == list(expected["Timestamp"]), "Rows differ."
+    assert list(df.columns) == list(source.columns), "Columns differ."
+
+
+def test_fingerprint_version(tmp_path, test_processed) -> None:
+    """
+    Verifies that a database keyed by another fingerprint version is recreated empty and
+    flagged as stale, while reopening a current one keeps its rows.
+    """
+    path = str(tmp_path / "test.sqlite")
+    database = GlucoseDatabase(path)
+    assert database.stale, "A new database was not flagged as stale."
+    database.insert(test_processed)
+
+    assert not GlucoseDatabase(path).stale
+    assert len(GlucoseDatabase(path).queryRange("chunk3")) > 0, "Rows were dropped."
+
+    with closing(database.connect()) as con:
+        con.execute("PRAGMA user_version = 1")
+    reopened = GlucoseDatabase(path)
+    assert reopened.stale, "An outdated database was not flagged as stale."
+    assert len(reopened.queryRange("chunk3")) == 0, "Outdated rows were kept."
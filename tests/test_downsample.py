@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.visualization.downsample import Downsampler
+
+"""
+The following tests verify the LTTB downsampling of the weekly line plot.
+"""
+
+
+@pytest.fixture
+def test_readings() -> pd.DataFrame:
+    """
+    Fixture of a week of 5-minute readings with one short low and a 2 hour sensor gap.
+    """
+    timestamps = pd.date_range("2021-11-20", periods=7 * 288, freq="5min")
+    rng = np.random.default_rng(0)
+    glucose = (
+        140
+        + 50 * np.sin(np.arange(len(timestamps)) / 40)
+        + rng.normal(0, 5, len(timestamps))
+    )
+    glucose[1000] = 45.0
+
+    df = pd.DataFrame({"Timestamp": timestamps, "Sensor Glucose (mg/dL)": glucose})
+    return df.drop(index=range(500, 524)).reset_index(drop=True)
+
+
+def test_lttb_threshold():
+    """
+    Tests that LTTB keeps both ends and at most the threshold of points when nothing is
+    below the low bound, and every point when the series is shorter.
+    """
+    x = np.arange(500, dtype="float64")
+    y = 100 + np.sin(x / 10)
+    indices = Downsampler.lttb(x, y, 50)
+
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 499
+    assert (np.diff(indices) > 0).all()
+    assert len(Downsampler.lttb(x[:20], y[:20], 50)) == 20
+
+
+def test_downsample_preserves_extremes(test_readings):
+    """
+    Tests that the downsampled line keeps the low and the sensor gap.
+    """
+    points = Downsampler.downsample(test_readings, width=200)
+    glucose = points["Sensor Glucose (mg/dL)"]
+
+    assert len(points) < 300
+    assert glucose.min() == 45.0
+    assert glucose.isna().sum() == 1
+
+
+def test_downsample_window(test_readings):
+    """
+    Tests that a zoomed window is re-resolved to every reading within it, plus one
+    reading on each side.
+    """
+    start, end = pd.Timestamp("2021-11-22 00:00"), pd.Timestamp("2021-11-22 06:00")
+    points = Downsampler.downsample(test_readings, start, end, width=200)
+
+    assert len(points) == 72 + 2
+    assert points["Timestamp"].iloc[0] < start <= points["Timestamp"].iloc[1]
+    assert points["Timestamp"].iloc[-2] < end <= points["Timestamp"].iloc[-1]
@@ -0,0 +1,71 @@
+import plotly.graph_objects as go
+from dash import dcc
+from src.visualization.cache import FigureCache
+from src.visualization.serialize import FigureSerializer
+
+"""
+The following tests verify the FigureCache class.
+"""
+
+
+def buildGraph(calls: list, graph_id: str = "test-plot") -> dcc.Graph:
+    """
+    Builds a small graph, recording the call.
+    """
+    calls.append(graph_id)
+    return dcc.Graph(id=graph_id, figure=go.Figure(go.Scatter(x=[1, 2], y=[3, 4])))
+
+
+def test_getGraph_hits() -> None:
+    """
+    Verifies that a graph is built once per dataset, view, tab and parameters, and served
+    as a figure dict afterwards.
+    """
+    cache = FigureCache()
+    calls = []
+
+    first = cache.getGraph("a", 1, "line", lambda: buildGraph(calls))
+    second = cache.getGraph("a", 1, "line", lambda: buildGraph(calls))
+    cache.getGraph("a", 1, "line", lambda: buildGraph(calls), {"days": 14})
+    cache.getGraph("b", 1, "line", lambda: buildGraph(calls))
+
+    assert len(calls) == 3
+    assert second.id == first.id == "test-plot"
+    assert isinstance(second.figure, dict)
+    assert list(FigureSerializer.decodeArray(second.figure["data"][0]["y"])) == [3, 4]
+    assert cache.getHitRate() == 0.25
+
+
+def test_invalidate() -> None:
+    """
+    Verifies that invalidating keeps only the entries of the current dataset.
+    """
+    cache = FigureCache()
+    calls = []
+    cache.getGraph("a", 1, "line", lambda: buildGraph(calls))
+    cache.getGraph("b", 1, "line", lambda: buildGraph(calls))
+
+    cache.invalidate("b")
+    assert list(cache.entries.keys()) == [FigureCache.getKey("b", 1, "line")]
+
+    cache.invalidate()
+    assert len(cache.entries) == 0
+
+
+def test_warm() -> None:
+    """
+    Verifies that warming builds every graph in the background, so lookups are hits.
+    """
+    cache = FigureCache()
+    calls = []
+    builders = {
+        (1, "line"): lambda: buildGraph(calls, "line-plot"),
+        (2, "agp"): lambda: buildGraph(calls, "agp-plot"),
+    }
+
+    cache.warm("a", builders).join()
+    graph = cache.getGraph("a", 2, "agp", builders[(2, "agp")])
+
+    assert sorted(calls) == ["agp-plot", "line-plot"]
+    assert graph.id == "agp-plot"
+    assert (cache.hits, cache.misses) == (1, 0)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.grid import GlucoseGrid
+from src.pipelines.pipelines import WeeklyDataPipeline
+
+"""
+The following tests verify the fixed 5-minute GlucoseGrid.
+"""
+
+
+@pytest.fixture
+def test_chunk3() -> pd.DataFrame:
+    """
+    Fixture that returns the cleaned sensor data of the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()["chunk3"]
+
+
+def test_fromFrame(test_chunk3) -> None:
+    """
+    Verifies that every reading is found at its timestamp.
+    """
+    grid = GlucoseGrid.fromFrame(test_chunk3)
+    readings = test_chunk3.dropna(subset=["Sensor Glucose (mg/dL)"])
+
+    assert grid.origin == readings["Timestamp"].min().normalize(), "Origin incorrect."
+    assert len(grid.glucose) % GlucoseGrid.SLOTS_PER_DAY == 0, "Grid not whole days."
+    assert grid.mask.sum() == len(readings), "Readings share a slot."
+
+    for _, row in readings.iloc[::250].iterrows():
+        assert grid.valueAt(row["Timestamp"]) == row["Sensor Glucose (mg/dL)"]
+
+
+def test_save_load(test_chunk3, tmp_path) -> None:
+    """
+    Verifies that a saved grid is loaded memory-mapped and unchanged.
+    """
+    grid = GlucoseGrid.fromFrame(test_chunk3)
+    grid.save(str(tmp_path))
+    loaded = GlucoseGrid.load(str(tmp_path))
+
+    assert isinstance(loaded.glucose, np.memmap), "Grid was not memory-mapped."
+    assert loaded.origin == grid.origin
+    assert np.array_equal(loaded.glucose, grid.glucose, equal_nan=True)
+
+
+def test_merge(test_chunk3) -> None:
+    """
+    Verifies that merging two halves gives the grid of the whole data.
+    """
+    half = len(test_chunk3) // 2
+    merged = GlucoseGrid.fromFrame(test_chunk3.iloc[half:]).merge(
+        GlucoseGrid.fromFrame(test_chunk3.iloc[:half])
+    )
+    expected = GlucoseGrid.fromFrame(test_chunk3)
+
+    assert merged.origin == expected.origin
+    assert np.array_equal(merged.glucose, expected.glucose, equal_nan=True)
+
+
+def test_getDay(test_chunk3) -> None:
+    """
+    Verifies that a day view matches the readings of that day.
+    """
+    grid = GlucoseGrid.fromFrame(test_chunk3)
+    day = test_chunk3[test_chunk3["Date"] == "2021-11-17"]
+
+    assert np.nanmean(grid.getDay("2021-11-17")) == pytest.approx(
+        day["Sensor Glucose (mg/dL)"].mean()
+    )
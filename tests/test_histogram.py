@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.histogram import GlucoseHistogram
+from src.statistics.statistics import Stats
+
+"""
+The following tests verify the GlucoseHistogram class.
+"""
+
+
+@pytest.fixture
+def test_glucose() -> np.ndarray:
+    """
+    Fixture of the sensor glucose readings of the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()["chunk3"]["Sensor Glucose (mg/dL)"].to_numpy()
+
+
+@pytest.mark.parametrize("bounds", [(70, 180), (80, 150), (70, 70), (40, 400)])
+def test_getCoreMetrics(test_glucose, bounds) -> None:
+    """
+    Verifies that the histogram lookups match a scan of the readings.
+    """
+    expected = Stats.getCoreMetrics(test_glucose, *bounds)
+    metrics = GlucoseHistogram.fromValues(test_glucose).getCoreMetrics(*bounds)
+
+    assert metrics["count"] == expected["count"]
+    for key in ["tir", "time_high", "time_low", "mean", "sd", "gmi"]:
+        assert metrics[key] == pytest.approx(expected[key])
+
+
+def test_counts_clipped() -> None:
+    """
+    Verifies that values outside the sensor range land in the edge bins.
+    """
+    histogram = GlucoseHistogram.fromValues(np.array([10, 40, 99.6, np.nan, 450]))
+
+    assert histogram.count == 4
+    assert histogram.countBelow(41) == 2
+    assert histogram.countAbove(100) == 1
+    assert histogram.countBelow(100) == 2
+    assert histogram.countAbove(99) == 2
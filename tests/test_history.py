@@ -0,0 +1,113 @@
+import shutil
+import pytest
+from src.data.history import HistoryStore
+from src.pipelines.pipelines import WeeklyDataPipeline
+
+"""
+The following tests verify the append-only HistoryStore.
+"""
+
+
+@pytest.fixture
+def test_store(tmp_path) -> HistoryStore:
+    """
+    Fixture that creates an empty history store.
+    """
+    return HistoryStore(str(tmp_path / "history"))
+
+
+def test_ingest_new(test_store) -> None:
+    """
+    Verifies that the first export is stored in full.
+    """
+    expected = WeeklyDataPipeline.pipe()
+    new_dict = test_store.ingest("data/raw/raw_data.csv")
+
+    for key in HistoryStore.CHUNKS:
+        assert len(new_dict[key]) == len(expected[key]), key + " rows missing."
+        assert len(test_store.load(key)) == len(expected[key]), key + " not stored."
+
+
+def test_ingest_streaming(test_store) -> None:
+    """
+    Verifies that an export ingested in streaming mode is stored as when read whole.
+    """
+    expected = WeeklyDataPipeline.pipe()
+    test_store.ingest("data/raw/raw_data.csv", blocksize=4096)
+
+    for key in HistoryStore.CHUNKS:
+        assert test_store.load(key).equals(expected[key]), key + " differs."
+
+
+def test_ingest_overlap(test_store, tmp_path) -> None:
+    """
+    Verifies that an overlapping export only appends rows that are not stored yet.
+    """
+    test_store.ingest("data/raw/raw_data.csv")
+
+    # Same data with different bytes, so it is not skipped as an already ingested export.
+    overlap = tmp_path / "overlap.csv"
+    shutil.copy("data/raw/raw_data.csv", overlap)
+    with open(overlap, "a") as f:
+        f.write("\n")
+
+    new_dict = test_store.ingest(str(overlap))
+    for key in HistoryStore.CHUNKS:
+        assert len(new_dict[key]) == 0, key + " overlapping rows were appended."
+
+    reopened = HistoryStore(test_store.history_dir)
+    assert len(reopened.manifest["exports"]) == 2, "Exports not recorded."
+
+
+def test_load_range(test_store) -> None:
+    """
+    Verifies that loading a time range only returns rows within it.
+    """
+    test_store.ingest("data/raw/raw_data.csv")
+    df = test_store.load("chunk3", "2021-11-16", "2021-11-17")
+
+    assert len(df) > 0, "No rows were loaded."
+    assert set(df["Date"].dt.day) == {16}, "Rows outside of the range were loaded."
+
+
+def test_fingerprint_new_features() -> None:
+    """
+    Verifies that keeping more chunk1 features does not change the fingerprint of the
+    rows, so histories stored before them are not appended again.
+    """
+    chunk1 = WeeklyDataPipeline.pipe()["chunk1"]
+    more = chunk1.assign(**{"New Feature": "value"})
+
+    assert HistoryStore.fingerprint(chunk1).equals(HistoryStore.fingerprint(more))
+
+
+def test_fingerprint_unique() -> None:
+    """
+    Verifies that different pump events at the same second, and identical rows such as
+    day markers, all get distinct fingerprints.
+    """
+    for chunk in HistoryStore.CHUNKS:
+        df = WeeklyDataPipeline.pipe()[chunk]
+        assert not HistoryStore.fingerprint(df).duplicated().any(), chunk + " collides."
+
+
+def test_refingerprint(test_store, tmp_path, monkeypatch) -> None:
+    """
+    Verifies that a store written with an older fingerprint version is re-fingerprinted
+    when opened, so an overlapping export still appends nothing.
+    """
+    monkeypatch.setattr(HistoryStore, "FINGERPRINT_VERSION", 1)
+    HistoryStore(test_store.history_dir).ingest("data/raw/raw_data.csv")
+    monkeypatch.undo()
+
+    reopened = HistoryStore(test_store.history_dir)
+    assert reopened.manifest["fingerprint"] == HistoryStore.FINGERPRINT_VERSION
+
+    overlap = tmp_path / "overlap.csv"
+    shutil.copy("data/raw/raw_data.csv", overlap)
+    with open(overlap, "a") as f:
+        f.write("\n")
+
+    new_dict = reopened.ingest(str(overlap))
+    for key in HistoryStore.CHUNKS:
+        assert len(new_dict[key]) == 0, key + " overlapping rows were appended."
@@ -0,0 +1,162 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from dash import dcc
+from src.data.database import GlucoseDatabase
+from src.data.rollups import RollupStore
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.online import OnlineStats
+from src.statistics.statistics import Stats
+from src.visualization.cache import FigureCache
+from src.visualization.serialize import FigureSerializer
+
+# The dashboard modules import each other relative to src/dash.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "dash"))
+from apps import home
+
+"""
+The following tests verify the callbacks of the home page.
+"""
+
+
+@pytest.fixture
+def test_processed() -> dict:
+    """
+    Fixture that runs the pipeline on the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()
+
+
+def test_getZoomReadings_database(tmp_path, monkeypatch, test_processed) -> None:
+    """
+    Verifies that zoomed windows are read from the database, so days missing from the
+    loaded export are still plotted.
+    """
+    database = GlucoseDatabase(str(tmp_path / "test.sqlite"))
+    database.insert(test_processed)
+
+    chunk3 = test_processed["chunk3"]
+    export = dict(test_processed, chunk3=chunk3[chunk3["Date"] >= "2021-11-18"])
+    monkeypatch.setattr(home, "PROCESSED_DATA", export)
+    monkeypatch.setattr(home, "DATABASE", database)
+
+    window = home.mainContainer.getZoomReadings("2021-11-16", "2021-11-17")
+    days = set(window["Date"])
+
+    assert pd.Timestamp("2021-11-16") in days, "The window was not read."
+    assert days <= set(pd.to_datetime(["2021-11-15", "2021-11-16", "2021-11-17"]))
+
+    monkeypatch.setattr(home, "DATABASE", None)
+    fallback = home.mainContainer.getZoomReadings("2021-11-16", "2021-11-17")
+    assert fallback is export["chunk3"], "The export was not used without a database."
+
+
+def test_onWeeklyZoom_width(monkeypatch, test_processed) -> None:
+    """
+    Verifies that zoomed windows are downsampled to the plot width sent by the browser.
+    """
+    monkeypatch.setattr(home, "PROCESSED_DATA", test_processed)
+    monkeypatch.setattr(home, "DATABASE", None)
+    relayout_data = {
+        "xaxis.range[0]": "2021-11-15 00:00",
+        "xaxis.range[1]": "2021-11-20 00:00",
+    }
+
+    def countPoints(figure: dict) -> int:
+        y = FigureSerializer.decodeArray(figure["data"][0]["y"])
+        return int((~np.isnan(y)).sum())
+
+    narrow = home.mainContainer.onWeeklyZoom(relayout_data, 200)
+    wide = home.mainContainer.onWeeklyZoom(relayout_data, 800)
+    default = home.mainContainer.onWeeklyZoom(relayout_data, None)
+
+    assert countPoints(narrow) <= 200 + 2, "The width was not used."
+    assert countPoints(narrow) < countPoints(wide) <= countPoints(default)
+
+
+def test_onTabChange_builds_active_tab(monkeypatch, test_processed) -> None:
+    """
+    Verifies that opening a view builds no graph, that only the graph of the selected
+    tab is built, and that switching tabs builds the newly opened one.
+    """
+    calls = []
+
+    def getBuilder(view: int, tab: str):
+        def build() -> dcc.Graph:
+            calls.append((view, tab))
+            return dcc.Graph(id=tab + "-plot", figure=go.Figure(go.Scatter(y=[1, 2])))
+
+        return build
+
+    builders = {
+        key: getBuilder(*key)
+        for key in [(1, "weekly-line"), (1, "weekly-violin"), (1, "rolling-trends")]
+    }
+    monkeypatch.setattr(home, "PROCESSED_DATA", test_processed)
+    monkeypatch.setattr(home, "DATA_KEY", "test")
+    monkeypatch.setattr(home, "FIGURE_CACHE", FigureCache())
+    monkeypatch.setattr(home.mainContainer, "getTabBuilders", lambda: builders)
+
+    home.mainContainer.generatePlot(1)
+    assert calls == [], "Opening the view built a graph."
+
+    graph = home.mainContainer.onTabChange("weekly-line", 1)
+    assert graph.id == "weekly-line-plot"
+    assert calls == [(1, "weekly-line")], "Other tabs were built."
+
+    graph = home.mainContainer.onTabChange("weekly-violin", 1)
+    assert graph.id == "weekly-violin-plot"
+    assert calls == [(1, "weekly-line"), (1, "weekly-violin")]
+
+    home.mainContainer.onTabChange("weekly-line", 1)
+    assert len(calls) == 2, "Switching back rebuilt a cached graph."
+
+
+def test_onWeeklyZoom_rollups(tmp_path, monkeypatch, test_processed) -> None:
+    """
+    Verifies that windows too wide for the readings to fit the plot width are drawn from
+    the rollup tiers, and narrower ones from the readings.
+    """
+    database = GlucoseDatabase(str(tmp_path / "test.sqlite"))
+    database.insert(test_processed)
+    rollups = RollupStore(database)
+    rollups.rebuild()
+
+    monkeypatch.setattr(home, "PROCESSED_DATA", test_processed)
+    monkeypatch.setattr(home, "DATABASE", database)
+    monkeypatch.setattr(home, "ROLLUPS", rollups)
+    relayout_data = {
+        "xaxis.range[0]": "2021-11-15 00:00",
+        "xaxis.range[1]": "2021-11-20 00:00",
+    }
+
+    wide = home.mainContainer.onWeeklyZoom(relayout_data, 100)
+    assert [_.get("name") for _ in wide["data"]][-1] == "Mean per 1h"
+
+    narrow = home.mainContainer.onWeeklyZoom(relayout_data, 1000)
+    assert len(narrow["data"]) == 1, "Readings that fit the width were rolled up."
+
+
+def test_onRefreshClick_history(monkeypatch, test_processed) -> None:
+    """
+    Verifies that the history-wide cards are filled from the accumulated OnlineStats,
+    and left out before any history is stored.
+    """
+    chunk3 = test_processed["chunk3"]
+    monkeypatch.setattr(home, "PROCESSED_DATA", test_processed)
+    monkeypatch.setattr(home, "ONLINE_STATS", OnlineStats.fromFrame(chunk3))
+
+    grid = str(home.sidebarContainer.onRefreshClick(1, [80, 150]))
+    expected = Stats.getCoreMetrics(
+        chunk3["Sensor Glucose (mg/dL)"].to_numpy(), 80, 150
+    )
+    assert "card-value-historyTir" in grid, "The history cards are missing."
+    assert home.cardFormatter.percent(expected["tir"]) in grid
+
+    monkeypatch.setattr(home, "ONLINE_STATS", None)
+    grid = str(home.sidebarContainer.onRefreshClick(1, [80, 150]))
+    assert "card-value-historyTir" not in grid, "Cards shown without a history."
@@ -0,0 +1,25 @@
+from src.cache import LRUCache
+
+"""
+The following tests verify the LRUCache class.
+"""
+
+
+def test_LRUCache() -> None:
+    """
+    Verifies the eviction order, the hit and miss counts and selective clearing.
+    """
+    cache = LRUCache(maxsize=2)
+    cache.put(("a",), 1)
+    cache.put(("b",), 2)
+    assert cache.get(("a",)) == 1
+    cache.put(("c",), 3)
+
+    assert cache.get(("b",)) is None, "The least recently used entry was kept."
+    assert cache.contains(("a",)) and cache.contains(("c",))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.clear(lambda key: key == ("c",))
+    assert list(cache.entries.keys()) == [("c",)]
+    cache.clear()
+    assert len(cache.entries) == 0
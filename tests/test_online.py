@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.online import OnlineStats
+from src.statistics.statistics import Stats
+
+"""
+The following tests verify the OnlineStats accumulator.
+"""
+
+
+@pytest.fixture
+def test_chunk3() -> pd.DataFrame:
+    """
+    Fixture that returns the cleaned sensor data of the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()["chunk3"]
+
+
+def assert_same_state(state, expected) -> None:
+    """
+    Asserts that two states describe the same readings.
+    """
+    assert (state.histogram.counts == expected.histogram.counts).all()
+    assert state.count == expected.count
+    assert state.mean == pytest.approx(expected.mean)
+    assert state.m2 == pytest.approx(expected.m2)
+    assert (state.min, state.max) == (expected.min, expected.max)
+    assert (state.first, state.last) == (expected.first, expected.last)
+    assert (state.head_state, state.head_end) == (
+        expected.head_state,
+        expected.head_end,
+    )
+    assert (state.tail_state, state.tail_start) == (
+        expected.tail_state,
+        expected.tail_start,
+    )
+    assert state.longest == expected.longest
+
+
+@pytest.mark.parametrize("freq", ["D", "6h", "35min"])
+def test_update_incremental(test_chunk3, freq) -> None:
+    """
+    Verifies that folding in the readings piece by piece gives the state of all of them.
+    """
+    state = OnlineStats()
+    for _, window in test_chunk3.groupby(test_chunk3["Timestamp"].dt.floor(freq)):
+        state = state.update(window)
+
+    assert_same_state(state, OnlineStats.fromFrame(test_chunk3))
+    assert state.longest == Stats.getLongestStint(
+        test_chunk3, OnlineStats.LOW_BOUND, OnlineStats.HIGH_BOUND
+    )
+
+
+def test_merge_order(test_chunk3) -> None:
+    """
+    Verifies that merging does not depend on the order of the states.
+    """
+    middle = test_chunk3["Timestamp"].iloc[len(test_chunk3) // 2]
+    early = OnlineStats.fromFrame(test_chunk3[test_chunk3["Timestamp"] < middle])
+    late = OnlineStats.fromFrame(test_chunk3[test_chunk3["Timestamp"] >= middle])
+
+    assert_same_state(late.merge(early), early.merge(late))
+
+
+def test_save_load(test_chunk3, tmp_path) -> None:
+    """
+    Verifies that the state survives a round trip through JSON.
+    """
+    state = OnlineStats.fromFrame(test_chunk3)
+    state.save(str(tmp_path / "stats.json"))
+
+    assert_same_state(OnlineStats.load(str(tmp_path / "stats.json")), state)
+    assert OnlineStats.load(str(tmp_path / "missing.json")).count == 0
+    assert state.getCoreMetrics(70, 180)["sd"] == pytest.approx(
+        Stats.getCoreMetrics(test_chunk3["Sensor Glucose (mg/dL)"].to_numpy(), 70, 180)[
+            "sd"
+        ]
+    )
@@ -213,3 +213,21 @@ def test_pipeline_success():
         raise
     finally:
         return 0
+
+
+@pytest.mark.order(9)
+def test_castFeatures_timestamp():
+    """
+    Verifies that the cleaned chunks carry a sorted datetime64 Timestamp column.
+    """
+    temp_dict = WeeklyDataPipeline.pipe()
+
+    for key in ["chunk1", "chunk3"]:
+        timestamps = temp_dict[key]["Timestamp"]
+        assert str(timestamps.dtypes) == "datetime64[ns]", (
+            "Timestamp type is incorrect: " + str(timestamps.dtypes)
+        )
+        assert timestamps.is_monotonic_increasing, key + " is not sorted by Timestamp."
+        assert (timestamps.dt.normalize() == temp_dict[key]["Date"]).all(), (
+            key + " Timestamp does not match Date."
+        )
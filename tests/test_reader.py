@@ -0,0 +1,152 @@
+import pytest
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.pipelines.reader import CareLinkReader, LazySection
+
+"""
+The following tests verify the offset-indexed CareLinkReader.
+"""
+
+
+@pytest.fixture
+def test_reader() -> CareLinkReader:
+    """
+    Fixture that indexes the sections of the source CSV.
+    """
+    return CareLinkReader("data/raw/raw_data.csv")
+
+
+def test_scanSections(test_reader) -> None:
+    """
+    Verifies that the pump and sensor sections are found and mapped to their chunks.
+    """
+    chunks = [section["chunk"] for section in test_reader.sections]
+    labels = [section["label"] for section in test_reader.sections]
+
+    assert chunks == ["chunk1", "chunk3"], "Sections mapped incorrectly: " + str(chunks)
+    assert labels == ["Pump", "Sensor"], "Section labels incorrect: " + str(labels)
+
+
+def test_scanSections_unlabelled(tmp_path) -> None:
+    """
+    Verifies the positional fallback for exports without section banners.
+    """
+    path = tmp_path / "unlabelled.csv"
+    path.write_text(
+        "Index,Date,Time\n0,2021/11/22,07:24:39\n\n"
+        "Index,Date,Time\n1,2021/11/22,07:24:39\n\n"
+        "Index,Date,Time\n2,2021/11/22,07:24:39\n"
+    )
+
+    chunks = [section["chunk"] for section in CareLinkReader.scanSections(path)]
+    assert chunks == ["chunk1", "chunk2", "chunk3"], "Positional fallback incorrect."
+
+
+def test_readChunk_types(test_reader) -> None:
+    """
+    Verifies that a chunk is parsed with only the requested columns and dtypes.
+    """
+    features = WeeklyDataPipeline.FEATURES["chunk3"]
+    df = test_reader.readChunk(
+        "chunk3",
+        usecols=features,
+        dtype={_: WeeklyDataPipeline.DTYPES[_] for _ in features},
+    )
+
+    assert list(df.columns) == features, "Unexpected columns: " + str(df.columns)
+    assert str(df["Sensor Glucose (mg/dL)"].dtype) == "float32"
+    assert len(df) > 100, "chunk3 does not meet length requirement: " + str(len(df))
+
+
+def test_readSections_matches_sectionalizeData() -> None:
+    """
+    Verifies that readSections produces the same data as readData and sectionalizeData.
+    """
+    legacy = WeeklyDataPipeline.scrubFeatures(
+        WeeklyDataPipeline.sectionalizeData(WeeklyDataPipeline.readData())
+    )
+    sections = WeeklyDataPipeline.readSections()
+
+    for key in ["chunk1", "chunk3"]:
+        expected = legacy[key]["Index"].astype("float32").tolist()
+        found = sections[key]["Index"].tolist()
+        assert found[: len(expected)] == expected, key + " rows do not match."
+
+
+def test_iterChunk_blocks(test_reader) -> None:
+    """
+    Verifies that reading a chunk in small blocks yields every row exactly once.
+    """
+    whole = test_reader.readChunk("chunk3", usecols=["Index"])
+    blocks = list(test_reader.iterChunk("chunk3", blocksize=4096, usecols=["Index"]))
+
+    assert len(blocks) > 1, "Chunk was not split into blocks."
+    assert sum(len(_) for _ in blocks) == len(whole), "Rows lost while streaming."
+
+
+def test_pipe_streaming() -> None:
+    """
+    Verifies that the streaming mode of the pipeline matches the in-memory pipeline.
+    """
+    expected = WeeklyDataPipeline.pipe()
+    streamed = WeeklyDataPipeline.pipe(blocksize=4096)
+
+    for key in ["chunk1", "chunk3"]:
+        assert streamed[key].equals(expected[key]), key + " differs when streamed."
+
+
+@pytest.fixture
+def test_three_sections(tmp_path) -> str:
+    """
+    Fixture that adds a carb and insulin (chunk2) section to a copy of the source CSV.
+    """
+    with open("data/raw/raw_data.csv") as f:
+        lines = f.read().split("\n")
+
+    sensor = [i for i, _ in enumerate(lines) if _.startswith("-------,")][1]
+    chunk2 = [
+        "-------,MiniMed 770G MMT-1880,Aggregated Auto Insulin Data,NG0000000H,------- ",
+        "Index,Date,Time,Bolus Volume Delivered (U),BWZ Carb Input (grams)",
+        "0,2021/11/22,07:00:00,1.5,30",
+        "1,2021/11/22,12:00:00,2.5,45",
+        "",
+    ]
+
+    path = tmp_path / "three_sections.csv"
+    path.write_text("\n".join(lines[:sensor] + chunk2 + lines[sensor:]))
+    return str(path)
+
+
+def test_chunk2_lazy(test_three_sections) -> None:
+    """
+    Verifies that chunk2 is kept as a handle and only parsed when loaded.
+    """
+    temp_dict = WeeklyDataPipeline.pipe(test_three_sections)
+
+    assert isinstance(temp_dict["chunk2"], LazySection), "chunk2 is not a handle."
+    assert not temp_dict["chunk2"].isLoaded(), "chunk2 was parsed eagerly."
+    assert len(temp_dict["chunk3"]) > 100, "chunk3 lost rows."
+
+    chunk2 = temp_dict["chunk2"].load()
+    assert list(chunk2["BWZ Carb Input (grams)"]) == [30, 45], "chunk2 misread."
+
+
+def test_chunk2_streaming(test_three_sections) -> None:
+    """
+    Verifies that the streaming mode of the pipeline keeps the chunk2 handle.
+    """
+    temp_dict = WeeklyDataPipeline.pipe(test_three_sections, blocksize=4096)
+
+    assert isinstance(temp_dict["chunk2"], LazySection), "chunk2 handle was dropped."
+    assert not temp_dict["chunk2"].isLoaded(), "chunk2 was parsed eagerly."
+    assert len(temp_dict["chunk2"].load()) == 2, "chunk2 misread."
+
+
+def test_chunk2_cached(test_three_sections, tmp_path) -> None:
+    """
+    Verifies that the chunk2 handle is restored on a processed cache hit.
+    """
+    cache_dir = str(tmp_path / "processed")
+    WeeklyDataPipeline.cachedPipe(test_three_sections, cache_dir)
+    temp_dict = WeeklyDataPipeline.cachedPipe(test_three_sections, cache_dir)
+
+    assert len(temp_dict["chunk2"].load()) == 2, "chunk2 handle not restored."
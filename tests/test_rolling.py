@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.grid import GlucoseGrid
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.rolling import RollingMetrics
+
+"""
+The following tests verify the RollingMetrics windows.
+"""
+
+
+@pytest.fixture
+def test_chunk3() -> pd.DataFrame:
+    """
+    Fixture that returns the cleaned sensor data of the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()["chunk3"]
+
+
+def test_getRolling(test_chunk3) -> None:
+    """
+    Verifies every window against a rescan of the readings it covers.
+    """
+    rolling = RollingMetrics.getRolling(test_chunk3, [1, 3, 14], 80, 150)
+    readings = test_chunk3.dropna(subset=["Sensor Glucose (mg/dL)"])
+
+    for _, row in rolling.iterrows():
+        start = row["Date"] - pd.Timedelta(days=row["Window"] - 1)
+        window = readings.loc[
+            (readings["Timestamp"] >= start)
+            & (readings["Timestamp"] < row["Date"] + pd.Timedelta(days=1)),
+            "Sensor Glucose (mg/dL)",
+        ].astype("float64")
+
+        assert row["count"] == len(window)
+        assert row["tir"] == pytest.approx(window.between(80, 150).mean())
+        assert row["mean"] == pytest.approx(window.mean())
+        assert row["cv"] == pytest.approx(window.std() / window.mean())
+
+
+def test_getDailySums_gaps() -> None:
+    """
+    Verifies that days without readings are kept as zeros.
+    """
+    df = pd.DataFrame(
+        {
+            "Timestamp": pd.to_datetime(["2021-11-01 10:00", "2021-11-04 10:00"]),
+            "Sensor Glucose (mg/dL)": [100.0, np.nan],
+        }
+    )
+    df.loc[len(df)] = [pd.Timestamp("2021-11-03 23:55"), 200.0]
+
+    sums = RollingMetrics.getDailySums(df)
+
+    assert list(sums["count"]) == [1, 0, 1]
+    assert sums["sum"].sum() == 300
+
+
+def test_getRolling_grid(test_chunk3) -> None:
+    """
+    Verifies that the rolling metrics of the grid match those of the readings.
+    """
+    expected = RollingMetrics.getRolling(test_chunk3, [1, 7], 80, 150)
+    rolling = RollingMetrics.getRolling(
+        GlucoseGrid.fromFrame(test_chunk3), [1, 7], 80, 150
+    )
+
+    pd.testing.assert_frame_equal(rolling, expected)
@@ -0,0 +1,70 @@
+import pytest
+from src.data.database import GlucoseDatabase
+from src.data.rollups import RollupStore
+from src.pipelines.pipelines import WeeklyDataPipeline
+
+"""
+The following tests verify the multi-resolution RollupStore.
+"""
+
+
+@pytest.fixture
+def test_processed() -> dict:
+    """
+    Fixture that runs the pipeline on the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()
+
+
+@pytest.fixture
+def test_rollups(tmp_path, test_processed) -> RollupStore:
+    """
+    Fixture that creates a database and its rollups from the source CSV.
+    """
+    database = GlucoseDatabase(str(tmp_path / "test.sqlite"))
+    database.insert(test_processed)
+    return RollupStore(database)
+
+
+def test_update_incremental(test_rollups, test_processed) -> None:
+    """
+    Verifies that folding the data in two parts matches rebuilding from the database.
+    """
+    chunk3 = test_processed["chunk3"]
+    test_rollups.update(chunk3.iloc[: len(chunk3) // 2])
+    test_rollups.update(chunk3.iloc[len(chunk3) // 2 :])
+    incremental = test_rollups.query(width=1)
+
+    test_rollups.rebuild()
+    rebuilt = test_rollups.query(width=1)
+
+    assert incremental.attrs["tier"] == "1d", "Coarsest tier was not selected."
+    assert incremental.equals(rebuilt), "Incremental rollups differ from rebuild."
+
+
+def test_query_matches_database(test_rollups) -> None:
+    """
+    Verifies the daily tier against pandas aggregates of the stored readings.
+    """
+    test_rollups.rebuild()
+    daily = test_rollups.query(width=1)
+    readings = test_rollups.database.queryRange("chunk3")
+    expected = (
+        readings.dropna(subset=["Sensor Glucose (mg/dL)"])
+        .astype({"Sensor Glucose (mg/dL)": "float64"})
+        .groupby("Date")["Sensor Glucose (mg/dL)"]
+        .agg(["count", "mean", "max"])
+    )
+
+    assert (daily["count"].values == expected["count"].values).all()
+    assert abs(daily["mean"].values - expected["mean"].values).max() < 1e-6
+    assert (daily["max"].values == expected["max"].values).all()
+
+
+def test_selectTier(test_rollups) -> None:
+    """
+    Verifies that the tier is selected from the time range and the plot width.
+    """
+    assert test_rollups.selectTier("2021-01-01", "2022-01-01", 300) == "1d"
+    assert test_rollups.selectTier("2021-01-01", "2022-01-01", 1000) == "1h"
+    assert test_rollups.selectTier("2021-11-15", "2021-11-16", 1000) == "5min"
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from src.visualization.serialize import FigureSerializer
+
+"""
+The following tests verify the compact figure serialization.
+"""
+
+
+@pytest.fixture
+def test_figure() -> go.Figure:
+    """
+    Fixture of a line of glucose readings over time, with one missing reading.
+    """
+    timestamps = pd.date_range("2021-11-20", periods=4, freq="5min")
+    glucose = np.array([120, 95, np.nan, 60], dtype="float32")
+    return go.Figure(go.Scatter(x=timestamps, y=glucose, name="", legendgroup=""))
+
+
+def test_encodeArray_roundtrip() -> None:
+    """
+    Verifies that arrays decode to the values encoded, with floats narrowed to float32
+    and 64-bit integers to the smallest type holding them.
+    """
+    floats = FigureSerializer.encodeArray(np.array([1.5, np.nan, 250.0]))
+    ints = FigureSerializer.encodeArray(np.array([[1, 2, 3], [4, 5, 300]]))
+
+    assert floats["dtype"] == "f4"
+    np.testing.assert_array_equal(
+        FigureSerializer.decodeArray(floats), [1.5, np.nan, 250.0]
+    )
+    assert ints["dtype"] == "i2"
+    assert ints["shape"] == "2, 3"
+    np.testing.assert_array_equal(
+        FigureSerializer.decodeArray(ints), [[1, 2, 3], [4, 5, 300]]
+    )
+
+
+def test_compact_dates(test_figure) -> None:
+    """
+    Verifies that dates are sent as milliseconds since epoch on a date axis, and that
+    default trace settings are left out.
+    """
+    compact = FigureSerializer.compact(test_figure)
+    trace = compact["data"][0]
+
+    assert trace["x"]["dtype"] == "f8"
+    epoch = FigureSerializer.decodeArray(trace["x"])
+    assert pd.Timestamp(epoch[1], unit="ms") == pd.Timestamp("2021-11-20 00:05")
+    assert compact["layout"]["xaxis"]["type"] == "date"
+    assert np.isnan(FigureSerializer.decodeArray(trace["y"])[2])
+    assert "name" not in trace and "legendgroup" not in trace
+
+
+def test_compact_template(test_figure) -> None:
+    """
+    Verifies that only the template styling of the used trace types is kept, and that
+    the figure serialized is left unchanged.
+    """
+    figure = test_figure.to_dict()
+    compact = FigureSerializer.compact(figure)
+
+    assert list(compact["layout"]["template"]["data"].keys()) == ["scatter"]
+    assert len(figure["layout"]["template"]["data"]) > 1
+    assert "type" not in figure["layout"].get("xaxis", {})
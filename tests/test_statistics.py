@@ -0,0 +1,140 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.statistics import Stats
+
+"""
+The following tests verify the Stats class and its metric kernels.
+"""
+
+
+@pytest.fixture
+def test_processed() -> dict:
+    """
+    Fixture that runs the pipeline on the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()
+
+
+def test_getCoreMetrics(test_processed) -> None:
+    """
+    Verifies the core metrics kernel against plain NumPy.
+    """
+    glucose = test_processed["chunk3"]["Sensor Glucose (mg/dL)"].to_numpy()
+    metrics = Stats.getCoreMetrics(glucose, 70, 180)
+
+    values = glucose[~np.isnan(glucose)].astype("float64")
+    in_range = ((values >= 70) & (values <= 180)).mean()
+
+    assert metrics["count"] == len(values)
+    assert metrics["tir"] == pytest.approx(in_range)
+    assert metrics["tir"] + metrics["time_high"] + metrics["time_low"] == pytest.approx(
+        1
+    )
+    assert metrics["mean"] == pytest.approx(values.mean())
+    assert metrics["sd"] == pytest.approx(values.std(ddof=1))
+    assert metrics["gmi"] == pytest.approx(3.31 + 0.02392 * values.mean())
+
+
+def test_getCoreMetrics_empty() -> None:
+    """
+    Verifies that a series without readings yields missing metrics.
+    """
+    metrics = Stats.getCoreMetrics(np.array([np.nan, np.nan]), 70, 180)
+
+    assert metrics["count"] == 0
+    assert np.isnan(metrics["tir"]) and np.isnan(metrics["mean"])
+
+
+def test_Stats_missing_data() -> None:
+    """
+    Verifies that Stats can be built without any data.
+    """
+    stats = Stats(None, 80, 150)
+    assert stats.tir is None and stats.avgBG is None
+
+
+@pytest.fixture
+def test_readings() -> pd.DataFrame:
+    """
+    Fixture of 5-minute sensor readings with a NaN and a sensor gap.
+    """
+    timestamps = pd.date_range("2021-11-20", periods=10, freq="5min").append(
+        pd.date_range("2021-11-20 02:00", periods=3, freq="5min")
+    )
+    glucose = [100, 110, np.nan, 120, 200, 210, 60, 90, 95, 100, 105, 110, 115]
+    return pd.DataFrame(
+        {"Timestamp": timestamps, "Sensor Glucose (mg/dL)": glucose}
+    ).iloc[::-1]
+
+
+def test_getEpisodes(test_readings) -> None:
+    """
+    Verifies the runs found in unsorted readings, split on bands and sensor gaps.
+    """
+    episodes = Stats.getEpisodes(test_readings, 70, 180)
+
+    assert list(episodes["State"]) == [
+        "in_range",
+        "high",
+        "low",
+        "in_range",
+        "in_range",
+    ]
+    assert list(episodes["Readings"]) == [3, 2, 1, 3, 3]
+    assert episodes["Start"].iloc[3] == pd.Timestamp("2021-11-20 00:35")
+    assert episodes["End"].iloc[0] == pd.Timestamp("2021-11-20 00:15")
+    assert (episodes["Duration"] == episodes["End"] - episodes["Start"]).all()
+
+
+def test_getLongestStint(test_readings) -> None:
+    """
+    Verifies that the longest in-range stint does not span the sensor gap.
+    """
+    assert Stats.getLongestStint(test_readings, 70, 180) == pd.Timedelta(minutes=15)
+    assert Stats.getLongestStint(test_readings, 70, 180, "3h") == pd.Timedelta(
+        minutes=95
+    )
+    assert Stats.getLongestStint(test_readings.iloc[0:0], 70, 180) == pd.Timedelta(0)
+
+
+def test_getDailyAggregates(test_processed) -> None:
+    """
+    Verifies the per-day aggregates against filtering each day separately.
+    """
+    daily = Stats.getDailyAggregates(test_processed, 70, 180)
+    sensor = test_processed["chunk3"]
+    pump = test_processed["chunk1"]
+
+    for day, row in daily.iterrows():
+        glucose = sensor.loc[sensor["Date"] == day, "Sensor Glucose (mg/dL)"].dropna()
+        carbs = pump.loc[pump["Date"] == day, "BWZ Carb Input (grams)"]
+
+        assert row["count"] == len(glucose)
+        assert row["mean"] == pytest.approx(glucose.mean())
+        assert row["tir"] == pytest.approx(glucose.between(70, 180).mean())
+        assert row["carbs"] == pytest.approx(carbs.sum())
+
+
+def test_getHighestDay_skips_today() -> None:
+    """
+    Verifies that today is skipped without stopping the search over the other days.
+    """
+    today = pd.Timestamp(date.today())
+    daily = pd.DataFrame(
+        {"mean": [150.0, 300.0, 200.0, np.nan]},
+        index=[
+            today - pd.Timedelta(days=2),
+            today,
+            today + pd.Timedelta(days=1),
+            today - pd.Timedelta(days=1),
+        ],
+    )
+
+    assert Stats.getHighestDay(daily) == {
+        "Date": today + pd.Timedelta(days=1),
+        "Value": 200,
+    }
+    assert Stats.getLowestDay(daily)["Date"] == today - pd.Timedelta(days=2)
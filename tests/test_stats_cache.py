@@ -0,0 +1,87 @@
+import os
+
+import pytest
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.cache import StatsCache
+
+"""
+The following tests verify the StatsCache class.
+"""
+
+
+@pytest.fixture
+def test_processed() -> dict:
+    """
+    Fixture that runs the pipeline on the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()
+
+
+def test_getStats_hits(test_processed) -> None:
+    """
+    Verifies that repeated parameters are served from memory and counted as hits.
+    """
+    cache = StatsCache()
+    key = StatsCache.hashData(test_processed)
+
+    first = cache.getStats(test_processed, key, 80, 150)
+    second = cache.getStats(test_processed, key, 80, 150)
+    other = cache.getStats(test_processed, key, 70, 180)
+
+    assert second is first
+    assert other is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.getHitRate() == pytest.approx(1 / 3)
+
+
+def test_lru_eviction(test_processed) -> None:
+    """
+    Verifies that the least recently used entry is evicted first.
+    """
+    cache = StatsCache(maxsize=2)
+    key = StatsCache.hashData(test_processed)
+
+    cache.getStats(test_processed, key, 80, 150)
+    cache.getStats(test_processed, key, 70, 180)
+    cache.getStats(test_processed, key, 80, 150)
+    cache.getStats(test_processed, key, 90, 160)
+
+    assert list(cache.entries.keys()) == [
+        StatsCache.getKey(key, 80, 150),
+        StatsCache.getKey(key, 90, 160),
+    ]
+
+
+def test_disk_backed(test_processed, tmp_path) -> None:
+    """
+    Verifies that a second cache on the same directory reuses stored entries.
+    """
+    key = StatsCache.hashData(test_processed)
+    stats = StatsCache(cache_dir=str(tmp_path)).getStats(test_processed, key, 80, 150)
+
+    cache = StatsCache(cache_dir=str(tmp_path))
+    loaded = cache.get(StatsCache.getKey(key, 80, 150))
+
+    assert cache.hits == 1
+    assert loaded.tir == stats.tir
+    assert loaded.insulinTotal == stats.insulinTotal
+    assert loaded.daily.equals(stats.daily)
+
+
+def test_disk_pruned(test_processed, tmp_path) -> None:
+    """
+    Verifies that the disk-backed entries are capped at `maxsize`, dropping the least
+    recently used ones.
+    """
+    key = StatsCache.hashData(test_processed)
+    cache = StatsCache(maxsize=2, cache_dir=str(tmp_path))
+    first = cache.getPath(StatsCache.getKey(key, 80, 150))
+
+    cache.getStats(test_processed, key, 80, 150)
+    cache.getStats(test_processed, key, 70, 180)
+    os.utime(first, (0, 0))
+    cache.getStats(test_processed, key, 90, 160)
+
+    stored = os.listdir(os.path.dirname(first))
+    assert len(stored) == 2, "The disk store was not pruned."
+    assert os.path.basename(first) not in stored, "The wrong entry was pruned."
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data.grid import GlucoseGrid
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.variability import Variability
+
+"""
+The following tests verify the glycemic variability metrics.
+"""
+
+
+@pytest.fixture
+def test_chunk3() -> pd.DataFrame:
+    """
+    Fixture that returns the cleaned sensor data of the source CSV.
+    """
+    return WeeklyDataPipeline.pipe()["chunk3"]
+
+
+def test_getCONGA_getMODD(test_chunk3) -> None:
+    """
+    Verifies CONGA-1 and MODD against lookups by timestamp.
+    """
+    grid = GlucoseGrid.fromFrame(test_chunk3)
+    readings = (
+        test_chunk3.dropna(subset=["Sensor Glucose (mg/dL)"])
+        .assign(Slot=lambda df: df["Timestamp"].dt.floor("5min"))
+        .drop_duplicates("Slot", keep="last")
+        .set_index("Slot")["Sensor Glucose (mg/dL)"]
+        .astype("float64")
+    )
+
+    hour = readings - readings.reindex(readings.index - pd.Timedelta(hours=1)).values
+    day = readings - readings.reindex(readings.index - pd.Timedelta(days=1)).values
+
+    assert Variability.getCONGA(grid, 1) == pytest.approx(hour.dropna().std())
+    assert Variability.getMODD(grid) == pytest.approx(day.dropna().abs().mean())
+
+
+def test_getRiskIndices() -> None:
+    """
+    Verifies the risk indices against the published risk function.
+    """
+    values = np.array([50.0, 112.5, 300.0])
+    f = 1.509 * (np.log(values) ** 1.084 - 5.381)
+
+    lbgi, hbgi = Variability.getRiskIndices(values)
+
+    assert lbgi == pytest.approx(10 * f[0] ** 2 / 3)
+    assert hbgi == pytest.approx(10 * (f[1] ** 2 + f[2] ** 2) / 3)
+
+
+def test_getMAGE() -> None:
+    """
+    Verifies that MAGE ignores oscillations smaller than one SD.
+    """
+    values = np.array([100, 150, 200, 190, 195, 150, 100, 105, 100, 200, 100.0])
+
+    assert Variability.getMAGE(values) == pytest.approx(100)
+    assert np.isnan(Variability.getMAGE(np.full(10, 120.0)))
+
+
+def test_getMAGE_sine() -> None:
+    """
+    Verifies MAGE on a sine of 100 mg/dL peak to nadir over three days: the incomplete
+    excursions at both ends are left out, and small ripples on the rises are ignored.
+    """
+    values = 150 + 50 * np.sin(2 * np.pi * np.arange(3 * 288) / 36)
+    assert Variability.getMAGE(values) == pytest.approx(100)
+
+    values[4::36] = values[3::36] - 5
+    assert Variability.getMAGE(values) == pytest.approx(100)
+
+
+def test_getMetrics_empty() -> None:
+    """
+    Verifies that a grid without readings yields missing metrics.
+    """
+    grid = GlucoseGrid.fromFrame(
+        pd.DataFrame(
+            {
+                "Timestamp": pd.to_datetime(["2021-11-20"]),
+                "Sensor Glucose (mg/dL)": [np.nan],
+            }
+        )
+    )
+
+    assert all(np.isnan(_) for _ in Variability.getMetrics(grid).values())
@@ -0,0 +1,125 @@
+import pandas as pd
+import pytest
+from src.data.database import GlucoseDatabase
+from src.data.rollups import RollupStore
+from src.pipelines.pipelines import WeeklyDataPipeline
+from src.statistics.rolling import RollingMetrics
+from src.visualization import visualize
+
+"""
+The following tests verify the plots of the visualize module.
+"""
+
+
+@pytest.fixture
+def test_chunk3() -> pd.DataFrame:
+    """
+    Fixture of sensor readings over two days at known times, out of order.
+    """
+    timestamps = pd.to_datetime(
+        [
+            "2021-11-16 13:30",
+            "2021-11-16 00:05",
+            "2021-11-17 00:00",
+            "2021-11-17 23:55",
+            "2021-11-17 06:15",
+        ]
+    )
+    return pd.DataFrame(
+        {
+            "Date": timestamps.normalize(),
+            "Time": timestamps.time,
+            "Sensor Glucose (mg/dL)": [150.0, 90.0, 110.0, 200.0, 65.0],
+            "Timestamp": timestamps,
+        }
+    )
+
+
+def test_getDailyLinePlot_webgl(test_chunk3) -> None:
+    """
+    Verifies that every day is a Scattergl trace on seconds since midnight, with the
+    readings in time order and their hh:mm time as hover text.
+    """
+    fig = visualize.getDailyLinePlot(test_chunk3).figure
+    traces = [_ for _ in fig.data if _.type == "scattergl"]
+
+    assert len(traces) == 2, "Expected one Scattergl trace per day."
+    assert list(traces[0].x) == [5 * 60, 13.5 * 60 * 60]
+    assert list(traces[0].y) == [90, 150]
+    assert list(traces[1].x) == [0, 6.25 * 60 * 60, 23 * 60 * 60 + 55 * 60]
+    assert list(traces[1].customdata) == ["00:00", "06:15", "23:55"]
+    assert traces[1].hovertemplate == "%{customdata}<br>%{y} mg/dL"
+
+
+def test_getDailyLinePlot_axis(test_chunk3) -> None:
+    """
+    Verifies that the x-axis spans the whole day, labelled every 3 hours.
+    """
+    xaxis = visualize.getDailyLinePlot(test_chunk3).figure.layout.xaxis
+
+    assert xaxis.type == "linear"
+    assert list(xaxis.range) == [0, 24 * 60 * 60]
+    assert list(xaxis.tickvals) == [hour * 60 * 60 for hour in range(0, 25, 3)]
+    assert list(xaxis.ticktext) == [
+        "00:00",
+        "03:00",
+        "06:00",
+        "09:00",
+        "12:00",
+        "15:00",
+        "18:00",
+        "21:00",
+        "24:00",
+    ]
+
+
+def test_getDailyLinePlot_svg(test_chunk3) -> None:
+    """
+    Verifies that the SVG fallback keeps the Time category axis.
+    """
+    fig = visualize.getDailyLinePlot(test_chunk3, webgl=False).figure
+
+    assert all(_.type == "scatter" for _ in fig.data[:2])
+    assert fig.layout.xaxis.type == "category"
+
+
+def test_getRollingTrendPlot_partial() -> None:
+    """
+    Verifies that windows below the coverage cutoff are drawn dotted with a note, instead
+    of leaving the plot empty.
+    """
+    rolling = RollingMetrics.getRolling(WeeklyDataPipeline.pipe()["chunk3"])
+    fig = visualize.getRollingTrendPlot(rolling).figure
+    notes = [_.text for _ in fig.layout.annotations if "Dotted" in _.text]
+
+    assert len(fig.data) > 0, "No window was plotted."
+    assert all(_.line.dash == "dot" for _ in fig.data), "Partial windows look reliable."
+    assert notes == [
+        "Dotted windows hold less than 70% of their readings. A 14 day window needs at "
+        "least 10 days of history."
+    ]
+
+    fig = visualize.getRollingTrendPlot(rolling, min_coverage=0).figure
+    assert all(_.line.dash == "solid" for _ in fig.data)
+    assert not any("Dotted" in _.text for _ in fig.layout.annotations)
+
+
+def test_getWeeklyRollupFigure(tmp_path) -> None:
+    """
+    Verifies that rollups are drawn as a mean line over a min-max band, with missing
+    buckets breaking the line.
+    """
+    database = GlucoseDatabase(str(tmp_path / "test.sqlite"))
+    database.insert(WeeklyDataPipeline.pipe())
+    rollups = RollupStore(database)
+    rollups.rebuild()
+
+    buckets = rollups.query("2021-11-15", "2021-11-20", width=100)
+    buckets = buckets.drop(buckets.index[5])
+    fig = visualize.getWeeklyRollupFigure(buckets, "2021-11-15", "2021-11-20")
+
+    assert [_.fill for _ in fig.data] == [None, "tonexty", None]
+    hours = (buckets.index[-1] - buckets.index[0]) // pd.Timedelta(hours=1) + 1
+    assert len(fig.data[2].y) == hours, "Buckets are not on a regular grid."
+    assert pd.isna(fig.data[2].y[5]), "The missing bucket was not a gap."
+    assert list(fig.layout.xaxis.range) == ["2021-11-15", "2021-11-20"]